@@ -0,0 +1,152 @@
+"""Verificação de saída e benchmark da extração de texto dos PDFs do PGDAS.
+
+O texto do pdfplumber (``extract_text`` página a página), a biblioteca
+padrão, fica como referência: o PyMuPDF com as palavras agrupadas em linhas
+precisa gerar o mesmo texto em cada página e, a partir dele, o processador
+precisa chegar aos mesmos débitos exigíveis, identificação e registros por
+atividade. A verificação roda em PDFs sintéticos (tabela do débito exigível
+com colunas alinhadas, linhas longas em fonte pequena), nos PDFs passados em
+``--pdf`` e nos da pasta ``--amostras`` (padrão: ``HANSU_PGDAS_AMOSTRAS``).
+
+Os sintéticos são gerados pelo próprio PyMuPDF e não bastam para tornar o
+PyMuPDF padrão: isso depende de passar em declarações reais do PGDAS, que
+não ficam no repositório por conterem dados de clientes.
+
+Depois, cada biblioteca é cronometrada sozinha e a extração padrão é medida
+com ``--workers`` processos.
+
+Uso: python -m pgdas_backend.bench_extracao [--pages 60] [--workers 1 4] [--pdf a.pdf ...] [--amostras pasta]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from .core.processor import PGDASProcessor
+from .services.pdf_extractor import BACKENDS, backends_disponiveis, extrair_paginas_pdf
+
+COLUNAS_EXIGIVEL = ["IRPJ", "CSLL", "COFINS", "PIS/Pasep", "INSS/CPP", "ICMS", "IPI", "ISS", "Total"]
+
+
+def _valor(rng: random.Random) -> str:
+    inteiro = rng.randrange(0, 200_000)
+    return f"{inteiro:,}".replace(",", ".") + f",{rng.randrange(100):02d}"
+
+
+def pdf_sintetico(caminho: Path, paginas: int, rng: random.Random) -> None:
+    """Declarações do PGDAS simplificadas, uma por página."""
+    doc = fitz.open()
+    for numero in range(paginas):
+        pagina = doc.new_page()
+        y = 40
+
+        def linha(*partes, tamanho: float = 9) -> None:
+            nonlocal y
+            x = 40
+            for parte in partes:
+                if isinstance(parte, tuple):
+                    x, parte = parte
+                pagina.insert_text((x, y), parte, fontsize=tamanho)
+                x += fitz.get_text_length(parte, fontsize=tamanho) + 4
+            y += tamanho + 4
+
+        linha("Programa Gerador do Documento de Arrecadação do Simples Nacional - Declaratório")
+        linha(f"Período de Apuração: {numero % 12 + 1:02d}/2024")
+        linha("CNPJ Matriz: 12.345.678/0001-90")
+        linha("Nome Empresarial: EMPRESA EXEMPLO LTDA")
+        linha(rng.choice(["Tipo de Declaração: Original", "Tipo de Declaração: Retificadora"]))
+        for estabelecimento in range(rng.randrange(1, 4)):
+            linha(f"CNPJ Estabelecimento: 12.345.678/000{estabelecimento + 1}-9{estabelecimento}")
+            linha("Valor do Débito por Tributo para a Atividade (R$):")
+            linha(
+                "Revenda de mercadorias, exceto para o exterior - Sem substituição tributária/"
+                "tributação monofásica/antecipação com encerramento de tributação",
+                tamanho=6,
+            )
+            linha("Receita Bruta Informada: R$", _valor(rng))
+            linha(f"Parcela 1: R$ {_valor(rng)}")
+            if rng.random() < 0.5:
+                linha("Substituição tributária de: ICMS")
+            linha(f"Parcela 2: R$ {_valor(rng)}")
+            linha("Totais")
+        linha("2.8) Total Geral da Empresa")
+        linha("Total do Débito Exigível (R$)")
+        linha(*[(40 + i * 58, coluna) for i, coluna in enumerate(COLUNAS_EXIGIVEL)])
+        linha(*[(40 + i * 58, _valor(rng)) for i in range(len(COLUNAS_EXIGIVEL))])
+        for _ in range(rng.randrange(5, 15)):
+            linha("Observação " + " ".join(rng.choice(["a", "bb", "Débito", "R$", "1.234,00"]) for _ in range(rng.randrange(3, 12))))
+    doc.save(caminho)
+
+
+def _resultado(processador: PGDASProcessor, texto: str) -> tuple:
+    competencia = processador._extrair_competencia(texto, "")
+    return (
+        processador.extrair_debito_exigivel(texto, competencia),
+        processador.extrair_identificacao(texto, competencia),
+        processador._processar_blocos_por_cnpj(texto, competencia),
+    )
+
+
+def _comparar(caminho: Path) -> int:
+    referencia = extrair_paginas_pdf(str(caminho), backends=["pdfplumber"], workers=1)
+    atual = extrair_paginas_pdf(str(caminho), backends=["pymupdf"], workers=1)
+    if len(referencia.paginas) != len(atual.paginas):
+        raise SystemExit(f"divergência no número de páginas em {caminho.name}")
+    for esperada, obtida in zip(referencia.paginas, atual.paginas):
+        if esperada.texto != obtida.texto:
+            raise SystemExit(f"divergência de texto em {caminho.name} p. {esperada.numero}")
+
+    # Uma declaração por página, como o processador recebe cada PDF.
+    processador = PGDASProcessor()
+    for esperada, obtida in zip(referencia.paginas, atual.paginas):
+        if _resultado(processador, esperada.texto) != _resultado(processador, obtida.texto):
+            raise SystemExit(f"divergência de registros em {caminho.name} p. {esperada.numero}")
+    return len(atual.paginas)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--pdf", type=Path, nargs="*", default=[])
+    parser.add_argument("--amostras", type=Path, default=os.getenv("HANSU_PGDAS_AMOSTRAS") or None)
+    args = parser.parse_args()
+
+    reais = list(args.pdf)
+    if args.amostras is not None:
+        reais.extend(sorted(args.amostras.glob("*.pdf")))
+
+    rng = random.Random(2024)
+    with tempfile.TemporaryDirectory() as tmp:
+        sintetico = Path(tmp) / "pgdas.pdf"
+        pdf_sintetico(sintetico, args.pages, rng)
+
+        for caminho in [sintetico, *reais]:
+            print(f"golden: {caminho.name} idêntico ({_comparar(caminho)} páginas)")
+        if not reais:
+            print("aviso: nenhuma declaração real conferida (--pdf/--amostras); o PyMuPDF segue opcional")
+
+        for nome in backends_disponiveis(BACKENDS):
+            inicio = time.perf_counter()
+            extracao = extrair_paginas_pdf(str(sintetico), backends=[nome], workers=1)
+            decorrido = time.perf_counter() - inicio
+            print(f"{nome:<11} {len(extracao.paginas) / decorrido:10,.1f} páginas/s")
+
+        for workers in args.workers:
+            inicio = time.perf_counter()
+            extracao = extrair_paginas_pdf(str(sintetico), workers=workers)
+            decorrido = time.perf_counter() - inicio
+            print(
+                f"padrão {workers:>2} proc. {len(extracao.paginas) / decorrido:10,.1f} páginas/s  "
+                f"{extracao.paginas_por_backend()}"
+            )
+
+
+if __name__ == "__main__":
+    main()
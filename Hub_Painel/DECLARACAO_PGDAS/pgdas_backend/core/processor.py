@@ -1,19 +1,34 @@
 import re
 from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
+from hansu_comum.cache_extracao import cache_padrao
+from hansu_comum.exportadores import exportar, tabela_de_dataframe
+
 from ..config.logger import configurar_logger
-from ..services.pdf_extractor import extrair_texto_pdf
+from ..services.pdf_extractor import backends_disponiveis, extrair_texto_pdf
 from ..utils_back.helpers import detectar_anexo, identificar_natureza_resumida
 
 logger = configurar_logger()
 
+# Incrementar quando a extração mudar, para invalidar resultados em cache.
+VERSAO_EXTRATOR = "3"
+
 
 class PGDASProcessor:
-    def __init__(self):
+    """Extrai os registros das declarações do PGDAS-D.
+
+    ``backends`` e ``workers`` vão para :func:`extrair_texto_pdf` (padrão:
+    ``BACKENDS_PADRAO``, extração serial). As bibliotecas usadas entram na
+    chave do cache, já que o texto muda conforme a biblioteca.
+    """
+
+    def __init__(self, backends: Optional[Sequence[str]] = None, workers: int = 1):
+        self.backends = tuple(backends) if backends else None
+        self.workers = workers
         self.regex_periodo = re.compile(r"Per[ií]odo de Apura[\u00e7c][aã]o:\s*(\d{2}/\d{4})", re.IGNORECASE)
         self.regex_competencia_generica = re.compile(r"\d{2}/\d{4}")
         self.regex_cnpjs = re.compile(r"CNPJ(?:\s+\w+)? ?:?\s*(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})", re.IGNORECASE)
@@ -57,22 +72,31 @@ class PGDASProcessor:
         todos_exigiveis: List[Dict] = []
         todos_identificacao: List[Dict] = []
 
+        cache = cache_padrao()
+        backends = backends_disponiveis(self.backends)
+
         for caminho_pdf in caminhos_pdf:
-            texto = extrair_texto_pdf(caminho_pdf)
-            if not texto or not texto.strip():
+            if cache is not None:
+                resultado = cache.obter_ou_calcular(
+                    caminho_pdf,
+                    "pgdas.processar_pdf",
+                    VERSAO_EXTRATOR,
+                    lambda: self._processar_pdf(caminho_pdf, backends),
+                    parametros=(backends,),
+                )
+            else:
+                resultado = self._processar_pdf(caminho_pdf, backends)
+
+            if resultado is None:
                 logger.error("PDF sem texto reconhecível", extra={"arquivo": caminho_pdf})
                 continue
 
-            competencia_dt = self._extrair_competencia(texto, caminho_pdf)
-
-            exigivel = self.extrair_debito_exigivel(texto, competencia_dt)
+            exigivel, identificacao, registros = resultado
             if exigivel:
                 todos_exigiveis.append(exigivel)
 
-            todos_identificacao.append(self.extrair_identificacao(texto, competencia_dt))
-
-            for registro in self._processar_blocos_por_cnpj(texto, competencia_dt):
-                todos_dados.append(registro)
+            todos_identificacao.append(identificacao)
+            todos_dados.extend(registros)
 
         df_detalhado = pd.DataFrame(todos_dados)
         if not df_detalhado.empty and "MesAno" in df_detalhado.columns:
@@ -96,6 +120,21 @@ class PGDASProcessor:
         )
         return df_detalhado
 
+    def _processar_pdf(
+        self, caminho_pdf: str, backends: Sequence[str]
+    ) -> Optional[Tuple[Optional[Dict], Dict, List[Dict]]]:
+        """Extrai (débito exigível, identificação, registros) de um PDF; None se sem texto."""
+        texto = extrair_texto_pdf(caminho_pdf, backends, self.workers)
+        if not texto or not texto.strip():
+            return None
+
+        competencia_dt = self._extrair_competencia(texto, caminho_pdf)
+        return (
+            self.extrair_debito_exigivel(texto, competencia_dt),
+            self.extrair_identificacao(texto, competencia_dt),
+            self._processar_blocos_por_cnpj(texto, competencia_dt),
+        )
+
     def extrair_identificacao(self, texto: str, competencia: Optional[datetime]) -> Dict:
         return {
             "MesAno": competencia,
@@ -273,16 +312,23 @@ class PGDASProcessor:
         df: pd.DataFrame,
         df_exigivel: pd.DataFrame,
         caminho: str,
+        formato: Optional[str] = None,
     ) -> Optional[str]:
+        """Grava as duas tabelas em ``caminho``; retorna o caminho principal gravado.
+
+        ``formato`` (xlsx, csv, jsonl ou parquet) vem da extensão de ``caminho``
+        quando omitido. Fora do xlsx, cada tabela vai para um arquivo próprio.
+        """
         if df.empty and df_exigivel.empty:
             logger.warning("Nenhum dado encontrado para salvar.")
             return None
 
-        with pd.ExcelWriter(caminho, engine="xlsxwriter") as writer:
-            if not df.empty:
-                df.to_excel(writer, sheet_name="segregação por atividade", index=False)
-            if not df_exigivel.empty:
-                df_exigivel.to_excel(writer, sheet_name="Débitos Apurados", index=False)
+        tabelas = []
+        if not df.empty:
+            tabelas.append(tabela_de_dataframe("segregação por atividade", df))
+        if not df_exigivel.empty:
+            tabelas.append(tabela_de_dataframe("Débitos Apurados", df_exigivel))
+        caminhos = exportar(tabelas, caminho, formato)
 
-        logger.info("Resultado salvo", extra={"arquivo_saida": caminho})
-        return caminho
+        logger.info("Resultado salvo", extra={"arquivo_saida": str(caminhos[0])})
+        return str(caminhos[0])
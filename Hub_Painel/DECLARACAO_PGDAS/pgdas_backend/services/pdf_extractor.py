@@ -1,75 +1,309 @@
+import importlib.util
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
-
-import pdfplumber
-from PyPDF2 import PdfReader
-from PyPDF2.errors import PdfReadError
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from ..config.logger import configurar_logger
 
 logger = configurar_logger()
 
+# Ordem padrão das bibliotecas, tentadas página a página: pdfplumber e, de
+# reserva, PyPDF2 (que junta células de tabela sem espaço). O PyMuPDF, com as
+# palavras agrupadas em linhas como o pdfplumber faz, gera o mesmo texto
+# dezenas de vezes mais rápido nos PDFs sintéticos do bench_extracao, mas só
+# deve virar padrão depois de conferido em declarações reais; até lá, é
+# ativado com HANSU_PGDAS_BACKENDS_PDF=pymupdf,pdfplumber,pypdf2.
+BACKENDS_PADRAO = tuple(
+    nome.strip()
+    for nome in (os.getenv("HANSU_PGDAS_BACKENDS_PDF") or "pdfplumber,pypdf2").split(",")
+    if nome.strip()
+)
+# Mesma tolerância vertical (pt) que o extract_text do pdfplumber usa para montar linhas.
+TOLERANCIA_LINHA = 3
+
+
+@dataclass(frozen=True)
+class PaginaExtraida:
+    """Texto de uma página e como foi obtido.
 
-def extrair_texto_pdf(caminho_pdf: str) -> Optional[str]:
+    ``backend`` é a biblioteca que extraiu o texto (``None`` se nenhuma
+    conseguiu); ``falhas`` lista ``(backend, motivo)`` das tentativas
+    anteriores; ``tempo_ms`` soma todas as tentativas da página.
     """
-    Extrai texto de um PDF usando pdfplumber e PyPDF2 (fallback).
-    Retorna None somente quando:
-    - o arquivo não existe/não pode ser lido;
-    - as duas bibliotecas falham;
-    - ou o PDF não contém texto extraível.
+
+    numero: int
+    texto: str
+    backend: Optional[str]
+    tempo_ms: float
+    falhas: Tuple[Tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class ExtracaoPdf:
+    caminho: str
+    paginas: Tuple[PaginaExtraida, ...]
+    tempo_ms: float
+
+    @property
+    def texto(self) -> str:
+        return "\n".join(pagina.texto for pagina in self.paginas).strip()
+
+    def paginas_por_backend(self) -> Dict[str, int]:
+        contagem: Dict[str, int] = {}
+        for pagina in self.paginas:
+            chave = pagina.backend or "nenhum"
+            contagem[chave] = contagem.get(chave, 0) + 1
+        return contagem
+
+
+def _linhas_de_palavras(palavras: List[tuple]) -> str:
+    """Junta as palavras do PyMuPDF em linhas, como o ``extract_text`` do pdfplumber.
+
+    Palavras cujo topo fica a até :data:`TOLERANCIA_LINHA` da anterior
+    (ordenadas pelo topo) formam uma linha, lida da esquerda para a direita.
     """
-    caminho = Path(caminho_pdf)
+    palavras = sorted(palavras, key=lambda palavra: (palavra[1], palavra[0]))
+    linhas: List[str] = []
+    atual: List[tuple] = []
+    topo = 0.0
+    for palavra in palavras:
+        if atual and palavra[1] - topo > TOLERANCIA_LINHA:
+            linhas.append(" ".join(p[4] for p in sorted(atual, key=lambda p: p[0])))
+            atual = []
+        atual.append(palavra)
+        topo = palavra[1]
+    if atual:
+        linhas.append(" ".join(p[4] for p in sorted(atual, key=lambda p: p[0])))
+    return "\n".join(linhas)
+
+
+# ``limiar_paralelo``: páginas a partir das quais vale subir um pool de
+# processos. PyMuPDF leva ~2 ms por página, pdfplumber ~100 ms; abaixo disso
+# o pool custa mais para subir do que economiza.
+
+
+class _PyMuPDF:
+    modulo = "fitz"
+    limiar_paralelo = 256
+
+    def __init__(self, caminho_pdf: str):
+        import fitz  # PyMuPDF
+
+        self.doc = fitz.open(caminho_pdf)
+
+    def __len__(self) -> int:
+        return self.doc.page_count
+
+    def texto(self, indice: int) -> str:
+        return _linhas_de_palavras(self.doc[indice].get_text("words"))
+
+    def fechar(self) -> None:
+        self.doc.close()
+
+
+class _Pdfplumber:
+    modulo = "pdfplumber"
+    limiar_paralelo = 16
+
+    def __init__(self, caminho_pdf: str):
+        import pdfplumber
+
+        self.pdf = pdfplumber.open(caminho_pdf)
+
+    def __len__(self) -> int:
+        return len(self.pdf.pages)
+
+    def texto(self, indice: int) -> str:
+        pagina = self.pdf.pages[indice]
+        try:
+            return pagina.extract_text() or ""
+        finally:
+            pagina.close()  # libera os caracteres analisados da página
+
+    def fechar(self) -> None:
+        self.pdf.close()
+
+
+class _PyPDF2:
+    modulo = "PyPDF2"
+    limiar_paralelo = 64
+
+    def __init__(self, caminho_pdf: str):
+        from PyPDF2 import PdfReader
+
+        self.arquivo = open(caminho_pdf, "rb")
+        try:
+            self.reader = PdfReader(self.arquivo)
+        except Exception:
+            self.arquivo.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self.reader.pages)
+
+    def texto(self, indice: int) -> str:
+        return self.reader.pages[indice].extract_text() or ""
 
+    def fechar(self) -> None:
+        self.arquivo.close()
+
+
+BACKENDS = {
+    "pymupdf": _PyMuPDF,
+    "pdfplumber": _Pdfplumber,
+    "pypdf2": _PyPDF2,
+}
+
+
+def backends_disponiveis(backends: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+    """``backends`` (padrão: :data:`BACKENDS_PADRAO`) sem os que não estão instalados."""
+    backends = tuple(backends or BACKENDS_PADRAO)
+    desconhecidos = [nome for nome in backends if nome not in BACKENDS]
+    if desconhecidos:
+        raise ValueError(
+            f"Backend de PDF desconhecido: {', '.join(desconhecidos)}. Disponíveis: {', '.join(BACKENDS)}."
+        )
+    return tuple(nome for nome in backends if importlib.util.find_spec(BACKENDS[nome].modulo) is not None)
+
+
+def _descricao_erro(exc: Exception) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _extrair_pagina(caminho_pdf: str, indice: int, backends: Tuple[str, ...], abertos: Dict[str, object]) -> PaginaExtraida:
+    inicio = time.perf_counter()
+    falhas: List[Tuple[str, str]] = []
+    for nome in backends:
+        if nome not in abertos:
+            # Cada biblioteca só abre o PDF quando alguma página precisa dela.
+            try:
+                abertos[nome] = BACKENDS[nome](caminho_pdf)
+            except Exception as exc:  # PDF que uma biblioteca não lê pode abrir em outra
+                abertos[nome] = _descricao_erro(exc)
+        documento = abertos[nome]
+        if isinstance(documento, str):
+            falhas.append((nome, documento))
+            continue
+
+        try:
+            texto = documento.texto(indice)
+        except Exception as exc:  # página corrompida em uma biblioteca não impede as demais
+            falhas.append((nome, _descricao_erro(exc)))
+            continue
+        if texto.strip():
+            return PaginaExtraida(indice + 1, texto, nome, (time.perf_counter() - inicio) * 1000, tuple(falhas))
+        falhas.append((nome, "sem texto"))
+
+    return PaginaExtraida(indice + 1, "", None, (time.perf_counter() - inicio) * 1000, tuple(falhas))
+
+
+def _extrair_trecho(caminho_pdf: str, inicio: int, fim: int, backends: Tuple[str, ...]) -> List[PaginaExtraida]:
+    abertos: Dict[str, object] = {}
+    try:
+        return [_extrair_pagina(caminho_pdf, indice, backends, abertos) for indice in range(inicio, fim)]
+    finally:
+        for documento in abertos.values():
+            if not isinstance(documento, str):
+                documento.fechar()
+
+
+def _contar_paginas(caminho_pdf: str, backends: Tuple[str, ...]) -> Optional[int]:
+    for nome in backends:
+        try:
+            documento = BACKENDS[nome](caminho_pdf)
+        except Exception as exc:
+            logger.warning(
+                "Falha ao abrir o PDF",
+                extra={"arquivo": caminho_pdf, "backend": nome, "erro": str(exc)},
+            )
+            continue
+        try:
+            return len(documento)
+        finally:
+            documento.fechar()
+    return None
+
+
+def extrair_paginas_pdf(
+    caminho_pdf: str,
+    backends: Optional[Sequence[str]] = None,
+    workers: int = 1,
+) -> Optional[ExtracaoPdf]:
+    """Extrai o texto de cada página, com a biblioteca usada e o tempo gasto.
+
+    Para cada página, as bibliotecas de ``backends`` (padrão:
+    :data:`BACKENDS_PADRAO`, sem as não instaladas) são tentadas em ordem
+    até uma devolver texto. Por padrão a extração é serial: quem chama já
+    pode estar num pool de processos (o HUB roda um PDF por worker). Com
+    ``workers`` > 1 e páginas suficientes para a primeira biblioteca
+    compensar o custo de um pool, trechos de páginas são extraídos em
+    paralelo.
+
+    Retorna None quando o arquivo não existe ou nenhuma biblioteca o abre.
+    """
+    caminho = Path(caminho_pdf)
     if not caminho.exists():
         logger.error("Arquivo PDF não encontrado", extra={"arquivo": caminho_pdf})
         return None
 
-    texto = _extrair_com_pdfplumber(caminho)
-    if texto:
-        return texto
+    backends = backends_disponiveis(backends)
+    inicio = time.perf_counter()
+    total = _contar_paginas(str(caminho), backends)
+    if total is None:
+        logger.error("Nenhuma biblioteca conseguiu abrir o PDF", extra={"arquivo": caminho_pdf})
+        return None
 
-    texto = _extrair_com_pypdf2(caminho)
-    if texto:
-        return texto
+    if workers <= 1 or total < BACKENDS[backends[0]].limiar_paralelo:
+        paginas = _extrair_trecho(str(caminho), 0, total, backends)
+    else:
+        # Dois trechos por worker: equilibra a carga sem abrir o PDF vezes demais.
+        tamanho = math.ceil(total / (workers * 2))
+        inicios = range(0, total, tamanho)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            trechos = executor.map(
+                _extrair_trecho,
+                [str(caminho)] * len(inicios),
+                inicios,
+                [min(i + tamanho, total) for i in inicios],
+                [backends] * len(inicios),
+            )
+            paginas = [pagina for trecho in trechos for pagina in trecho]
 
-    logger.error("Nenhuma biblioteca conseguiu extrair texto", extra={"arquivo": caminho_pdf})
-    return None
+    return ExtracaoPdf(str(caminho), tuple(paginas), (time.perf_counter() - inicio) * 1000)
 
 
-def _extrair_com_pdfplumber(caminho_pdf: Path) -> Optional[str]:
-    try:
-        with pdfplumber.open(caminho_pdf) as pdf:
-            paginas = [page.extract_text() or "" for page in pdf.pages]
-            texto = "\n".join(paginas).strip()
-            if texto:
-                logger.info("Texto extraído com pdfplumber", extra={"arquivo": str(caminho_pdf)})
-                return texto
-
-            logger.warning("pdfplumber não encontrou texto", extra={"arquivo": str(caminho_pdf)})
-            return None
-    except (OSError, ValueError, TypeError) as exc:
-        logger.warning(
-            "Falha no pdfplumber",
-            extra={"arquivo": str(caminho_pdf), "erro": str(exc)},
-        )
+def extrair_texto_pdf(
+    caminho_pdf: str,
+    backends: Optional[Sequence[str]] = None,
+    workers: int = 1,
+) -> Optional[str]:
+    """
+    Texto do PDF inteiro, com as páginas separadas por quebra de linha
+    (ver :func:`extrair_paginas_pdf`).
+    Retorna None somente quando:
+    - o arquivo não existe/não pode ser lido;
+    - nenhuma biblioteca extrai texto de nenhuma página;
+    - ou o PDF não contém texto extraível.
+    """
+    extracao = extrair_paginas_pdf(caminho_pdf, backends, workers)
+    if extracao is None:
         return None
 
-
-def _extrair_com_pypdf2(caminho_pdf: Path) -> Optional[str]:
-    try:
-        with caminho_pdf.open("rb") as file:
-            reader = PdfReader(file)
-            paginas = [page.extract_text() or "" for page in reader.pages]
-            texto = "\n".join(paginas).strip()
-            if texto:
-                logger.info("Texto extraído com PyPDF2", extra={"arquivo": str(caminho_pdf)})
-                return texto
-
-            logger.warning("PyPDF2 não encontrou texto", extra={"arquivo": str(caminho_pdf)})
-            return None
-    except (OSError, PdfReadError, ValueError, TypeError) as exc:
-        logger.error(
-            "Falha no PyPDF2",
-            extra={"arquivo": str(caminho_pdf), "erro": str(exc)},
-        )
+    texto = extracao.texto
+    if not texto:
+        logger.error("Nenhuma biblioteca conseguiu extrair texto", extra={"arquivo": caminho_pdf})
         return None
+
+    logger.info(
+        "Texto extraído",
+        extra={
+            "arquivo": caminho_pdf,
+            "paginas_por_backend": extracao.paginas_por_backend(),
+            "tempo_ms": round(extracao.tempo_ms, 1),
+        },
+    )
+    return texto
@@ -0,0 +1,75 @@
+"""Compara extrair_registros_sped (dict por linha) com a versão colunar.
+
+Uso: python -m backend.bench_colunar [--linhas 1000000]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from .efd_contrib_extrator import extrair_registros_sped, extrair_registros_sped_colunar
+
+
+def gerar_linhas(quantidade, falhas=0):
+    """Arquivo sintético com M200 e M600 alternados, vírgula decimal.
+
+    Com ``falhas``, uma linha a cada ``falhas`` traz um campo vazio e um
+    inválido, como arquivos reais costumam trazer.
+    """
+    linhas = ['|0000|006|0|||01012024|31012024|EMPRESA SINTETICA|12345678000199|SP|\n']
+    for i in range(quantidade):
+        reg = 'M200' if i % 2 else 'M600'
+        campos = [f'{(i + c) % 100000},{c:02d}' for c in range(12)]
+        if falhas and i % falhas == 1:
+            campos[:2] = ['', 'abc']
+        valores = '|'.join(campos)
+        linhas.append(f'|{reg}|{valores}|\n')
+    return linhas
+
+
+# Campos vazios, valores inválidos e linhas curtas, que o caminho colunar
+# precisa converter exatamente como parse_float.
+CASOS_DIFICEIS = [
+    [],
+    ['|M200|1,5|\n'],
+    ['|M600|abc|1.234,56||3|1|1|1|1|1|1|1|9|\n', '|M200|1|2|3|4|5|6|7|8|9|10|11|12|\n', '|M200|\n'],
+]
+
+
+def mesmos_frames(a, b):
+    return all(x.equals(y) and list(x.dtypes) == list(y.dtypes) for x, y in zip(a, b))
+
+
+def por_dicionario(linhas):
+    m200, m600 = extrair_registros_sped(linhas, None)
+    return pd.DataFrame(m200), pd.DataFrame(m600)
+
+
+def colunar(linhas):
+    return extrair_registros_sped_colunar(linhas, None)
+
+
+def medir(funcao, linhas):
+    inicio = time.perf_counter()
+    df_m200, df_m600 = funcao(linhas)
+    return time.perf_counter() - inicio, df_m200, df_m600
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f'linhas:            {args.linhas:,}')
+    iguais = all(mesmos_frames(por_dicionario(caso), colunar(caso)) for caso in CASOS_DIFICEIS)
+    for rotulo, falhas in (('válidas', 0), ('1 falha/1000', 1000)):
+        linhas = gerar_linhas(args.linhas, falhas)
+        t_dict, m200_dict, m600_dict = medir(por_dicionario, linhas)
+        t_col, m200_col, m600_col = medir(colunar, linhas)
+        iguais = iguais and mesmos_frames((m200_dict, m600_dict), (m200_col, m600_col))
+        print(f'{rotulo:<13} dict {t_dict:6.2f} s  colunar {t_col:6.2f} s  ({t_dict / t_col:.1f}x)')
+    print(f'resultados iguais: {iguais}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,9 @@
 import os
+from pathlib import Path
+
+from hansu_comum.edicao_lote import executar_edicao_lote, listar_arquivos
+from hansu_comum.reescrita_0000 import reescrever_registro_0000
+from hansu_comum.sped_reader import ler_arquivo_sped
 
 def alterar_linhas_contribuicoes(linhas, novo_cnpj):
     novas_linhas = []
@@ -14,21 +19,27 @@ def alterar_linhas_contribuicoes(linhas, novo_cnpj):
             novas_linhas.append(linha)
     return novas_linhas
 
+def _nome_editado(caminho_arquivo, nome_completo=False):
+    # O nome curto (três primeiros trechos separados por "_") pode repetir
+    # entre arquivos; no lote o nome original é mantido inteiro.
+    nome_original = os.path.basename(caminho_arquivo)
+    partes_nome = nome_original.split('_')
+    if len(partes_nome) >= 3 and not nome_completo:
+        return f"EDITADO_{partes_nome[0]}_{partes_nome[1]}_{partes_nome[2]}.txt"
+    return f"EDITADO_{nome_original}"
+
+def _caminho_destino(caminho_arquivo, pasta_destino, nome_curto):
+    if not pasta_destino:
+        pasta_destino = os.path.dirname(caminho_arquivo)
+
+    os.makedirs(pasta_destino, exist_ok=True)
+    return os.path.normpath(os.path.join(pasta_destino, nome_curto))
+
 def salvar_arquivo_editado(caminho_arquivo, novas_linhas, pasta_destino):
     nome_curto = "<desconhecido>"
     try:
-        nome_original = os.path.basename(caminho_arquivo)
-        partes_nome = nome_original.split('_')
-        if len(partes_nome) >= 3:
-            nome_curto = f"EDITADO_{partes_nome[0]}_{partes_nome[1]}_{partes_nome[2]}.txt"
-        else:
-            nome_curto = f"EDITADO_{nome_original}"
-
-        if not pasta_destino:
-            pasta_destino = os.path.dirname(caminho_arquivo)
-
-        os.makedirs(pasta_destino, exist_ok=True)
-        novo_caminho = os.path.normpath(os.path.join(pasta_destino, nome_curto))
+        nome_curto = _nome_editado(caminho_arquivo)
+        novo_caminho = _caminho_destino(caminho_arquivo, pasta_destino, nome_curto)
 
         with open(novo_caminho, 'w', encoding='latin1') as f:
             f.writelines(novas_linhas)
@@ -38,13 +49,64 @@ def salvar_arquivo_editado(caminho_arquivo, novas_linhas, pasta_destino):
     except Exception as e:
         raise Exception(f"Erro ao salvar {nome_curto}: {e}")
 
-def processar_arquivo(caminho, novo_cnpj, pasta_destino):
+def processar_arquivo(caminho, novo_cnpj, pasta_destino, nome_completo=False):
+    # Só o |0000| é lido e reescrito; o restante do arquivo é copiado em
+    # blocos binários, sem carregar as linhas em memória.
     try:
-        with open(caminho, 'r', encoding='latin1') as f:
-            linhas = f.readlines()
-
-        linhas_alteradas = alterar_linhas_contribuicoes(linhas, novo_cnpj)
-        return salvar_arquivo_editado(caminho, linhas_alteradas, pasta_destino)
+        novo_caminho = _caminho_destino(caminho, pasta_destino, _nome_editado(caminho, nome_completo))
+        reescrever_registro_0000(
+            caminho,
+            novo_caminho,
+            lambda linha: alterar_linhas_contribuicoes([linha], novo_cnpj)[0],
+        )
+        return novo_caminho
 
     except Exception as e:
         raise Exception(f"Erro ao processar {os.path.basename(caminho)}: {e}")
+
+def _cnpj_0000(caminho):
+    # Lê apenas o |0000| e devolve o CNPJ atual (coluna 9).
+    registros = ler_arquivo_sped(caminho, ())
+    try:
+        _, campos = next(registros, (None, []))
+    finally:
+        registros.close()
+    return campos[9].strip() if len(campos) > 9 else ''
+
+def processar_lote(origem, mapa, pasta_destino=None, manifesto=None, max_workers=4):
+    """
+    Troca o CNPJ de todos os arquivos de uma pasta (recursiva, *.txt) ou
+    glob. mapa: CNPJ atual do |0000| -> novo CNPJ; arquivos fora do mapa
+    ficam com status 'sem_mapeamento'. As saídas mantêm o nome original
+    inteiro (EDITADO_<nome>); arquivos que ainda assim gerariam o mesmo
+    destino (mesmo nome em pastas diferentes de um glob) ficam com 'erro'.
+    Grava um manifesto JSON (padrão: manifesto_edicao_contribuicoes.json)
+    e, ao reexecutar, pula arquivos cuja saída já está atualizada. Devolve
+    os registros do manifesto.
+    """
+    base = Path(origem) if Path(origem).is_dir() else None
+    if manifesto is None:
+        manifesto = Path(pasta_destino or base or Path.cwd()) / 'manifesto_edicao_contribuicoes.json'
+
+    def _alvo(caminho):
+        cnpj = _cnpj_0000(caminho)
+        if cnpj not in mapa:
+            return None
+        return {'cnpj_antigo': cnpj, 'novo_cnpj': mapa[cnpj]}
+
+    def _pasta(caminho):
+        pasta = pasta_destino
+        if pasta_destino and base is not None:
+            pasta = os.path.join(pasta_destino, os.path.relpath(caminho.parent, base))
+        return pasta
+
+    def _destino(caminho):
+        pasta = _pasta(caminho) or os.path.dirname(caminho)
+        return os.path.normpath(os.path.join(pasta, _nome_editado(caminho, nome_completo=True)))
+
+    def _editar(caminho, alvo):
+        return processar_arquivo(caminho, alvo['novo_cnpj'], _pasta(caminho), nome_completo=True)
+
+    return executar_edicao_lote(
+        listar_arquivos(origem), _alvo, _editar, manifesto, max_workers, destino_de=_destino
+    )
@@ -1,23 +1,52 @@
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+from hansu_comum.cache_extracao import em_cache
+from hansu_comum.processamento_lote import executar_em_lote
+from hansu_comum.sped_reader import REGISTRO_ABERTURA, iterar_registros, ler_blocos_sped
+
+# Incrementar quando a extração mudar, para invalidar resultados em cache.
+VERSAO_EXTRATOR = '1'
+REGISTROS_CONTRIBUICAO = ('M200', 'M600')
+# Valores por chamada ao numpy; um trecho com campo não numérico é refeito em
+# trechos de TRECHO_MINIMO, e só os que ainda falham passam por parse_float.
+TRECHO_CONVERSAO = 4096
+TRECHO_MINIMO = 64
+CAMPOS_M = (
+    'VL_TOT_CONT_NC_PER', 'VL_TOT_CRED_DESC', 'VL_TOT_CRED_DESC_ANT',
+    'VL_TOT_CONT_NC_DEV', 'VL_RET_NC', 'VL_OUT_DED_NC', 'VL_CONT_NC_REC',
+    'VL_TOT_CONT_CUM_PER', 'VL_RET_CUM', 'VL_OUT_DED_CUM', 'VL_CONT_CUM_REC',
+    'VL_TOT_CONT_REC',
+)
+
 
 # ----------------------------------------------------------------------
 # Utilidades
 # ----------------------------------------------------------------------
+def _periodo_do_0000(partes):
+    """
+    Devolve DT_INI do |0000| como date, None se inválida ou False se a
+    linha não tiver colunas suficientes.
+    """
+    if len(partes) <= 6:
+        return False
+    try:
+        return datetime.strptime(partes[6], '%d%m%Y').date()
+    except ValueError:
+        return None
+
+
 def extrair_periodo_sped(linhas):
     """
     Procura o |0000| e devolve a data de início do período (DT_INI)
     como datetime.date. Se ausente ou inválida, devolve None.
     """
-    for linha in linhas:
-        if linha.startswith('|0000|'):
-            partes = linha.strip().split('|')
-            if len(partes) > 6:
-                data_str = partes[6]
-                try:
-                    return datetime.strptime(data_str, '%d%m%Y').date()
-                except ValueError:
-                    return None
+    for _, partes in iterar_registros(linhas, (REGISTRO_ABERTURA,), incluir_abertura=False):
+        periodo = _periodo_do_0000(partes)
+        if periodo is not False:
+            return periodo
     return None
 
 
@@ -69,40 +98,43 @@ def extrair_registros_sped(linhas, periodo):
     registros_m200 = []
     registros_m600 = []
 
-    for linha in linhas:
-        partes = linha.strip().split('|')
-        if len(partes) < 2:
-            continue
-
-        reg = partes[1]
-        if reg not in ('M200', 'M600'):
-            continue
-
-        dados = partes[2:]
-        campos = dados + ['0'] * (12 - len(dados))   # garante 12 valores
-
-        registro = {
-            'REG': reg,
-            'VL_TOT_CONT_NC_PER':   parse_float(campos[0]),   # Campo 2
-            'VL_TOT_CRED_DESC':     parse_float(campos[1]),   # Campo 3
-            'VL_TOT_CRED_DESC_ANT': parse_float(campos[2]),   # Campo 4
-            'VL_TOT_CONT_NC_DEV':   parse_float(campos[3]),   # Campo 5
-            'VL_RET_NC':            parse_float(campos[4]),   # Campo 6
-            'VL_OUT_DED_NC':        parse_float(campos[5]),   # Campo 7
-            'VL_CONT_NC_REC':       parse_float(campos[6]),   # Campo 8
-            'VL_TOT_CONT_CUM_PER':  parse_float(campos[7]),   # Campo 9
-            'VL_RET_CUM':           parse_float(campos[8]),   # Campo 10
-            'VL_OUT_DED_CUM':       parse_float(campos[9]),   # Campo 11
-            'VL_CONT_CUM_REC':      parse_float(campos[10]),  # Campo 12
-            'VL_TOT_CONT_REC':      parse_float(campos[11]),  # Campo 13
-            'PERIODO_REFERENTE':    periodo,
-        }
-
+    tokens = iterar_registros(linhas, REGISTROS_CONTRIBUICAO, incluir_abertura=False)
+    for reg, partes in tokens:
+        registro = _registro_m(reg, partes, periodo)
         if reg == 'M200':
             registros_m200.append(registro)
         else:
             registros_m600.append(registro)
 
+    return _completar_sentinelas(registros_m200, registros_m600, periodo)
+
+
+def _registro_m(reg, partes, periodo):
+    """
+    Monta o dicionário de um M200/M600 a partir da linha já separada.
+    """
+    dados = partes[2:]
+    campos = dados + ['0'] * (12 - len(dados))   # garante 12 valores
+
+    return {
+        'REG': reg,
+        'VL_TOT_CONT_NC_PER':   parse_float(campos[0]),   # Campo 2
+        'VL_TOT_CRED_DESC':     parse_float(campos[1]),   # Campo 3
+        'VL_TOT_CRED_DESC_ANT': parse_float(campos[2]),   # Campo 4
+        'VL_TOT_CONT_NC_DEV':   parse_float(campos[3]),   # Campo 5
+        'VL_RET_NC':            parse_float(campos[4]),   # Campo 6
+        'VL_OUT_DED_NC':        parse_float(campos[5]),   # Campo 7
+        'VL_CONT_NC_REC':       parse_float(campos[6]),   # Campo 8
+        'VL_TOT_CONT_CUM_PER':  parse_float(campos[7]),   # Campo 9
+        'VL_RET_CUM':           parse_float(campos[8]),   # Campo 10
+        'VL_OUT_DED_CUM':       parse_float(campos[9]),   # Campo 11
+        'VL_CONT_CUM_REC':      parse_float(campos[10]),  # Campo 12
+        'VL_TOT_CONT_REC':      parse_float(campos[11]),  # Campo 13
+        'PERIODO_REFERENTE':    periodo,
+    }
+
+
+def _completar_sentinelas(registros_m200, registros_m600, periodo):
     # ➜ Se não encontrou nenhum, devolve sentinela zerado
     if not registros_m200:
         registros_m200.append(_registro_vazio('M200', periodo))
@@ -112,6 +144,131 @@ def extrair_registros_sped(linhas, periodo):
     return registros_m200, registros_m600
 
 
+@em_cache('efd_contrib.m200_m600', VERSAO_EXTRATOR)
+def extrair_arquivo_sped(caminho):
+    """
+    Lê só o |0000| e o bloco M (via índice de blocos), sem carregar o
+    arquivo em memória: o período vem do |0000|. Devolve
+    (m200, m600) com as mesmas regras de extrair_registros_sped.
+    """
+    periodo = None
+    periodo_lido = False
+    registros_m200 = []
+    registros_m600 = []
+
+    for reg, partes in ler_blocos_sped(caminho, ('M',), REGISTROS_CONTRIBUICAO):
+        if reg == REGISTRO_ABERTURA:
+            if not periodo_lido:
+                encontrado = _periodo_do_0000(partes)
+                if encontrado is not False:
+                    periodo, periodo_lido = encontrado, True
+            continue
+
+        registro = _registro_m(reg, partes, periodo)
+        if reg == 'M200':
+            registros_m200.append(registro)
+        else:
+            registros_m600.append(registro)
+
+    return _completar_sentinelas(registros_m200, registros_m600, periodo)
+
+
+# ----------------------------------------------------------------------
+# Caminho colunar: strings brutas em buffers, conversão float64 em bloco
+# ----------------------------------------------------------------------
+def _converter_trechos(partes, resultado, inicio, fim, tamanho):
+    for i in range(inicio, fim, tamanho):
+        j = min(i + tamanho, fim)
+        try:
+            resultado[i:j] = np.array(partes[i:j], dtype='float64')
+        except ValueError:
+            if tamanho > TRECHO_MINIMO:
+                _converter_trechos(partes, resultado, i, j, TRECHO_MINIMO)
+            else:
+                resultado[i:j] = [parse_float(valor) for valor in partes[i:j]]
+
+def _para_float64(valores):
+    """
+    Converte uma lista de strings com vírgula decimal em float64 numa única
+    chamada ao numpy. Vazios valem 0.0, como em parse_float. Se sobrar valor
+    não numérico, a conversão é refeita em trechos de TRECHO_CONVERSAO, e só
+    os TRECHO_MINIMO valores em volta de cada falha passam por parse_float
+    (falha → 0.0), não o bloco inteiro.
+    """
+    texto = '|'.join(valores).replace(',', '.')
+    if '' in valores:
+        # Vazios viram '0' no próprio texto; duas passadas cobrem vazios seguidos.
+        texto = ('|' + texto + '|').replace('||', '|0|').replace('||', '|0|')[1:-1]
+    partes = texto.split('|') if valores else []
+    try:
+        return np.array(partes, dtype='float64')
+    except ValueError:
+        pass
+
+    resultado = np.empty(len(partes), dtype='float64')
+    _converter_trechos(partes, resultado, 0, len(partes), TRECHO_CONVERSAO)
+    return resultado
+
+
+def _dataframe_m(reg, valores, periodo):
+    """
+    Monta o DataFrame tipado de um registro a partir dos campos em
+    sequência (12 por linha); sem linhas, devolve o sentinela zerado
+    (mesma regra de extrair_registros_sped).
+    """
+    if not valores:
+        return pd.DataFrame([_registro_vazio(reg, periodo)])
+
+    matriz = _para_float64(valores).reshape(-1, len(CAMPOS_M))
+    df = pd.DataFrame(matriz, columns=CAMPOS_M)
+    df.insert(0, 'REG', reg)
+    df['PERIODO_REFERENTE'] = [periodo] * len(matriz)
+    return df
+
+
+def _acumular_colunar(reg, partes, valores):
+    campos = partes[2:14]
+    if len(campos) < 12:
+        campos += ['0'] * (12 - len(campos))
+    valores[reg].extend(campos)
+
+
+def extrair_registros_sped_colunar(linhas, periodo):
+    """
+    Mesmo conteúdo de extrair_registros_sped, mas devolve dois DataFrames
+    (df_m200, df_m600) convertendo cada coluna para float64 de uma vez,
+    sem montar um dicionário por linha.
+    """
+    valores = {'M200': [], 'M600': []}
+
+    for reg, partes in iterar_registros(linhas, REGISTROS_CONTRIBUICAO, incluir_abertura=False):
+        _acumular_colunar(reg, partes, valores)
+
+    return _dataframe_m('M200', valores['M200'], periodo), _dataframe_m('M600', valores['M600'], periodo)
+
+
+@em_cache('efd_contrib.m200_m600_colunar', VERSAO_EXTRATOR)
+def extrair_arquivo_sped_colunar(caminho):
+    """
+    Versão colunar de extrair_arquivo_sped: devolve (df_m200, df_m600).
+    """
+    periodo = None
+    periodo_lido = False
+    valores = {'M200': [], 'M600': []}
+
+    for reg, partes in ler_blocos_sped(caminho, ('M',), REGISTROS_CONTRIBUICAO):
+        if reg == REGISTRO_ABERTURA:
+            if not periodo_lido:
+                encontrado = _periodo_do_0000(partes)
+                if encontrado is not False:
+                    periodo, periodo_lido = encontrado, True
+            continue
+
+        _acumular_colunar(reg, partes, valores)
+
+    return _dataframe_m('M200', valores['M200'], periodo), _dataframe_m('M600', valores['M600'], periodo)
+
+
 # ----------------------------------------------------------------------
 # Interface principal para vários arquivos
 # ----------------------------------------------------------------------
@@ -124,13 +281,41 @@ def processar_varios_arquivos(lista_arquivos):
     todos_m600 = []
 
     for caminho in lista_arquivos:
-        with open(caminho, 'r', encoding='latin1') as f:
-            linhas = f.readlines()
-
-        periodo = extrair_periodo_sped(linhas)
-        m200, m600 = extrair_registros_sped(linhas, periodo)
+        m200, m600 = extrair_arquivo_sped(caminho)
 
         todos_m200.extend(m200)
         todos_m600.extend(m600)
 
     return todos_m200, todos_m600
+
+
+def processar_varios_arquivos_paralelo(lista_arquivos, max_workers=None, chunksize=1, progresso=None):
+    """
+    Versão em lote de processar_varios_arquivos: distribui os arquivos em
+    um pool de processos e devolve (M200_total, M600_total, erros).
+
+    A ordem dos registros segue a ordem de lista_arquivos. Um arquivo com
+    falha não interrompe o lote: entra em erros como (caminho, mensagem).
+    progresso(concluidos, total, caminho) é chamado a cada arquivo.
+    """
+    todos_m200 = []
+    todos_m600 = []
+    erros = []
+
+    resultados = executar_em_lote(
+        extrair_arquivo_sped,
+        lista_arquivos,
+        max_workers=max_workers,
+        chunksize=chunksize,
+        progresso=progresso,
+    )
+    for item in resultados:
+        if not item.ok:
+            erros.append((item.caminho, item.erro))
+            continue
+
+        m200, m600 = item.resultado
+        todos_m200.extend(m200)
+        todos_m600.extend(m600)
+
+    return todos_m200, todos_m600, erros
@@ -0,0 +1,70 @@
+"""Compara extrair_registros (dict por linha) com extrair_registros_colunar.
+
+Uso: python -m backend.bench_colunar [--linhas 1000000]
+"""
+import argparse
+import time
+
+from .efd_icms_extrator import extrair_registros, extrair_registros_colunar
+
+
+def gerar_linhas(quantidade, falhas=0):
+    """Arquivo sintético: 90% E110 e 10% E115, com vírgula decimal.
+
+    Com ``falhas``, um E110 a cada ``falhas`` linhas traz um campo vazio e
+    um inválido, como arquivos reais costumam trazer.
+    """
+    linhas = ['|0000|017|0|01012024|31012024|EMPRESA SINTETICA|12345678000199||SP|123456789|\n']
+    for i in range(quantidade):
+        if i % 10:
+            campos = [f'{(i + c) % 100000},{c:02d}' for c in range(14)]
+            if falhas and i % falhas == 1:
+                campos[:2] = ['', 'abc']
+            valores = '|'.join(campos)
+            linhas.append(f'|E110|{valores}|\n')
+        else:
+            linhas.append(f'|E115|SP{i % 1000:06d}|{i % 5000},50|COMPLEMENTO|\n')
+    return linhas
+
+
+# Campos vazios, valores inválidos e linhas curtas, que o caminho colunar
+# precisa converter exatamente como parse_float.
+CASOS_DIFICEIS = [
+    [],
+    ['|E115|X|1,5|\n'],
+    ['|E110|1,0|2|\n', '|E110|abc|1.234,56||3,5|1|1|1|1|1|1|1|1|1|1|9|\n', '|E115|C|x|D|\n', '|E115|\n'],
+    ['|E110| 2,5 |nan|1e3|-0|+1|0|0|0|0|0|0|0|0|0|\n'],
+]
+
+
+def mesmos_frames(a, b):
+    return all(x.equals(y) and list(x.dtypes) == list(y.dtypes) for x, y in zip(a, b))
+
+
+def medir(funcao, linhas):
+    inicio = time.perf_counter()
+    df_e110, df_e115 = funcao(linhas, None)
+    return time.perf_counter() - inicio, df_e110, df_e115
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f'linhas:            {args.linhas:,}')
+    iguais = all(
+        mesmos_frames(extrair_registros(caso, None), extrair_registros_colunar(caso, None))
+        for caso in CASOS_DIFICEIS
+    )
+    for rotulo, falhas in (('válidas', 0), ('1 falha/1000', 1000)):
+        linhas = gerar_linhas(args.linhas, falhas)
+        t_dict, e110_dict, e115_dict = medir(extrair_registros, linhas)
+        t_col, e110_col, e115_col = medir(extrair_registros_colunar, linhas)
+        iguais = iguais and mesmos_frames((e110_dict, e115_dict), (e110_col, e115_col))
+        print(f'{rotulo:<13} dict {t_dict:6.2f} s  colunar {t_col:6.2f} s  ({t_dict / t_col:.1f}x)')
+    print(f'resultados iguais: {iguais}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Mapping, Tuple
+
+from hansu_comum.edicao_lote import executar_edicao_lote, listar_arquivos
+from hansu_comum.reescrita_0000 import reescrever_registro_0000
+from hansu_comum.sped_reader import ler_arquivo_sped
 
 __all__ = [
     "alterar_linhas_icms",
     "salvar_arquivo_editado",
     "processar_arquivo",
+    "processar_lote",
 ]
 
 
@@ -46,17 +51,23 @@ def alterar_linhas_icms(
     return novas
 
 
-def salvar_arquivo_editado(
+def _caminho_destino(
     caminho_original: str | Path,
-    novas_linhas: List[str],
-    pasta_destino: str | Path | None = None,
+    pasta_destino: str | Path | None,
 ) -> Path:
-    """Salva ``novas_linhas`` em *pasta_destino* prefixando com EDITADO_."""
     origem = Path(caminho_original)
     destino_dir = Path(pasta_destino) if pasta_destino else origem.parent
     destino_dir.mkdir(parents=True, exist_ok=True)
+    return destino_dir / f"EDITADO_{origem.name}"
+
 
-    destino = destino_dir / f"EDITADO_{origem.name}"
+def salvar_arquivo_editado(
+    caminho_original: str | Path,
+    novas_linhas: List[str],
+    pasta_destino: str | Path | None = None,
+) -> Path:
+    """Salva ``novas_linhas`` em *pasta_destino* prefixando com EDITADO_."""
+    destino = _caminho_destino(caminho_original, pasta_destino)
     with destino.open("w", encoding="latin1", newline="") as f:
         f.writelines(novas_linhas)
     return destino
@@ -68,13 +79,88 @@ def processar_arquivo(
     nova_ie: str,
     pasta_destino: str | Path | None = None,
 ) -> Path:
-    """Altera e grava um arquivo único, retornando o novo caminho."""
+    """Altera e grava um arquivo único, retornando o novo caminho.
+
+    Só o registro |0000| é lido e reescrito; o restante do arquivo é
+    copiado em blocos binários (ver :func:`reescrever_registro_0000`).
+    """
     caminho_original = Path(caminho_original)
     if not caminho_original.is_file():
         raise FileNotFoundError(caminho_original)
 
-    with caminho_original.open("r", encoding="latin1") as f:
-        linhas = f.readlines()
+    # Valida antes de criar o arquivo de destino.
+    alterar_linhas_icms([], novo_cnpj, nova_ie)
+
+    return reescrever_registro_0000(
+        caminho_original,
+        _caminho_destino(caminho_original, pasta_destino),
+        lambda linha: alterar_linhas_icms([linha], novo_cnpj, nova_ie)[0],
+    )
+
+
+def _cnpj_0000(caminho: Path) -> str:
+    """Lê apenas o |0000| e devolve o CNPJ atual (coluna 7)."""
+    registros = ler_arquivo_sped(caminho, ())
+    try:
+        _, campos = next(registros, (None, []))
+    finally:
+        registros.close()
+    return campos[7].strip() if len(campos) > 7 else ""
+
+
+def processar_lote(
+    origem: str | Path,
+    mapa: Mapping[str, Tuple[str, str]],
+    pasta_destino: str | Path | None = None,
+    manifesto: str | Path | None = None,
+    max_workers: int = 4,
+) -> Dict[str, dict]:
+    """Troca CNPJ/IE de todos os arquivos de uma pasta ou glob.
+
+    Parameters
+    ----------
+    origem : str | Path
+        Pasta (varrida recursivamente atrás de ``*.txt``) ou padrão glob.
+    mapa : Mapping[str, tuple[str, str]]
+        CNPJ atual do |0000| → ``(novo_cnpj, nova_ie)``. Arquivos cujo CNPJ
+        não está no mapa ficam com status ``sem_mapeamento``.
+    pasta_destino : str | Path | None
+        Onde gravar os ``EDITADO_*``; para pastas, a estrutura de
+        subpastas é mantida. ``None`` grava ao lado de cada original.
+        Arquivos que gerariam o mesmo destino (mesmo nome vindo de pastas
+        diferentes de um glob) ficam com status ``erro``.
+    manifesto : str | Path | None
+        JSON de controle (padrão: ``manifesto_edicao_icms.json`` na pasta
+        de destino, na pasta de origem ou, para globs, no diretório atual).
+        Reexecuções pulam arquivos já editados.
+    max_workers : int
+        Arquivos processados ao mesmo tempo.
+    """
+    base = Path(origem) if Path(origem).is_dir() else None
+    if manifesto is None:
+        manifesto = Path(pasta_destino or base or Path.cwd()) / "manifesto_edicao_icms.json"
+
+    def _alvo(caminho: Path) -> dict | None:
+        cnpj = _cnpj_0000(caminho)
+        if cnpj not in mapa:
+            return None
+        novo_cnpj, nova_ie = mapa[cnpj]
+        return {"cnpj_antigo": cnpj, "novo_cnpj": novo_cnpj, "nova_ie": nova_ie}
+
+    def _pasta(caminho: Path) -> Path | None:
+        pasta = None
+        if pasta_destino:
+            pasta = Path(pasta_destino)
+            if base is not None:
+                pasta = pasta / caminho.parent.relative_to(base)
+        return pasta
+
+    def _destino(caminho: Path) -> Path:
+        return (_pasta(caminho) or caminho.parent) / f"EDITADO_{caminho.name}"
+
+    def _editar(caminho: Path, alvo: dict) -> Path:
+        return processar_arquivo(caminho, alvo["novo_cnpj"], alvo["nova_ie"], _pasta(caminho))
 
-    novas = alterar_linhas_icms(linhas, novo_cnpj, nova_ie)
-    return salvar_arquivo_editado(caminho_original, novas, pasta_destino)
+    return executar_edicao_lote(
+        listar_arquivos(origem), _alvo, _editar, manifesto, max_workers, destino_de=_destino
+    )
@@ -1,17 +1,41 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from hansu_comum.cache_extracao import em_cache
+from hansu_comum.sped_reader import REGISTRO_ABERTURA, iterar_registros, ler_blocos_sped
+
+# Incrementar quando a extração mudar, para invalidar resultados em cache.
+VERSAO_EXTRATOR = '2'
+PERIODO_NAO_ENCONTRADO = 'PERIODO_NAO_ENCONTRADO'
+REGISTROS_APURACAO = ('E110', 'E115')
+# Valores por chamada ao numpy; um trecho com campo não numérico é refeito em
+# trechos de TRECHO_MINIMO, e só os que ainda falham passam por parse_float.
+TRECHO_CONVERSAO = 4096
+TRECHO_MINIMO = 64
+CAMPOS_E110 = (
+    'VL_TOT_DEBITOS', 'VL_AJ_DEBITOS', 'VL_TOT_AJ_DEBITOS', 'VL_ESTORNOS_CRED',
+    'VL_TOT_CREDITOS', 'VL_AJ_CREDITOS', 'VL_TOT_AJ_CREDITOS', 'VL_ESTORNOS_DEB',
+    'VL_SLD_CREDOR_ANT', 'VL_SLD_APURADO', 'VL_TOT_DED', 'VL_ICMS_RECOLHER',
+    'VL_SLD_CREDOR_TRANSPORTAR', 'DEB_ESP',
+)
+
+
+def _periodo_do_0000(partes):
+    """Devolve o período do |0000| ou None se a linha não tiver DT_INI."""
+    if len(partes) <= 5:
+        return None
+    try:
+        return datetime.strptime(partes[4], '%d%m%Y').date().replace(day=1)
+    except ValueError:
+        return 'PERIODO_INVALIDO'
+
 def extrair_periodo_efd(linhas):
-    for linha in linhas:
-        if linha.startswith('|0000|'):
-            partes = linha.strip().split('|')
-            if len(partes) > 5:
-                dt_ini = partes[4]
-                try:
-                    return datetime.strptime(dt_ini, '%d%m%Y').date().replace(day=1)
-                except ValueError:
-                    return 'PERIODO_INVALIDO'
-    return 'PERIODO_NAO_ENCONTRADO'
+    for _, partes in iterar_registros(linhas, (REGISTRO_ABERTURA,), incluir_abertura=False):
+        periodo = _periodo_do_0000(partes)
+        if periodo is not None:
+            return periodo
+    return PERIODO_NAO_ENCONTRADO
 
 def parse_float(valor):
     try:
@@ -19,44 +43,151 @@ def parse_float(valor):
     except (ValueError, AttributeError):
         return 0.0
 
+def _registro_e110(partes, periodo):
+    dados = partes[2:] + ['0'] * (15 - len(partes[2:]))
+    return {
+        'REG': 'E110',
+        'VL_TOT_DEBITOS': parse_float(dados[0]),
+        'VL_AJ_DEBITOS': parse_float(dados[1]),
+        'VL_TOT_AJ_DEBITOS': parse_float(dados[2]),
+        'VL_ESTORNOS_CRED': parse_float(dados[3]),
+        'VL_TOT_CREDITOS': parse_float(dados[4]),
+        'VL_AJ_CREDITOS': parse_float(dados[5]),
+        'VL_TOT_AJ_CREDITOS': parse_float(dados[6]),
+        'VL_ESTORNOS_DEB': parse_float(dados[7]),
+        'VL_SLD_CREDOR_ANT': parse_float(dados[8]),
+        'VL_SLD_APURADO': parse_float(dados[9]),
+        'VL_TOT_DED': parse_float(dados[10]),
+        'VL_ICMS_RECOLHER': parse_float(dados[11]),
+        'VL_SLD_CREDOR_TRANSPORTAR': parse_float(dados[12]),
+        'DEB_ESP': parse_float(dados[13]),
+        'PERIODO_REFERENTE': periodo
+    }
+
+def _registro_e115(partes, periodo):
+    dados = partes[2:] + [''] * (4 - len(partes[2:]))
+    return {
+        'REG': 'E115',
+        'COD_INF_ADIC': dados[0],
+        'VL_INF_ADIC': parse_float(dados[1]),
+        'DESCR_COMPL_AJ': dados[2] if len(dados) > 2 else '',
+        'PERIODO_REFERENTE': periodo
+    }
+
 def extrair_registros(linhas, periodo):
     registros_e110 = []
     registros_e115 = []
 
-    for linha in linhas:
-        partes = linha.strip().split('|')
-        if len(partes) < 2:
-            continue
-
-        if partes[1] == 'E110':
-            dados = partes[2:] + ['0'] * (15 - len(partes[2:]))
-            registros_e110.append({
-                'REG': 'E110',
-                'VL_TOT_DEBITOS': parse_float(dados[0]),
-                'VL_AJ_DEBITOS': parse_float(dados[1]),
-                'VL_TOT_AJ_DEBITOS': parse_float(dados[2]),
-                'VL_ESTORNOS_CRED': parse_float(dados[3]),
-                'VL_TOT_CREDITOS': parse_float(dados[4]),
-                'VL_AJ_CREDITOS': parse_float(dados[5]),
-                'VL_TOT_AJ_CREDITOS': parse_float(dados[6]),
-                'VL_ESTORNOS_DEB': parse_float(dados[7]),
-                'VL_SLD_CREDOR_ANT': parse_float(dados[8]),
-                'VL_SLD_APURADO': parse_float(dados[9]),
-                'VL_TOT_DED': parse_float(dados[10]),
-                'VL_ICMS_RECOLHER': parse_float(dados[11]),
-                'VL_SLD_CREDOR_TRANSPORTAR': parse_float(dados[12]),
-                'DEB_ESP': parse_float(dados[13]),
-                'PERIODO_REFERENTE': periodo
-            })
-
-        elif partes[1] == 'E115':
-            dados = partes[2:] + [''] * (4 - len(partes[2:]))
-            registros_e115.append({
-                'REG': 'E115',
-                'COD_INF_ADIC': dados[0],
-                'VL_INF_ADIC': parse_float(dados[1]),
-                'DESCR_COMPL_AJ': dados[2] if len(dados) > 2 else '',
-                'PERIODO_REFERENTE': periodo
-            })
+    for reg, partes in iterar_registros(linhas, REGISTROS_APURACAO, incluir_abertura=False):
+        if reg == 'E110':
+            registros_e110.append(_registro_e110(partes, periodo))
+        else:
+            registros_e115.append(_registro_e115(partes, periodo))
 
     return pd.DataFrame(registros_e110), pd.DataFrame(registros_e115)
+
+# ----------------------------------------------------------------------
+# Caminho colunar: strings brutas em buffers, conversão float64 em bloco
+# ----------------------------------------------------------------------
+def _converter_trechos(partes, resultado, inicio, fim, tamanho):
+    for i in range(inicio, fim, tamanho):
+        j = min(i + tamanho, fim)
+        try:
+            resultado[i:j] = np.array(partes[i:j], dtype='float64')
+        except ValueError:
+            if tamanho > TRECHO_MINIMO:
+                _converter_trechos(partes, resultado, i, j, TRECHO_MINIMO)
+            else:
+                resultado[i:j] = [parse_float(valor) for valor in partes[i:j]]
+
+def _para_float64(valores):
+    """
+    Converte uma lista de strings com vírgula decimal em float64 numa única
+    chamada ao numpy. Vazios valem 0.0, como em parse_float. Se sobrar valor
+    não numérico, a conversão é refeita em trechos de TRECHO_CONVERSAO, e só
+    os TRECHO_MINIMO valores em volta de cada falha passam por parse_float
+    (falha → 0.0), não o bloco inteiro.
+    """
+    texto = '|'.join(valores).replace(',', '.')
+    if '' in valores:
+        # Vazios viram '0' no próprio texto; duas passadas cobrem vazios seguidos.
+        texto = ('|' + texto + '|').replace('||', '|0|').replace('||', '|0|')[1:-1]
+    partes = texto.split('|') if valores else []
+    try:
+        return np.array(partes, dtype='float64')
+    except ValueError:
+        pass
+
+    resultado = np.empty(len(partes), dtype='float64')
+    _converter_trechos(partes, resultado, 0, len(partes), TRECHO_CONVERSAO)
+    return resultado
+
+def _acumular_colunar(reg, partes, valores_e110, brutos_e115):
+    """Guarda os campos como texto: os 14 do E110 em sequência, o E115 por linha."""
+    if reg == 'E110':
+        campos = partes[2:16]
+        if len(campos) < 14:
+            campos += ['0'] * (14 - len(campos))
+        valores_e110.extend(campos)
+    else:
+        campos = partes[2:5]
+        if len(campos) < 3:
+            campos += [''] * (3 - len(campos))
+        brutos_e115.append(campos)
+
+def _dataframes_colunares(valores_e110, brutos_e115, periodo):
+    # Sem registros, o mesmo DataFrame vazio (sem colunas) de extrair_registros.
+    df_e110 = pd.DataFrame()
+    if valores_e110:
+        matriz = _para_float64(valores_e110).reshape(-1, len(CAMPOS_E110))
+        df_e110 = pd.DataFrame(matriz, columns=CAMPOS_E110)
+        df_e110.insert(0, 'REG', 'E110')
+        df_e110['PERIODO_REFERENTE'] = [periodo] * len(matriz)
+
+    df_e115 = pd.DataFrame()
+    if brutos_e115:
+        cod, valor, descr = zip(*brutos_e115)
+        df_e115 = pd.DataFrame({
+            'REG': ['E115'] * len(brutos_e115),
+            'COD_INF_ADIC': list(cod),
+            'VL_INF_ADIC': _para_float64(list(valor)),
+            'DESCR_COMPL_AJ': list(descr),
+            'PERIODO_REFERENTE': [periodo] * len(brutos_e115),
+        })
+    return df_e110, df_e115
+
+def extrair_registros_colunar(linhas, periodo):
+    """
+    Mesmo resultado de extrair_registros, mas acumula os campos como texto
+    e converte cada coluna para float64 de uma vez, sem um dict por linha.
+    """
+    valores_e110 = []
+    brutos_e115 = []
+
+    for reg, partes in iterar_registros(linhas, REGISTROS_APURACAO, incluir_abertura=False):
+        _acumular_colunar(reg, partes, valores_e110, brutos_e115)
+
+    return _dataframes_colunares(valores_e110, brutos_e115, periodo)
+
+@em_cache('efd_icms.e110_e115', VERSAO_EXTRATOR)
+def extrair_arquivo_efd(caminho):
+    """
+    Lê só o |0000| e o bloco E (via índice de blocos), sem carregar o
+    arquivo em memória, e devolve (periodo, df_e110, df_e115) já tipados
+    pelo caminho colunar. Resultados ficam no cache de extração.
+    """
+    periodo = PERIODO_NAO_ENCONTRADO
+    periodo_lido = False
+    valores_e110 = []
+    brutos_e115 = []
+
+    for reg, partes in ler_blocos_sped(caminho, ('E',), REGISTROS_APURACAO):
+        if reg == REGISTRO_ABERTURA:
+            if not periodo_lido:
+                encontrado = _periodo_do_0000(partes)
+                if encontrado is not None:
+                    periodo, periodo_lido = encontrado, True
+        else:
+            _acumular_colunar(reg, partes, valores_e110, brutos_e115)
+
+    return (periodo, *_dataframes_colunares(valores_e110, brutos_e115, periodo))
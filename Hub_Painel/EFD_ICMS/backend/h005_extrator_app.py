@@ -1,7 +1,23 @@
-import pandas as pd
-import tkinter as tk
-from tkinter import filedialog, messagebox
 import os
+import sys
+from datetime import datetime
+
+if __package__ in (None, ""):
+    # Executado direto (python h005_extrator_app.py): importa os módulos
+    # vizinhos pelo pacote ``backend``, como em ``python -m backend.h005_extrator_app``.
+    # O import de ``backend`` roda o __init__ do pacote, que põe Hub_Painel
+    # (onde fica hansu_comum) no sys.path.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "backend"
+    import backend  # noqa: F401
+
+from hansu_comum.cache_extracao import em_cache
+from hansu_comum.exportadores import Tabela, exportar
+from hansu_comum.processamento_lote import executar_em_lote
+from hansu_comum.sped_reader import ler_blocos_sped
+
+# Incrementar quando a extração mudar, para invalidar resultados em cache.
+VERSAO_EXTRATOR = "1"
 
 
 # ------------------------------------------------------------
@@ -34,39 +50,32 @@ class H005Extrator:
         self.h005_registros = []
 
     def extrair(self):
-        with open(self.file_path, "r", encoding="latin1") as f:
-            for linha in f:
-                campos = linha.strip().split("|")
-
-                if len(campos) < 2:
-                    continue
-
-                reg = campos[1].strip().upper()
-
-                # Registro 0000
-                if reg == "0000":
-                    self.header = Header0000(
-                        empresa=campos[6].strip(),
-                        cnpj=campos[7].strip(),
-                        dt_inicio=campos[4].strip(),
-                        dt_fim=campos[5].strip()
-                    )
-
-                # Registro H005
-                from datetime import datetime
-
-                if reg == "H005":
-                    dt_inv = datetime.strptime(campos[2].strip(), "%d%m%Y").date()
-                    vl_inv = float(campos[3].replace(".", "").replace(",", "."))
-
-                    self.h005_registros.append(
-                        RegistroH005(
-                            dt_inv=dt_inv,
-                            vl_inv=vl_inv,
-                            mot_inv=campos[4].strip(),
-                            arquivo_origem=os.path.basename(self.file_path)
-                        )
-                    )
+        arquivo_origem = os.path.basename(self.file_path)
+
+        for reg, campos in ler_blocos_sped(self.file_path, ("H",), ("H005",)):
+
+            # Registro 0000 (lido antes do salto para o bloco H)
+            if reg == "0000":
+                self.header = Header0000(
+                    empresa=campos[6].strip(),
+                    cnpj=campos[7].strip(),
+                    dt_inicio=campos[4].strip(),
+                    dt_fim=campos[5].strip()
+                )
+                continue
+
+            # Registro H005
+            dt_inv = datetime.strptime(campos[2].strip(), "%d%m%Y").date()
+            vl_inv = float(campos[3].replace(".", "").replace(",", "."))
+
+            self.h005_registros.append(
+                RegistroH005(
+                    dt_inv=dt_inv,
+                    vl_inv=vl_inv,
+                    mot_inv=campos[4].strip(),
+                    arquivo_origem=arquivo_origem
+                )
+            )
 
         return self.header, self.h005_registros
 
@@ -74,27 +83,90 @@ class H005Extrator:
 # ------------------------------------------------------------
 #  EXPORTAÇÃO PARA EXCEL
 # ------------------------------------------------------------
-def gerar_excel(header, registros, output_path):
-    dados = []
+def gerar_excel(header, registros, output_path, formato=None):
+    """
+    Grava os registros H005 em ``output_path``.
+
+    ``formato`` (xlsx, csv, jsonl ou parquet) vem da extensão quando omitido.
+    As linhas são gravadas à medida que são montadas, sem DataFrame.
+    """
+    linhas = (
+        [header.cnpj, header.empresa, reg.dt_inv, reg.vl_inv, reg.mot_inv, reg.arquivo_origem]
+        for reg in registros
+    )
+    tabela = Tabela(
+        nome="Sheet1",
+        colunas=["CNPJ", "EMPRESA", "DATA INVENTÁRIO", "VALOR INVENTÁRIO", "MOTIVO", "ARQUIVO ORIGEM"],
+        linhas=linhas,
+    )
+    return exportar([tabela], output_path, formato)[0]
+
+
+# ------------------------------------------------------------
+#  PROCESSAMENTO EM LOTE (VÁRIOS ARQUIVOS)
+# ------------------------------------------------------------
+@em_cache("efd_icms.h005", VERSAO_EXTRATOR, por_nome=True)
+def _extrair_h005_arquivo(arquivo):
+    header, registros = H005Extrator(arquivo).extrair()
+
+    if not header:
+        raise ValueError("Registro 0000 não encontrado no arquivo.")
+
+    # Se arquivo não tiver bloco H005 → registrar "SEM DADOS" com zeros
+    if not registros:
+        registros.append(
+            RegistroH005(
+                dt_inv=0,
+                vl_inv=0,
+                mot_inv="SEM DADOS",
+                arquivo_origem=os.path.basename(arquivo)
+            )
+        )
+
+    return header, registros
+
+
+def extrair_h005_lote(arquivos, max_workers=None, chunksize=1, progresso=None):
+    """
+    Extrai o H005 de vários arquivos em um pool de processos.
+
+    Devolve (header_primeiro, todos_registros, erros), com os registros na
+    ordem de ``arquivos``. Arquivos com falha entram em ``erros`` como
+    (caminho, mensagem) sem interromper o lote; ``progresso(concluidos,
+    total, caminho)`` é chamado a cada arquivo finalizado.
+    """
+    todos_registros = []
+    header_primeiro = None
+    erros = []
+
+    resultados = executar_em_lote(
+        _extrair_h005_arquivo,
+        arquivos,
+        max_workers=max_workers,
+        chunksize=chunksize,
+        progresso=progresso,
+    )
+    for item in resultados:
+        if not item.ok:
+            erros.append((item.caminho, item.erro))
+            continue
 
-    for reg in registros:
-        dados.append({
-            "CNPJ": header.cnpj,
-            "EMPRESA": header.empresa,
-            "DATA INVENTÁRIO": reg.dt_inv,
-            "VALOR INVENTÁRIO": reg.vl_inv,
-            "MOTIVO": reg.mot_inv,
-            "ARQUIVO ORIGEM": reg.arquivo_origem
-        })
+        header, registros = item.resultado
+        if header_primeiro is None:
+            header_primeiro = header
+        todos_registros.extend(registros)
 
-    df = pd.DataFrame(dados)
-    df.to_excel(output_path, index=False)
+    return header_primeiro, todos_registros, erros
 
 
 # ------------------------------------------------------------
 #  INTERFACE – SELEÇÃO DE MÚLTIPLOS ARQUIVOS
 # ------------------------------------------------------------
+# tkinter só é importado pela interface: o HUB usa este módulo em servidores
+# sem display (e às vezes sem tkinter instalado).
 def selecionar_arquivos():
+    from tkinter import filedialog
+
     caminhos = filedialog.askopenfilenames(
         title="Selecione os arquivos EFD",
         filetypes=[("Arquivo Texto", "*.txt"), ("Todos os arquivos", "*.*")]
@@ -106,6 +178,7 @@ def selecionar_arquivos():
 #  EXECUÇÃO PRINCIPAL
 # ------------------------------------------------------------
 def executar_extracao():
+    from tkinter import messagebox
 
     arquivos = selecionar_arquivos()
 
@@ -113,32 +186,13 @@ def executar_extracao():
         messagebox.showwarning("Aviso", "Nenhum arquivo selecionado.")
         return
 
-    todos_registros = []
-    header_primeiro = None
-
-    for arquivo in arquivos:
-        extrator = H005Extrator(arquivo)
-        header, registros = extrator.extrair()
+    header_primeiro, todos_registros, erros = extrair_h005_lote(arquivos)
 
-        if not header:
-            messagebox.showerror("Erro", f"Registro 0000 não encontrado no arquivo:\n{arquivo}")
-            continue
-
-        # Se arquivo não tiver bloco H005 → registrar "SEM DADOS" com zeros
-        if not registros:
-            registros.append(
-                RegistroH005(
-                    dt_inv=0,                 # <<< AQUI
-                    vl_inv=0,                 # <<< AQUI
-                    mot_inv="SEM DADOS",      # <<< AQUI
-                    arquivo_origem=os.path.basename(arquivo)
-                )
-            )
-
-        if header_primeiro is None:
-            header_primeiro = header
-
-        todos_registros.extend(registros)
+    if erros:
+        messagebox.showerror(
+            "Erro",
+            "\n\n".join(f"{os.path.basename(caminho)}: {erro}" for caminho, erro in erros)
+        )
 
     if not header_primeiro or not todos_registros:
         messagebox.showerror("Erro", "Nenhum dado válido encontrado nos arquivos.")
@@ -159,6 +213,8 @@ def executar_extracao():
 #  ENTRADA (APLICAÇÃO INVISÍVEL)
 # ------------------------------------------------------------
 if __name__ == "__main__":
+    import tkinter as tk
+
     root = tk.Tk()
     root.withdraw()
     executar_extracao()
@@ -1,3 +1,11 @@
+import sys
+from pathlib import Path
+
+# O código comum aos extratores fica em Hub_Painel/hansu_comum.
+_HUB_PAINEL = str(Path(__file__).resolve().parents[2])
+if _HUB_PAINEL not in sys.path:
+    sys.path.append(_HUB_PAINEL)
+
 from .extractor import extract_all, export_result
 
 __all__ = ["extract_all", "export_result"]
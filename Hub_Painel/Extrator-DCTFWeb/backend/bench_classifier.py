@@ -0,0 +1,225 @@
+"""Golden-output check and throughput benchmark for the debit/offset classifier.
+
+The previous regex-per-line implementation is kept here as the reference;
+``extract_debits_credits_and_offsets`` must produce identical blocks and
+offsets on randomly generated reports (including the awkward lines: fields
+sharing a line, wrapped periods, near-miss prefixes) and on any PDFs given
+with ``--pdf``.
+
+Usage: python -m backend.bench_classifier [--lines 200000] [--trials 300] [--pdf a.pdf ...]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .extractor import (
+    RE_PERIODO,
+    BlocoDebitoCredito,
+    Compensacao,
+    extract_debits_credits_and_offsets,
+    extract_pdf_lines,
+)
+
+
+def _legacy_extract(lines: List[str]) -> Tuple[List[BlocoDebitoCredito], List[Compensacao]]:
+    """The previous implementation, kept verbatim as the reference."""
+    blocks: List[BlocoDebitoCredito] = []
+    offsets: List[Compensacao] = []
+
+    current: Optional[BlocoDebitoCredito] = None
+    waiting_period = False
+    in_offsets = False
+
+    for line in lines:
+        if "Débito Apurado e Crédito Vinculado" in line:
+            if current and current.codigo_receita:
+                blocks.append(current)
+            current = BlocoDebitoCredito()
+            waiting_period = False
+            in_offsets = False
+            continue
+
+        if not current:
+            continue
+
+        code_match = re.search(r"Código da Receita\s+([0-9]{4}-[0-9]{2})\s+Descrição\s+(.+)$", line)
+        if code_match:
+            current.codigo_receita = code_match.group(1).strip()
+            current.descricao = code_match.group(2).strip()
+            continue
+
+        debit_entity_match = re.search(
+            r"CNPJ Débito\s+(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})\s+Município Débito\s+(.+)$",
+            line,
+        )
+        if debit_entity_match:
+            current.cnpj_debito = debit_entity_match.group(1).strip()
+            current.municipio_debito = debit_entity_match.group(2).strip()
+            continue
+
+        if "Período Apuração" in line:
+            period_match = RE_PERIODO.search(line)
+            if period_match:
+                current.periodo_apuracao = period_match.group(0)
+                waiting_period = False
+            else:
+                waiting_period = True
+            continue
+
+        if waiting_period and RE_PERIODO.search(line):
+            current.periodo_apuracao = RE_PERIODO.search(line).group(0)
+            waiting_period = False
+            continue
+
+        debit_match = re.search(r"^Débito Apurado\s+(.+)$", line)
+        if debit_match:
+            current.debito_apurado = debit_match.group(1).strip()
+            continue
+
+        offset_credit_match = re.search(r"^Créditos Compensação:\s+(.+)$", line)
+        if offset_credit_match:
+            current.creditos_compensacao = offset_credit_match.group(1).strip()
+            continue
+
+        balance_match = re.search(r"^Saldo a Pagar\s+(.+)$", line)
+        if balance_match:
+            current.saldo_a_pagar = balance_match.group(1).strip()
+            continue
+
+        deduction_match = re.search(r"^Deduções\s+(.+)$", line)
+        if deduction_match:
+            current.deducoes.append(deduction_match.group(1).strip())
+            continue
+
+        if line.strip() == "Compensações":
+            in_offsets = True
+            continue
+
+        if in_offsets:
+            offset_match = re.search(
+                r"Número do Processo\s+(.+?)\s+Tipo\s+(.+?)\s+Valor\s+(.+)$",
+                line,
+            )
+            if offset_match:
+                offsets.append(
+                    Compensacao(
+                        codigo_receita=current.codigo_receita,
+                        descricao_receita=current.descricao,
+                        periodo_apuracao=current.periodo_apuracao,
+                        numero_processo=offset_match.group(1).strip(),
+                        tipo=offset_match.group(2).strip(),
+                        valor=offset_match.group(3).strip(),
+                    )
+                )
+                continue
+
+        if any(key in line for key in ["Débito", "Crédito", "Compensação", "Saldo", "Deduções"]):
+            current.outros_campos.append(line)
+
+    if current and current.codigo_receita:
+        blocks.append(current)
+
+    return blocks, offsets
+
+
+def _amount(rng: random.Random) -> str:
+    return f"{rng.randrange(0, 10_000_000):,}".replace(",", ".") + f",{rng.randrange(100):02d}"
+
+
+def synthetic_report(blocks: int, rng: random.Random) -> List[str]:
+    """Report-shaped lines with a sprinkling of noise and edge cases."""
+    noise = [
+        "",
+        "   ",
+        "Página 3 de 12",
+        "Débito",
+        "Débito Apurado",
+        "DébitoApurado 1,00",
+        "Saldo a Pagar",
+        " Saldo a Pagar 9,99",
+        "Deduções\t12,00",
+        "Créditos Compensação: ",
+        "Compensações ",
+        "Total de Crédito vinculado",
+        "Número do Processo 123 Tipo X",
+        "Código da Receita 1082 Descrição",
+        "CNPJ Débito 00.000.000/0000-00",
+        "03/2024",
+        "Data/Hora 01/04/2024 10:00",
+    ]
+
+    lines: List[str] = ["RELATÓRIO DCTFWeb", "Período Apuração 03/2024"]
+    for _ in range(blocks):
+        code = f"{rng.randrange(1000, 9999)}-{rng.randrange(100):02d}"
+        block = [
+            "Débito Apurado e Crédito Vinculado",
+            f"Código da Receita {code} Descrição CP SEGURADOS - {rng.randrange(99)}",
+            f"CNPJ Débito 12.345.678/0001-{rng.randrange(100):02d} Município Débito SAO PAULO",
+        ]
+        if rng.random() < 0.3:
+            block += ["Período Apuração", rng.choice(["02/2024", "1º Trimestre/2024", "texto solto"])]
+        else:
+            block.append(f"Período Apuração {rng.randrange(1, 13):02d}/2024")
+        if rng.random() < 0.1:
+            block.append(f"Período Apuração 04/2024 Débito Apurado {_amount(rng)}")
+        block += [
+            f"Débito Apurado {_amount(rng)}",
+            f"Créditos Compensação: {_amount(rng)}",
+            f"Deduções {_amount(rng)}",
+            f"Deduções {_amount(rng)}",
+            f"Saldo a Pagar {_amount(rng)}",
+            "Compensações",
+        ]
+        for _ in range(rng.randrange(4)):
+            block.append(f"Número do Processo {rng.randrange(10**9)} Tipo Administrativo Valor {_amount(rng)}")
+        block += rng.sample(noise, rng.randrange(4))
+        rng.shuffle(block[3:])
+        lines += block
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--trials", type=int, default=300)
+    parser.add_argument("--pdf", type=Path, nargs="*", default=[])
+    args = parser.parse_args()
+
+    rng = random.Random(2024)
+    for trial in range(args.trials):
+        report = synthetic_report(rng.randrange(1, 30), rng)
+        if extract_debits_credits_and_offsets(report) != _legacy_extract(report):
+            raise SystemExit(f"mismatch on synthetic report {trial}")
+    print(f"golden: {args.trials} synthetic reports identical")
+
+    for pdf_path in args.pdf:
+        lines = extract_pdf_lines(pdf_path)
+        if extract_debits_credits_and_offsets(lines) != _legacy_extract(lines):
+            raise SystemExit(f"mismatch on {pdf_path}")
+        print(f"golden: {pdf_path.name} identical ({len(lines):,} lines)")
+
+    report: List[str] = []
+    while len(report) < args.lines:
+        report += synthetic_report(100, rng)
+    report = report[: args.lines]
+
+    start = time.perf_counter()
+    _legacy_extract(report)
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extract_debits_credits_and_offsets(report)
+    t_current = time.perf_counter() - start
+
+    print(f"lines:      {len(report):,}")
+    print(f"legacy:     {len(report) / t_legacy:12,.0f} lines/s")
+    print(f"dispatch:   {len(report) / t_current:12,.0f} lines/s  ({t_legacy / t_current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Golden-output check and time/memory benchmark for the XLSX export.
+
+The previous export (full in-memory ``Workbook`` followed by a second pass
+over every data cell to convert periods and amounts) is kept here as the
+reference. The new export must produce the same sheets, cell values and
+number formats on a random report, including the awkward cells: empty and
+quarterly periods, invalid months, amounts that are not numbers.
+
+The streaming writers (openpyxl ``write_only`` and XlsxWriter
+``constant_memory``, the one ``export_result`` prefers) are checked the same
+way. Each path is then timed and its peak Python heap measured (tracemalloc) at
+every ``--blocks`` size, so the growth of memory with the row count shows up
+side by side.
+
+Usage: python -m backend.bench_export [--blocks 10000 50000] [--trials 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from openpyxl import Workbook, load_workbook
+
+from hansu_comum.exportadores import _xlsx_openpyxl, _xlsx_xlsxwriter
+
+from .extractor import (
+    DEBIT_COLUMNS,
+    OFFSET_COLUMNS,
+    BlocoDebitoCredito,
+    Compensacao,
+    _debits_rows,
+    _offset_rows,
+    _result_tables,
+    _to_excel_number,
+    _to_excel_period,
+)
+
+
+def _legacy_apply_excel_types_debits(ws):
+    for row_idx in range(5, ws.max_row + 1):
+        period_cell = ws.cell(row=row_idx, column=3)
+        if isinstance(period_cell.value, str):
+            converted_period = _to_excel_period(period_cell.value)
+            period_cell.value = converted_period
+            if isinstance(converted_period, datetime):
+                period_cell.number_format = "mm/yyyy"
+
+        for col_idx in (6, 7, 8):
+            num_cell = ws.cell(row=row_idx, column=col_idx)
+            if isinstance(num_cell.value, str):
+                converted_number = _to_excel_number(num_cell.value)
+                if converted_number is not None:
+                    num_cell.value = converted_number
+                    num_cell.number_format = "#,##0.00"
+
+
+def _legacy_apply_excel_types_offsets(ws):
+    for row_idx in range(5, ws.max_row + 1):
+        period_cell = ws.cell(row=row_idx, column=3)
+        if isinstance(period_cell.value, str):
+            converted_period = _to_excel_period(period_cell.value)
+            period_cell.value = converted_period
+            if isinstance(converted_period, datetime):
+                period_cell.number_format = "mm/yyyy"
+
+        value_cell = ws.cell(row=row_idx, column=6)
+        if isinstance(value_cell.value, str):
+            converted_number = _to_excel_number(value_cell.value)
+            if converted_number is not None:
+                value_cell.value = converted_number
+                value_cell.number_format = "#,##0.00"
+
+
+def _legacy_export(header, blocks, offsets, output_path: Path) -> None:
+    """The previous xlsx branch of ``export_result``, kept as the reference."""
+    preamble = [["Nome do Contribuinte", header.get("nome_contribuinte", "")], ["CNPJ", header.get("cnpj", "")], []]
+    debits = preamble + [DEBIT_COLUMNS] + list(_debits_rows(blocks))
+    offs = preamble + [OFFSET_COLUMNS] + list(_offset_rows(offsets))
+
+    workbook = Workbook()
+    ws_deb = workbook.active
+    ws_deb.title = "Debitos_Creditos"
+    for row in debits:
+        ws_deb.append(row)
+    _legacy_apply_excel_types_debits(ws_deb)
+
+    ws_off = workbook.create_sheet("Compensacoes")
+    for row in offs:
+        ws_off.append(row)
+    _legacy_apply_excel_types_offsets(ws_off)
+
+    workbook.save(output_path)
+
+
+def _openpyxl_export(header, blocks, offsets, output_path: Path) -> None:
+    _xlsx_openpyxl(_result_tables(header, blocks, offsets, typed=True), output_path)
+
+
+def _xlsxwriter_export(header, blocks, offsets, output_path: Path) -> None:
+    _xlsx_xlsxwriter(_result_tables(header, blocks, offsets, typed=True), output_path)
+
+
+EXPORTS = (
+    ("in-memory", _legacy_export),
+    ("write_only", _openpyxl_export),
+    ("xlsxwriter", _xlsxwriter_export),
+)
+
+
+def _amount(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.05:
+        return ""
+    if roll < 0.08:
+        return rng.choice(["-", "R$ 10,00", "1.234,5x"])
+    whole = rng.randrange(0, 5_000_000)
+    return f"{whole:,}".replace(",", ".") + f",{rng.randrange(100):02d}"
+
+
+def _period(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.05:
+        return ""
+    if roll < 0.10:
+        return f"{rng.randrange(1, 5)}º Trimestre/{rng.randrange(2019, 2026)}"
+    if roll < 0.12:
+        return f"13/{rng.randrange(2019, 2026)}"
+    return f"{rng.randrange(1, 13):02d}/{rng.randrange(2019, 2026)}"
+
+
+def synthetic_report(rng: random.Random, n_blocks: int):
+    header = {"nome_contribuinte": "EMPRESA EXEMPLO LTDA", "cnpj": "12.345.678/0001-90"}
+    blocks = [
+        BlocoDebitoCredito(
+            codigo_receita=f"{rng.randrange(1000, 9999)}-{rng.randrange(100):02d}",
+            descricao=rng.choice(["CP SEGURADOS", "CP PATRONAL", "IRRF", "CP TERCEIROS"]),
+            periodo_apuracao=_period(rng),
+            cnpj_debito="12.345.678/0001-90",
+            municipio_debito=rng.choice(["", "SAO PAULO", "CAMPINAS"]),
+            debito_apurado=_amount(rng),
+            creditos_compensacao=_amount(rng),
+            saldo_a_pagar=_amount(rng),
+            deducoes=[_amount(rng) for _ in range(rng.randrange(3))],
+            outros_campos=[f"Saldo: {_amount(rng)}" for _ in range(rng.randrange(2))],
+        )
+        for _ in range(n_blocks)
+    ]
+    offsets = [
+        Compensacao(
+            codigo_receita=f"{rng.randrange(1000, 9999)}-{rng.randrange(100):02d}",
+            descricao_receita="CP SEGURADOS",
+            periodo_apuracao=_period(rng),
+            numero_processo=f"{rng.randrange(10**9)}",
+            tipo=rng.choice(["Compensação", "Restituição"]),
+            valor=_amount(rng),
+        )
+        for _ in range(n_blocks // 4)
+    ]
+    return header, blocks, offsets
+
+
+def _snapshot(path: Path) -> List[tuple]:
+    # Empty strings and missing cells look the same in Excel.
+    workbook = load_workbook(path)
+    return [
+        (ws.title, cell.coordinate, cell.value, cell.number_format)
+        for ws in workbook.worksheets
+        for row in ws.iter_rows()
+        for cell in row
+        if cell.value not in (None, "")
+    ]
+
+
+def _measure(export, report, path: Path) -> tuple:
+    started = time.perf_counter()
+    export(*report, path)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    export(*report, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--trials", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(2024)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.xlsx"
+
+        report = synthetic_report(rng, args.trials)
+        reference = None
+        for name, export in EXPORTS:
+            export(*report, path)
+            if reference is None:
+                reference = _snapshot(path)
+            elif _snapshot(path) != reference:
+                raise SystemExit(f"output mismatch: {name}")
+        print(f"golden: {args.trials} blocks, identical cells and formats")
+
+        for n_blocks in args.blocks:
+            report = synthetic_report(rng, n_blocks)
+            rows = n_blocks + n_blocks // 4
+            for name, export in EXPORTS:
+                elapsed, peak = _measure(export, report, path)
+                print(
+                    f"{name:<11} {rows:>8,} rows  {rows / elapsed:10,.0f} rows/s  "
+                    f"peak {peak / 2**20:8.1f} MiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
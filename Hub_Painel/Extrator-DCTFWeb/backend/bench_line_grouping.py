@@ -0,0 +1,80 @@
+"""Micro-benchmark and equivalence check for ``_group_lines``.
+
+Usage: python -m backend.bench_line_grouping [--fragments 10000] [--trials 200]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Dict, List, Tuple
+
+from .extractor import LINE_Y_TOLERANCE, _group_lines
+
+
+def _legacy_group_lines(items: List[Tuple[float, float, str]]) -> List[str]:
+    """The previous O(fragments x lines) grouping, kept as the reference."""
+    items = sorted(items, key=lambda value: (-value[1], value[0]))
+
+    grouped: List[Dict[str, object]] = []
+    for x, y, text in items:
+        attached = False
+        for line in grouped:
+            if abs(float(line["y"]) - y) < LINE_Y_TOLERANCE:
+                line["parts"].append((x, text))
+                attached = True
+                break
+
+        if not attached:
+            grouped.append({"y": y, "parts": [(x, text)]})
+
+    lines: List[str] = []
+    for line in grouped:
+        parts = sorted(line["parts"], key=lambda value: value[0])
+        lines.append(" ".join(t for _, t in parts).strip())
+
+    return lines
+
+
+def synthetic_page(fragments: int, rng: random.Random) -> List[Tuple[float, float, str]]:
+    """Dense page: rows every ~1.5pt with jitter, duplicate x positions included."""
+    rows = max(1, fragments // 8)
+    items = []
+    for i in range(fragments):
+        row = rng.randrange(rows)
+        y = 800.0 - row * 1.5 + rng.uniform(-0.7, 0.7)
+        x = round(rng.uniform(20.0, 580.0), 1 if i % 3 else 0)
+        items.append((x, round(y, 2), f"t{i}"))
+    return items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fragments", type=int, default=10_000)
+    parser.add_argument("--trials", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1234)
+    for trial in range(args.trials):
+        page = synthetic_page(rng.randrange(1, 400), rng)
+        if _group_lines(list(page)) != _legacy_group_lines(page):
+            raise SystemExit(f"mismatch on trial {trial}")
+    print(f"equivalence: {args.trials} random pages identical")
+
+    page = synthetic_page(args.fragments, rng)
+
+    start = time.perf_counter()
+    legacy = _legacy_group_lines(page)
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = _group_lines(list(page))
+    t_current = time.perf_counter() - start
+
+    print(f"fragments: {args.fragments:,} -> {len(current):,} lines (identical: {current == legacy})")
+    print(f"legacy:    {t_legacy * 1000:9.1f} ms")
+    print(f"sweep:     {t_current * 1000:9.1f} ms  ({t_legacy / t_current:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
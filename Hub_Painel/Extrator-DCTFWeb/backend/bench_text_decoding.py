@@ -0,0 +1,114 @@
+"""Correctness check and micro-benchmark for ``_decode_pdf_text_token``.
+
+Usage: python -m backend.bench_text_decoding [--tokens 200000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import List, Optional, Tuple
+
+from .extractor import _decode_pdf_text_token
+
+# (literal bytes, expected text) for the parts of the grammar the previous
+# decoder got wrong.
+CASES = [
+    (rb"Valor \050R$\051", "Valor (R$)"),
+    (rb"D\351bito Apurado", "Débito Apurado"),
+    (rb"\0053", "\x053"),
+    (rb"\7", "\x07"),
+    (rb"\777", "\xff"),
+    (rb"Compensa\347\365es", "Compensações"),
+    (b"linha \\\nquebrada", "linha quebrada"),
+    (b"linha \\\r\nquebrada", "linha quebrada"),
+    (b"a\r\nb\rc\nd", "a\nb\nc\nd"),
+    (rb"\q\(\)\\", "q()\\"),
+    (b"fim\\", "fim\\"),
+]
+
+
+def _legacy_decode(hex_text: Optional[bytes], literal_text: Optional[bytes]) -> str:
+    """The previous byte-at-a-time decoder, kept as the reference."""
+    if hex_text:
+        return bytes.fromhex(hex_text.decode("ascii")).decode("latin-1", errors="ignore")
+
+    raw = literal_text or b""
+    out = bytearray()
+    idx = 0
+
+    while idx < len(raw):
+        cur = raw[idx]
+        if cur == 92 and idx + 1 < len(raw):
+            nxt = raw[idx + 1]
+            escapes = {
+                ord("n"): ord("\n"),
+                ord("r"): ord("\r"),
+                ord("t"): ord("\t"),
+                ord("b"): 8,
+                ord("f"): 12,
+                ord("("): ord("("),
+                ord(")"): ord(")"),
+                ord("\\"): ord("\\"),
+            }
+            if nxt in escapes:
+                out.append(escapes[nxt])
+                idx += 2
+                continue
+
+        out.append(cur)
+        idx += 1
+
+    return out.decode("latin-1", errors="ignore")
+
+
+def synthetic_tokens(count: int, rng: random.Random) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+    """Mix of plain, escaped and hex tokens as found on text-heavy pages.
+
+    Only escapes both decoders agree on are used, so outputs can be compared.
+    """
+    words = [b"Debito", b"Apurado", b"Saldo a Pagar", b"12.345,67", b"CNPJ", b"0001-91", b"Valor"]
+    escapes = [b"\\(", b"\\)", b"\\\\", b"\\n", b"\\t"]
+    tokens: List[Tuple[Optional[bytes], Optional[bytes]]] = []
+    for _ in range(count):
+        roll = rng.random()
+        text = b" ".join(rng.choice(words) for _ in range(rng.randrange(1, 5)))
+        if roll < 0.15:
+            tokens.append((text.hex().encode("ascii"), None))
+        elif roll < 0.45:
+            tokens.append((None, rng.choice(escapes) + text + rng.choice(escapes)))
+        else:
+            tokens.append((None, text))
+    return tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=200_000)
+    args = parser.parse_args()
+
+    for literal, expected in CASES:
+        decoded = _decode_pdf_text_token(None, literal)
+        if decoded != expected:
+            raise SystemExit(f"{literal!r}: got {decoded!r}, expected {expected!r}")
+    if _decode_pdf_text_token(b"41420", None) != "AB\x00":
+        raise SystemExit("odd-length hex string not padded")
+    print(f"grammar: {len(CASES) + 1} cases ok")
+
+    tokens = synthetic_tokens(args.tokens, random.Random(7))
+
+    start = time.perf_counter()
+    legacy = [_legacy_decode(h, l) for h, l in tokens]
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = [_decode_pdf_text_token(h, l) for h, l in tokens]
+    t_current = time.perf_counter() - start
+
+    print(f"tokens:  {args.tokens:,} (identical: {current == legacy})")
+    print(f"legacy:  {t_legacy * 1000:9.1f} ms")
+    print(f"table:   {t_current * 1000:9.1f} ms  ({t_legacy / t_current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
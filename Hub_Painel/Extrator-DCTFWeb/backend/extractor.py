@@ -1,17 +1,78 @@
 from __future__ import annotations
 
-import csv
-import importlib.util
+import binascii
+import os
 import re
 import zlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from hansu_comum.cache_extracao import em_cache
+from hansu_comum.exportadores import Tabela, exportar, formato_disponivel, formato_do_caminho
+
+from .pdf_scanner import PdfStructureError, XrefPdfReader, decode_page
+
+# Bump whenever parsing changes so cached results are invalidated.
+EXTRACTOR_VERSION = "3"
 
 RE_CNPJ = re.compile(r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}")
 RE_DATA_MM_AAAA = re.compile(r"\b\d{2}/\d{4}\b")
 RE_PERIODO = re.compile(r"\b(?:\d{2}/\d{4}|[1-4][º°]\s*Trimestre/\d{4})\b", re.IGNORECASE)
+RE_TEXT_TOKEN = re.compile(
+    rb"1\s+0\s+0\s+1\s+([\d\.-]+)\s+([\d\.-]+)\s+Tm\s*(?:<([0-9A-Fa-f]+)>|\((.*?)\))\s*Tj",
+    re.S,
+)
+
+BLOCK_START = "Débito Apurado e Crédito Vinculado"
+OFFSETS_HEADER = "Compensações"
+RE_CODE = re.compile(r"Código da Receita\s+([0-9]{4}-[0-9]{2})\s+Descrição\s+(.+)$")
+RE_DEBIT_ENTITY = re.compile(
+    r"CNPJ Débito\s+(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})\s+Município Débito\s+(.+)$"
+)
+RE_OFFSET = re.compile(r"Número do Processo\s+(.+?)\s+Tipo\s+(.+?)\s+Valor\s+(.+)$")
+# Line-anchored amount fields, dispatched on the first word of the line.
+AMOUNT_FIELDS = {
+    "Débito": (re.compile(r"^Débito Apurado\s+(.+)$"), "debito_apurado"),
+    "Créditos": (re.compile(r"^Créditos Compensação:\s+(.+)$"), "creditos_compensacao"),
+    "Saldo": (re.compile(r"^Saldo a Pagar\s+(.+)$"), "saldo_a_pagar"),
+    "Deduções": (re.compile(r"^Deduções\s+(.+)$"), "deducoes"),
+}
+OTHER_FIELD_KEYS = ("Débito", "Crédito", "Compensação", "Saldo", "Deduções")
+
+LINE_Y_TOLERANCE = 1.2
+# Below this many pages a worker pool costs more to start than it saves.
+PARALLEL_PAGE_THRESHOLD = 16
+
+DEBIT_COLUMNS = [
+    "Código Receita",
+    "Descrição",
+    "Período Apuração",
+    "CNPJ Débito",
+    "Município Débito",
+    "Débito Apurado",
+    "Créditos Compensação",
+    "Saldo a Pagar",
+    "Deduções",
+    "Outros Campos",
+]
+OFFSET_COLUMNS = [
+    "Código Receita",
+    "Descrição Receita",
+    "Período Apuração",
+    "Número do Processo",
+    "Tipo",
+    "Valor",
+]
+# Excel export: the period is column 3 of both tables; these 1-based amount
+# columns are converted to numbers.
+PERIOD_COLUMN = 3
+DEBIT_NUMBER_COLUMNS = (6, 7, 8)
+OFFSET_NUMBER_COLUMNS = (6,)
+EXCEL_PERIOD_FORMAT = "mm/yyyy"
+EXCEL_NUMBER_FORMAT = "#,##0.00"
 
 
 @dataclass
@@ -38,37 +99,56 @@ class Compensacao:
     valor: str = ""
 
 
+def _literal_escape_table() -> Dict[bytes, bytes]:
+    """Replacement for every escape sequence and bare EOL of a literal string."""
+    table = {b"\\" + bytes((value,)): bytes((value,)) for value in range(256)}
+    table.update(
+        {
+            b"\\n": b"\n",
+            b"\\r": b"\r",
+            b"\\t": b"\t",
+            b"\\b": b"\b",
+            b"\\f": b"\f",
+            # backslash + EOL is a line continuation
+            b"\\\r": b"",
+            b"\\\n": b"",
+            b"\\\r\n": b"",
+            # an unescaped EOL of any kind reads as a single LF
+            b"\r": b"\n",
+            b"\r\n": b"\n",
+        }
+    )
+    for digits in range(1, 4):
+        for value in range(8 ** digits):
+            table[b"\\" + format(value, f"0{digits}o").encode("ascii")] = bytes((value & 0xFF,))
+    return table
+
+
+LITERAL_ESCAPES = _literal_escape_table()
+RE_LITERAL_ESCAPE = re.compile(rb"\\(?:[0-7]{1,3}|\r\n?|.)|\r\n?", re.S)
+
+
+def _literal_escape(match: re.Match) -> bytes:
+    return LITERAL_ESCAPES[match.group(0)]
+
+
 def _decode_pdf_text_token(hex_text: Optional[bytes], literal_text: Optional[bytes]) -> str:
+    """Text of a ``<hex>`` or ``(literal)`` string operand, as latin-1.
+
+    Literal strings follow the PDF escape grammar: the named escapes, octal
+    ``\\ddd`` (one to three digits), backslash-EOL continuations and EOL
+    normalization; an unknown escape keeps just the escaped character. A
+    hex string with an odd number of digits gets an implied trailing zero.
+    """
     if hex_text:
-        return bytes.fromhex(hex_text.decode("ascii")).decode("latin-1", errors="ignore")
+        if len(hex_text) % 2:
+            hex_text += b"0"
+        return binascii.unhexlify(hex_text).decode("latin-1")
 
     raw = literal_text or b""
-    out = bytearray()
-    idx = 0
-
-    while idx < len(raw):
-        cur = raw[idx]
-        if cur == 92 and idx + 1 < len(raw):
-            nxt = raw[idx + 1]
-            escapes = {
-                ord("n"): ord("\n"),
-                ord("r"): ord("\r"),
-                ord("t"): ord("\t"),
-                ord("b"): 8,
-                ord("f"): 12,
-                ord("("): ord("("),
-                ord(")"): ord(")"),
-                ord("\\"): ord("\\"),
-            }
-            if nxt in escapes:
-                out.append(escapes[nxt])
-                idx += 2
-                continue
-
-        out.append(cur)
-        idx += 1
-
-    return out.decode("latin-1", errors="ignore")
+    if b"\\" in raw or b"\r" in raw:
+        raw = RE_LITERAL_ESCAPE.sub(_literal_escape, raw)
+    return raw.decode("latin-1")
 
 
 def _extract_pdf_objects(pdf_bytes: bytes) -> Dict[int, bytes]:
@@ -109,58 +189,106 @@ def _inflate_stream(obj_body: bytes) -> Optional[bytes]:
     return content
 
 
-def _extract_lines_from_stream(stream: bytes) -> List[str]:
-    token_re = re.compile(
-        rb"1\s+0\s+0\s+1\s+([\d\.-]+)\s+([\d\.-]+)\s+Tm\s*(?:<([0-9A-Fa-f]+)>|\((.*?)\))\s*Tj",
-        re.S,
-    )
-
-    items: List[Tuple[float, float, str]] = []
-    for m in token_re.finditer(stream):
-        x = float(m.group(1))
-        y = float(m.group(2))
-        text = _decode_pdf_text_token(m.group(3), m.group(4)).strip()
-        if text:
-            items.append((x, y, text))
+def _group_lines(items: List[Tuple[float, float, str]]) -> List[str]:
+    """Groups ``(x, y, text)`` fragments into text lines in a single sweep.
 
+    Fragments are sorted by descending y. A line is anchored at the y of
+    its first fragment and a new line only starts when a fragment is at
+    least ``LINE_Y_TOLERANCE`` away from every anchor, so anchors decrease
+    with gaps >= the tolerance and every later fragment has y <= all of
+    them. Hence only the most recent anchor can be within the tolerance,
+    and comparing against it alone matches the former first-match scan.
+    """
     items.sort(key=lambda value: (-value[1], value[0]))
 
-    grouped: List[Dict[str, object]] = []
+    lines: List[str] = []
+    anchor = 0.0
+    parts: List[Tuple[float, str]] = []
     for x, y, text in items:
-        attached = False
-        for line in grouped:
-            if abs(float(line["y"]) - y) < 1.2:
-                line["parts"].append((x, text))
-                attached = True
-                break
+        if parts and abs(anchor - y) < LINE_Y_TOLERANCE:
+            parts.append((x, text))
+            continue
 
-        if not attached:
-            grouped.append({"y": y, "parts": [(x, text)]})
+        if parts:
+            parts.sort(key=lambda value: value[0])
+            lines.append(" ".join(t for _, t in parts).strip())
+        anchor = y
+        parts = [(x, text)]
 
-    lines: List[str] = []
-    for line in grouped:
-        parts = sorted(line["parts"], key=lambda value: value[0])
+    if parts:
+        parts.sort(key=lambda value: value[0])
         lines.append(" ".join(t for _, t in parts).strip())
 
     return lines
 
 
-def extract_pdf_lines(pdf_path: Path) -> List[str]:
-    pdf_bytes = pdf_path.read_bytes()
-    objects = _extract_pdf_objects(pdf_bytes)
-    contents = _page_content_order(objects)
+def _extract_lines_from_stream(stream: bytes) -> List[str]:
+    items: List[Tuple[float, float, str]] = []
+    for m in RE_TEXT_TOKEN.finditer(stream):
+        x = float(m.group(1))
+        y = float(m.group(2))
+        text = _decode_pdf_text_token(m.group(3), m.group(4)).strip()
+        if text:
+            items.append((x, y, text))
 
-    lines: List[str] = []
-    for content_obj in contents:
+    return _group_lines(items)
+
+
+def _page_streams_by_scan(pdf_bytes: bytes) -> List[bytes]:
+    """Legacy path: regex scan over every object, for files with a broken xref."""
+    objects = _extract_pdf_objects(pdf_bytes)
+    streams: List[bytes] = []
+    for content_obj in _page_content_order(objects):
         body = objects.get(content_obj)
         if not body:
             continue
 
         stream = _inflate_stream(body)
-        if not stream:
-            continue
+        if stream:
+            streams.append(stream)
+
+    return streams
+
 
-        lines.extend(_extract_lines_from_stream(stream))
+def _encoded_pages(pdf_bytes: bytes) -> List[List[Tuple[bytes, bytes]]]:
+    """Still-encoded ``/Contents`` parts of each page, resolved through the xref.
+
+    Falls back to the full regex scan (already inflated, hence an empty
+    filter dictionary) when the xref/trailer is unusable or yields no pages.
+    """
+    try:
+        pages = XrefPdfReader(pdf_bytes).page_encoded_contents()
+    except (PdfStructureError, ValueError, IndexError, zlib.error):
+        pages = []
+
+    return pages or [[(stream, b"")] for stream in _page_streams_by_scan(pdf_bytes)]
+
+
+def _page_lines(parts: List[Tuple[bytes, bytes]]) -> List[str]:
+    stream = decode_page(parts)
+    return _extract_lines_from_stream(stream) if stream else []
+
+
+def extract_pdf_lines(pdf_path: Path, workers: Optional[int] = 1) -> List[str]:
+    """Text lines of every page, in page order.
+
+    With ``workers`` > 1 (``None`` = one per CPU) and at least
+    ``PARALLEL_PAGE_THRESHOLD`` pages, inflating and tokenizing run in a
+    process pool; smaller files stay in the current process.
+    """
+    pages = _encoded_pages(pdf_path.read_bytes())
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    if workers <= 1 or len(pages) < PARALLEL_PAGE_THRESHOLD:
+        page_lines = [_page_lines(parts) for parts in pages]
+    else:
+        chunksize = max(1, len(pages) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            page_lines = list(executor.map(_page_lines, pages, chunksize=chunksize))
+
+    lines: List[str] = []
+    for item in page_lines:
+        lines.extend(item)
 
     return lines
 
@@ -210,7 +338,7 @@ def extract_debits_credits_and_offsets(lines: List[str]) -> Tuple[List[BlocoDebi
     in_offsets = False
 
     for line in lines:
-        if "Débito Apurado e Crédito Vinculado" in line:
+        if BLOCK_START in line:
             if current and current.codigo_receita:
                 blocks.append(current)
             current = BlocoDebitoCredito()
@@ -221,20 +349,22 @@ def extract_debits_credits_and_offsets(lines: List[str]) -> Tuple[List[BlocoDebi
         if not current:
             continue
 
-        code_match = re.search(r"Código da Receita\s+([0-9]{4}-[0-9]{2})\s+Descrição\s+(.+)$", line)
-        if code_match:
-            current.codigo_receita = code_match.group(1).strip()
-            current.descricao = code_match.group(2).strip()
-            continue
+        # Each pattern only runs when its literal marker is present, and the
+        # anchored amount fields are picked by the line's first word, so a
+        # line costs a few substring checks plus at most one regex per branch.
+        if "Código da Receita" in line:
+            code_match = RE_CODE.search(line)
+            if code_match:
+                current.codigo_receita = code_match.group(1).strip()
+                current.descricao = code_match.group(2).strip()
+                continue
 
-        debit_entity_match = re.search(
-            r"CNPJ Débito\s+(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})\s+Município Débito\s+(.+)$",
-            line,
-        )
-        if debit_entity_match:
-            current.cnpj_debito = debit_entity_match.group(1).strip()
-            current.municipio_debito = debit_entity_match.group(2).strip()
-            continue
+        if "CNPJ Débito" in line:
+            debit_entity_match = RE_DEBIT_ENTITY.search(line)
+            if debit_entity_match:
+                current.cnpj_debito = debit_entity_match.group(1).strip()
+                current.municipio_debito = debit_entity_match.group(2).strip()
+                continue
 
         if "Período Apuração" in line:
             period_match = RE_PERIODO.search(line)
@@ -245,40 +375,31 @@ def extract_debits_credits_and_offsets(lines: List[str]) -> Tuple[List[BlocoDebi
                 waiting_period = True
             continue
 
-        if waiting_period and RE_PERIODO.search(line):
-            current.periodo_apuracao = RE_PERIODO.search(line).group(0)
-            waiting_period = False
-            continue
-
-        debit_match = re.search(r"^Débito Apurado\s+(.+)$", line)
-        if debit_match:
-            current.debito_apurado = debit_match.group(1).strip()
-            continue
-
-        offset_credit_match = re.search(r"^Créditos Compensação:\s+(.+)$", line)
-        if offset_credit_match:
-            current.creditos_compensacao = offset_credit_match.group(1).strip()
-            continue
-
-        balance_match = re.search(r"^Saldo a Pagar\s+(.+)$", line)
-        if balance_match:
-            current.saldo_a_pagar = balance_match.group(1).strip()
-            continue
+        if waiting_period:
+            period_match = RE_PERIODO.search(line)
+            if period_match:
+                current.periodo_apuracao = period_match.group(0)
+                waiting_period = False
+                continue
 
-        deduction_match = re.search(r"^Deduções\s+(.+)$", line)
-        if deduction_match:
-            current.deducoes.append(deduction_match.group(1).strip())
-            continue
+        words = line.split(None, 1)
+        amount_field = AMOUNT_FIELDS.get(words[0]) if words else None
+        if amount_field:
+            amount_match = amount_field[0].match(line)
+            if amount_match:
+                value = amount_match.group(1).strip()
+                if amount_field[1] == "deducoes":
+                    current.deducoes.append(value)
+                else:
+                    setattr(current, amount_field[1], value)
+                continue
 
-        if line.strip() == "Compensações":
+        if line.strip() == OFFSETS_HEADER:
             in_offsets = True
             continue
 
-        if in_offsets:
-            offset_match = re.search(
-                r"Número do Processo\s+(.+?)\s+Tipo\s+(.+?)\s+Valor\s+(.+)$",
-                line,
-            )
+        if in_offsets and "Número do Processo" in line:
+            offset_match = RE_OFFSET.search(line)
             if offset_match:
                 offsets.append(
                     Compensacao(
@@ -292,7 +413,7 @@ def extract_debits_credits_and_offsets(lines: List[str]) -> Tuple[List[BlocoDebi
                 )
                 continue
 
-        if any(key in line for key in ["Débito", "Crédito", "Compensação", "Saldo", "Deduções"]):
+        if any(key in line for key in OTHER_FIELD_KEYS):
             current.outros_campos.append(line)
 
     if current and current.codigo_receita:
@@ -301,8 +422,9 @@ def extract_debits_credits_and_offsets(lines: List[str]) -> Tuple[List[BlocoDebi
     return blocks, offsets
 
 
-def extract_all(pdf_path: Path) -> Dict[str, object]:
-    lines = extract_pdf_lines(pdf_path)
+@em_cache("dctfweb.extract_all", EXTRACTOR_VERSION, ignorar=("workers",))
+def extract_all(pdf_path: Path, *, workers: Optional[int] = 1) -> Dict[str, object]:
+    lines = extract_pdf_lines(pdf_path, workers=workers)
     header = extract_header(lines)
     blocks, offsets = extract_debits_credits_and_offsets(lines)
 
@@ -313,74 +435,32 @@ def extract_all(pdf_path: Path) -> Dict[str, object]:
     }
 
 
-def _debits_rows(header: Dict[str, str], blocks: List[BlocoDebitoCredito]) -> List[List[str]]:
-    rows = [
-        ["Nome do Contribuinte", header.get("nome_contribuinte", "")],
-        ["CNPJ", header.get("cnpj", "")],
-        [],
-        [
-            "Código Receita",
-            "Descrição",
-            "Período Apuração",
-            "CNPJ Débito",
-            "Município Débito",
-            "Débito Apurado",
-            "Créditos Compensação",
-            "Saldo a Pagar",
-            "Deduções",
-            "Outros Campos",
-        ],
-    ]
-
+def _debits_rows(blocks: Iterable[BlocoDebitoCredito]) -> Iterator[List[str]]:
     for block in blocks:
-        rows.append(
-            [
-                block.codigo_receita,
-                block.descricao,
-                block.periodo_apuracao,
-                block.cnpj_debito,
-                block.municipio_debito,
-                block.debito_apurado,
-                block.creditos_compensacao,
-                block.saldo_a_pagar,
-                " | ".join(block.deducoes),
-                " | ".join(block.outros_campos),
-            ]
-        )
-
-    return rows
-
-
-def _offset_rows(header: Dict[str, str], offsets: List[Compensacao]) -> List[List[str]]:
-    rows = [
-        ["Nome do Contribuinte", header.get("nome_contribuinte", "")],
-        ["CNPJ", header.get("cnpj", "")],
-        [],
-        [
-            "Código Receita",
-            "Descrição Receita",
-            "Período Apuração",
-            "Número do Processo",
-            "Tipo",
-            "Valor",
-        ],
-    ]
-
+        yield [
+            block.codigo_receita,
+            block.descricao,
+            block.periodo_apuracao,
+            block.cnpj_debito,
+            block.municipio_debito,
+            block.debito_apurado,
+            block.creditos_compensacao,
+            block.saldo_a_pagar,
+            " | ".join(block.deducoes),
+            " | ".join(block.outros_campos),
+        ]
+
+
+def _offset_rows(offsets: Iterable[Compensacao]) -> Iterator[List[str]]:
     for item in offsets:
-        rows.append(
-            [
-                item.codigo_receita,
-                item.descricao_receita,
-                item.periodo_apuracao,
-                item.numero_processo,
-                item.tipo,
-                item.valor,
-            ]
-        )
-
-    return rows
-
-
+        yield [
+            item.codigo_receita,
+            item.descricao_receita,
+            item.periodo_apuracao,
+            item.numero_processo,
+            item.tipo,
+            item.valor,
+        ]
 
 
 def _to_excel_number(raw_value: str):
@@ -413,80 +493,84 @@ def _to_excel_period(raw_period: str):
     return period
 
 
-def _apply_excel_types_debits(ws):
-    for row_idx in range(5, ws.max_row + 1):
-        period_cell = ws.cell(row=row_idx, column=3)
-        if isinstance(period_cell.value, str):
-            converted_period = _to_excel_period(period_cell.value)
-            period_cell.value = converted_period
-            if isinstance(converted_period, datetime):
-                period_cell.number_format = "mm/yyyy"
-
-        for col_idx in (6, 7, 8):
-            num_cell = ws.cell(row=row_idx, column=col_idx)
-            if isinstance(num_cell.value, str):
-                converted_number = _to_excel_number(num_cell.value)
-                if converted_number is not None:
-                    num_cell.value = converted_number
-                    num_cell.number_format = "#,##0.00"
-
-
-def _apply_excel_types_offsets(ws):
-    for row_idx in range(5, ws.max_row + 1):
-        period_cell = ws.cell(row=row_idx, column=3)
-        if isinstance(period_cell.value, str):
-            converted_period = _to_excel_period(period_cell.value)
-            period_cell.value = converted_period
-            if isinstance(converted_period, datetime):
-                period_cell.number_format = "mm/yyyy"
-
-        value_cell = ws.cell(row=row_idx, column=6)
-        if isinstance(value_cell.value, str):
-            converted_number = _to_excel_number(value_cell.value)
-            if converted_number is not None:
-                value_cell.value = converted_number
-                value_cell.number_format = "#,##0.00"
-
-def export_result(header: Dict[str, str], blocks: List[BlocoDebitoCredito], offsets: List[Compensacao], output_path: Path) -> Dict[str, object]:
-    debits = _debits_rows(header, blocks)
-    offs = _offset_rows(header, offsets)
-
-    openpyxl_available = importlib.util.find_spec("openpyxl") is not None
-
-    if openpyxl_available and output_path.suffix.lower() == ".xlsx":
-        from openpyxl import Workbook
-
-        workbook = Workbook()
-        ws_deb = workbook.active
-        ws_deb.title = "Debitos_Creditos"
-        for row in debits:
-            ws_deb.append(row)
-        _apply_excel_types_debits(ws_deb)
-
-        ws_off = workbook.create_sheet("Compensacoes")
-        for row in offs:
-            ws_off.append(row)
-        _apply_excel_types_offsets(ws_off)
-
-        workbook.save(output_path)
-        return {
-            "format": "xlsx",
-            "main_path": str(output_path),
-            "extra_paths": [],
-        }
-
-    base = output_path.with_suffix("")
-    debit_path = Path(f"{base}_debitos_creditos.csv")
-    offset_path = Path(f"{base}_compensacoes.csv")
-
-    with debit_path.open("w", newline="", encoding="utf-8") as file_deb:
-        csv.writer(file_deb, delimiter=";").writerows(debits)
+def _typed_row(row: List[str], number_columns: Tuple[int, ...]) -> list:
+    """Row with the period as datetime and the amounts as float, where they parse."""
+    values: list = list(row)
+    values[PERIOD_COLUMN - 1] = _to_excel_period(values[PERIOD_COLUMN - 1])
+    for col_idx in number_columns:
+        number = _to_excel_number(values[col_idx - 1])
+        if number is not None:
+            values[col_idx - 1] = number
+    return values
+
+
+def _excel_formats(columns: List[str], number_columns: Tuple[int, ...]) -> Dict[str, str]:
+    formats = {columns[PERIOD_COLUMN - 1]: EXCEL_PERIOD_FORMAT}
+    formats.update((columns[col_idx - 1], EXCEL_NUMBER_FORMAT) for col_idx in number_columns)
+    return formats
+
+
+def _result_tables(
+    header: Dict[str, str],
+    blocks: Iterable[BlocoDebitoCredito],
+    offsets: Iterable[Compensacao],
+    typed: bool,
+) -> List[Tabela]:
+    """Debit and offset tables; ``typed`` converts periods and amounts (xlsx only)."""
+    name = header.get("nome_contribuinte", "")
+    cnpj = header.get("cnpj", "")
+    preamble = [["Nome do Contribuinte", name], ["CNPJ", cnpj], []]
+    context = {"Nome do Contribuinte": name, "CNPJ": cnpj}
+
+    debits: Iterable[list] = _debits_rows(blocks)
+    offs: Iterable[list] = _offset_rows(offsets)
+    if typed:
+        debits = (_typed_row(row, DEBIT_NUMBER_COLUMNS) for row in debits)
+        offs = (_typed_row(row, OFFSET_NUMBER_COLUMNS) for row in offs)
+
+    return [
+        Tabela(
+            "Debitos_Creditos",
+            DEBIT_COLUMNS,
+            debits,
+            preamble,
+            formatos=_excel_formats(DEBIT_COLUMNS, DEBIT_NUMBER_COLUMNS),
+            contexto=context,
+        ),
+        Tabela(
+            "Compensacoes",
+            OFFSET_COLUMNS,
+            offs,
+            preamble,
+            formatos=_excel_formats(OFFSET_COLUMNS, OFFSET_NUMBER_COLUMNS),
+            contexto=context,
+        ),
+    ]
 
-    with offset_path.open("w", newline="", encoding="utf-8") as file_off:
-        csv.writer(file_off, delimiter=";").writerows(offs)
 
+def export_result(
+    header: Dict[str, str],
+    blocks: List[BlocoDebitoCredito],
+    offsets: List[Compensacao],
+    output_path: Path,
+    output_format: Optional[str] = None,
+) -> Dict[str, object]:
+    """Writes the debit and offset tables to ``output_path``.
+
+    ``output_format`` is one of the formats in ``exportadores`` (xlsx, csv,
+    jsonl, parquet); by default it comes from the suffix. xlsx is one
+    workbook with typed periods and amounts; the other formats write one
+    file per table with the values as extracted. Unknown suffixes, or xlsx
+    without an xlsx library, fall back to CSV.
+    """
+    output_format = output_format or formato_do_caminho(output_path) or "csv"
+    if output_format == "xlsx" and not formato_disponivel("xlsx"):
+        output_format = "csv"
+
+    tables = _result_tables(header, blocks, offsets, typed=output_format == "xlsx")
+    paths = exportar(tables, output_path, output_format)
     return {
-        "format": "csv",
-        "main_path": str(debit_path),
-        "extra_paths": [str(offset_path)],
+        "format": output_format,
+        "main_path": str(paths[0]),
+        "extra_paths": [str(path) for path in paths[1:]],
     }
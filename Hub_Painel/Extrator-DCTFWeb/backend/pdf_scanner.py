@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+RE_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+RE_OBJ_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\b")
+RE_ANY_OBJ_HEADER = re.compile(rb"(\d+)\s+\d+\s+obj\b")
+RE_XREF_SUBSECTION = re.compile(rb"\s*(\d+)\s+(\d+)[ \t]*\r?\n")
+RE_XREF_ENTRY = re.compile(rb"\s*(\d{10})\s+(\d{5})\s+([nf])")
+RE_STREAM_KEYWORD = re.compile(rb"stream\r?\n")
+RE_REF = re.compile(rb"(\d+)\s+\d+\s+R")
+RE_INT_ENTRY = {
+    key: re.compile(rb"/" + key + rb"\s+(\d+)\b(?!\s+\d+\s+R)")
+    for key in (b"Prev", b"XRefStm", b"Size", b"N", b"First", b"Predictor", b"Columns", b"Colors", b"BitsPerComponent")
+}
+RE_LENGTH = re.compile(rb"/Length\s+(\d+)(?:\s+\d+\s+(R))?")
+RE_ROOT = re.compile(rb"/Root\s+(\d+)\s+\d+\s+R")
+RE_PAGES_REF = re.compile(rb"/Pages\s+(\d+)\s+\d+\s+R")
+RE_TYPE = re.compile(rb"/Type\s*/(Pages|Page|XRef|ObjStm)(?![A-Za-z0-9])")
+RE_KIDS = re.compile(rb"/Kids\s*(?:\[([^\]]*)\]|(\d+)\s+\d+\s+R)")
+RE_CONTENTS = re.compile(rb"/Contents\s*(?:\[([^\]]*)\]|(\d+)\s+\d+\s+R)")
+RE_W = re.compile(rb"/W\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]")
+RE_INDEX = re.compile(rb"/Index\s*\[([\d\s]*)\]")
+
+
+class PdfStructureError(Exception):
+    """Raised when the xref table/trailer cannot be used to locate objects."""
+
+
+def _int_entry(key: bytes, dict_bytes: bytes) -> Optional[int]:
+    match = RE_INT_ENTRY[key].search(dict_bytes)
+    return int(match.group(1)) if match else None
+
+
+def _png_unpredict(data: bytes, columns: int, colors: int, bits: int) -> bytes:
+    bpp = max(1, colors * bits // 8)
+    row_len = max(1, columns * colors * bits // 8)
+    out = bytearray()
+    prev = bytearray(row_len)
+
+    for start in range(0, len(data), row_len + 1):
+        kind = data[start]
+        row = bytearray(data[start + 1 : start + 1 + row_len])
+        for i in range(len(row)):
+            left = row[i - bpp] if i >= bpp else 0
+            up = prev[i] if i < len(prev) else 0
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + ((left + up) >> 1)) & 0xFF
+            elif kind == 4:
+                up_left = prev[i - bpp] if i >= bpp else 0
+                p = left + up - up_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+                pred = left if pa <= pb and pa <= pc else (up if pb <= pc else up_left)
+                row[i] = (row[i] + pred) & 0xFF
+        out += row
+        prev = row
+
+    return bytes(out)
+
+
+def decode_stream(raw: bytes | memoryview, dict_bytes: bytes) -> Optional[bytes]:
+    """Applies the stream filter (FlateDecode + PNG predictors); None on failure."""
+    if b"/FlateDecode" not in dict_bytes:
+        return bytes(raw)
+
+    try:
+        content = zlib.decompress(raw)
+    except zlib.error:
+        return None
+
+    predictor = _int_entry(b"Predictor", dict_bytes) or 1
+    if predictor >= 10:
+        content = _png_unpredict(
+            content,
+            _int_entry(b"Columns", dict_bytes) or 1,
+            _int_entry(b"Colors", dict_bytes) or 1,
+            _int_entry(b"BitsPerComponent", dict_bytes) or 8,
+        )
+    return content
+
+
+class XrefPdfReader:
+    """Locates PDF objects through the xref table/streams instead of a full scan.
+
+    Object bodies are returned as ``memoryview`` slices of the original
+    buffer, so nothing is copied until a stream is actually inflated. Only
+    the page tree and the page ``/Contents`` streams are resolved. Entries
+    whose xref offset is wrong fall back to a one-off scan of object headers.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.view = memoryview(data)
+        self.offsets: Dict[int, int] = {}
+        self.compressed: Dict[int, Tuple[int, int]] = {}
+        self.trailer = b""
+        self._object_streams: Dict[int, Tuple[memoryview, Dict[int, Tuple[int, int]]]] = {}
+        self._scanned: Optional[Dict[int, int]] = None
+        self._load_xref()
+
+    # -- xref -----------------------------------------------------------------
+
+    def _load_xref(self) -> None:
+        pos = self.data.rfind(b"startxref")
+        match = RE_STARTXREF.match(self.data, pos) if pos >= 0 else None
+        if not match:
+            raise PdfStructureError("startxref not found")
+
+        pending = [int(match.group(1))]
+        seen: Set[int] = set()
+        while pending:
+            offset = pending.pop(0)
+            if offset in seen or offset >= len(self.data):
+                continue
+            seen.add(offset)
+
+            if self.data.startswith(b"xref", offset):
+                trailer = self._read_xref_table(offset + 4)
+            else:
+                trailer = self._read_xref_stream(offset)
+
+            if not self.trailer:
+                self.trailer = trailer
+
+            # Hybrid files: the /XRefStm section takes precedence over /Prev.
+            for key in (b"XRefStm", b"Prev"):
+                value = _int_entry(key, trailer)
+                if value is not None:
+                    pending.append(value)
+
+        if not self.trailer or not (self.offsets or self.compressed):
+            raise PdfStructureError("empty xref")
+
+    def _register(self, num: int, offset: Optional[int] = None, packed: Optional[Tuple[int, int]] = None) -> None:
+        # Sections are read newest first, so the first entry seen for an object wins.
+        if num in self.offsets or num in self.compressed:
+            return
+        if packed is not None:
+            self.compressed[num] = packed
+        else:
+            self.offsets[num] = offset
+
+    def _read_xref_table(self, pos: int) -> bytes:
+        data = self.data
+        while True:
+            header = RE_XREF_SUBSECTION.match(data, pos)
+            if not header:
+                break
+            first, count = int(header.group(1)), int(header.group(2))
+            pos = header.end()
+            for num in range(first, first + count):
+                entry = RE_XREF_ENTRY.match(data, pos)
+                if not entry:
+                    raise PdfStructureError(f"bad xref entry for object {num}")
+                pos = entry.end()
+                if entry.group(3) == b"n":
+                    self._register(num, offset=int(entry.group(1)))
+
+        start = data.find(b"trailer", pos)
+        if start < 0:
+            raise PdfStructureError("trailer not found")
+        end = data.find(b"startxref", start)
+        return data[start : end if end >= 0 else len(data)]
+
+    def _read_xref_stream(self, offset: int) -> bytes:
+        header = RE_OBJ_HEADER.match(self.data, offset)
+        if not header:
+            raise PdfStructureError(f"xref stream expected at {offset}")
+
+        body = self._body_at(offset, int(header.group(1)))
+        if body is None:
+            raise PdfStructureError(f"unreadable xref stream at {offset}")
+
+        dict_bytes = self._dict_part(body)
+        widths = RE_W.search(dict_bytes)
+        content = self.stream_data(body)
+        if not widths or content is None:
+            raise PdfStructureError(f"invalid xref stream at {offset}")
+
+        w1, w2, w3 = (int(value) for value in widths.groups())
+        row = w1 + w2 + w3
+        index = RE_INDEX.search(dict_bytes)
+        if index:
+            numbers = [int(value) for value in index.group(1).split()]
+        else:
+            numbers = [0, _int_entry(b"Size", dict_bytes) or 0]
+
+        pos = 0
+        for first, count in zip(numbers[::2], numbers[1::2]):
+            for num in range(first, first + count):
+                if pos + row > len(content):
+                    break
+                kind = int.from_bytes(content[pos : pos + w1], "big") if w1 else 1
+                field2 = int.from_bytes(content[pos + w1 : pos + w1 + w2], "big")
+                field3 = int.from_bytes(content[pos + w1 + w2 : pos + row], "big")
+                pos += row
+                if kind == 1:
+                    self._register(num, offset=field2)
+                elif kind == 2:
+                    self._register(num, packed=(field2, field3))
+
+        return dict_bytes
+
+    # -- objects --------------------------------------------------------------
+
+    def _body_at(self, offset: int, num: int) -> Optional[memoryview]:
+        header = RE_OBJ_HEADER.match(self.data, offset)
+        if not header or int(header.group(1)) != num:
+            return None
+
+        start = header.end()
+        end = self.data.find(b"endobj", start)
+        if end < 0:
+            return None
+
+        keyword = RE_STREAM_KEYWORD.search(self.data, start, end)
+        if keyword:
+            length = self._stream_length(self.data[start : keyword.start()])
+            if length is not None:
+                end = self.data.find(b"endobj", keyword.end() + length)
+                if end < 0:
+                    return None
+
+        return self.view[start:end]
+
+    def _scan_offsets(self) -> Dict[int, int]:
+        if self._scanned is None:
+            self._scanned = {int(m.group(1)): m.start() for m in RE_ANY_OBJ_HEADER.finditer(self.data)}
+        return self._scanned
+
+    def _from_object_stream(self, num: int) -> Optional[memoryview]:
+        stream_num, _ = self.compressed[num]
+        if stream_num not in self._object_streams:
+            body = self.get(stream_num)
+            content = self.stream_data(body) if body is not None else None
+            if content is None:
+                return None
+            dict_bytes = self._dict_part(body)
+            first = _int_entry(b"First", dict_bytes) or 0
+            count = _int_entry(b"N", dict_bytes) or 0
+            pairs = [int(value) for value in content[:first].split()[: count * 2]]
+            starts = sorted((pairs[i + 1], pairs[i]) for i in range(0, len(pairs), 2))
+            spans: Dict[int, Tuple[int, int]] = {}
+            for idx, (rel, obj) in enumerate(starts):
+                end = starts[idx + 1][0] if idx + 1 < len(starts) else len(content) - first
+                spans[obj] = (first + rel, first + end)
+            self._object_streams[stream_num] = (memoryview(content), spans)
+
+        view, spans = self._object_streams[stream_num]
+        span = spans.get(num)
+        return view[span[0] : span[1]] if span else None
+
+    def get(self, num: int) -> Optional[memoryview]:
+        """Body of object ``num`` (between ``obj`` and ``endobj``)."""
+        if num in self.compressed:
+            return self._from_object_stream(num)
+
+        offset = self.offsets.get(num)
+        body = self._body_at(offset, num) if offset is not None else None
+        if body is None:
+            scanned = self._scan_offsets().get(num)
+            if scanned is not None and scanned != offset:
+                body = self._body_at(scanned, num)
+        return body
+
+    # -- streams --------------------------------------------------------------
+
+    @staticmethod
+    def _dict_part(body: memoryview) -> bytes:
+        keyword = RE_STREAM_KEYWORD.search(body)
+        return bytes(body[: keyword.start()] if keyword else body)
+
+    def _stream_length(self, dict_bytes: bytes) -> Optional[int]:
+        match = RE_LENGTH.search(dict_bytes)
+        if not match:
+            return None
+        if not match.group(2):
+            return int(match.group(1))
+
+        ref_offset = self.offsets.get(int(match.group(1)))
+        if ref_offset is None:
+            return None
+        header = RE_OBJ_HEADER.match(self.data, ref_offset)
+        value = re.match(rb"\s*(\d+)", self.data[header.end() : header.end() + 32]) if header else None
+        return int(value.group(1)) if value else None
+
+    def raw_stream(self, body: memoryview) -> Optional[Tuple[memoryview, bytes]]:
+        """Still-encoded stream data of an object body and its dictionary."""
+        keyword = RE_STREAM_KEYWORD.search(body)
+        if not keyword:
+            return None
+
+        dict_bytes = bytes(body[: keyword.start()])
+        length = self._stream_length(dict_bytes)
+        if length is not None and keyword.end() + length <= len(body):
+            return body[keyword.end() : keyword.end() + length], dict_bytes
+
+        end = bytes(body).rfind(b"endstream")
+        if end < 0:
+            return None
+        return body[keyword.end() : end], dict_bytes
+
+    def stream_data(self, body: memoryview) -> Optional[bytes]:
+        """Decoded stream of an object body, or None when it cannot be decoded."""
+        raw = self.raw_stream(body)
+        return decode_stream(*raw) if raw else None
+
+    # -- pages ----------------------------------------------------------------
+
+    def _refs(self, array_match: Optional[bytes], ref_num: Optional[bytes]) -> List[int]:
+        if array_match is not None:
+            return [int(num) for num in RE_REF.findall(array_match)]
+        if ref_num is None:
+            return []
+
+        body = self.get(int(ref_num))
+        if body is None:
+            return []
+        text = bytes(body).lstrip()
+        if text.startswith(b"["):
+            return [int(num) for num in RE_REF.findall(text)]
+        return [int(ref_num)]
+
+    def page_objects(self) -> List[int]:
+        """Page object numbers in document order, walking /Root → /Pages → /Kids."""
+        root = RE_ROOT.search(self.trailer)
+        catalog = self.get(int(root.group(1))) if root else None
+        pages_ref = RE_PAGES_REF.search(bytes(catalog)) if catalog is not None else None
+        if not pages_ref:
+            raise PdfStructureError("page tree not found")
+
+        pages: List[int] = []
+        stack = [int(pages_ref.group(1))]
+        visited: Set[int] = set()
+        while stack:
+            num = stack.pop()
+            if num in visited:
+                continue
+            visited.add(num)
+
+            body = self.get(num)
+            if body is None:
+                continue
+            node = self._dict_part(body)
+            kind = RE_TYPE.search(node)
+            kids = RE_KIDS.search(node)
+            if kind and kind.group(1) == b"Page":
+                pages.append(num)
+            elif kids:
+                stack.extend(reversed(self._refs(kids.group(1), kids.group(2))))
+
+        return pages
+
+    def page_encoded_contents(self) -> List[List[Tuple[bytes, bytes]]]:
+        """Per page, the ``(encoded stream, dictionary)`` of each /Contents part.
+
+        Decoding is left to the caller (see :func:`decode_page`) so that it
+        can run in worker processes.
+        """
+        result: List[List[Tuple[bytes, bytes]]] = []
+        for page in self.page_objects():
+            node = self._dict_part(self.get(page))
+            contents = RE_CONTENTS.search(node)
+            if not contents:
+                continue
+
+            parts = []
+            for ref in self._refs(contents.group(1), contents.group(2)):
+                body = self.get(ref)
+                raw = self.raw_stream(body) if body is not None else None
+                if raw:
+                    parts.append((bytes(raw[0]), raw[1]))
+            if parts:
+                result.append(parts)
+
+        return result
+
+    def page_contents(self) -> List[bytes]:
+        """Decoded content of each page; multi-stream ``/Contents`` are joined."""
+        pages = (decode_page(parts) for parts in self.page_encoded_contents())
+        return [content for content in pages if content]
+
+
+def decode_page(parts: List[Tuple[bytes, bytes]]) -> bytes:
+    """Decodes and joins the /Contents parts of one page (b"" if none decode)."""
+    decoded = [decode_stream(raw, dict_bytes) for raw, dict_bytes in parts]
+    return b"\n".join(stream for stream in decoded if stream)
@@ -1,10 +1,23 @@
+import sys
+from pathlib import Path
+
+# O código comum aos extratores fica em Hub_Painel/hansu_comum.
+_HUB_PAINEL = str(Path(__file__).resolve().parents[2])
+if _HUB_PAINEL not in sys.path:
+    sys.path.append(_HUB_PAINEL)
+
 from .extractor import extrair_dados, salvar_em_excel, valor_str_para_float
 from .license_guard import LicenseRecord, LicenseValidationError, validate_license_file
+from .processamento_lote import LinhaDarf, consolidar_pasta, iterar_linhas_darf, salvar_consolidado
 
 __all__ = [
     "extrair_dados",
     "salvar_em_excel",
     "valor_str_para_float",
+    "LinhaDarf",
+    "consolidar_pasta",
+    "iterar_linhas_darf",
+    "salvar_consolidado",
     "LicenseRecord",
     "LicenseValidationError",
     "validate_license_file",
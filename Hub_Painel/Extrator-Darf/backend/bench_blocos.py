@@ -0,0 +1,247 @@
+"""Verificação de saída e benchmark da varredura de páginas de DARF.
+
+A implementação anterior, com o laço de lookahead aninhado, fica aqui como
+referência: ``extrair_linhas_pagina`` e ``extrair_info_empresa`` precisam
+gerar as mesmas linhas e os mesmos dados da empresa em páginas sintéticas
+(incluindo os blocos difíceis: código sem valores suficientes, linha de
+valor entre o código e a descrição, descrição iniciando com quatro dígitos,
+datas fora do bloco "Período Apuração") e em todas as páginas dos PDFs
+passados em ``--pdf``, em cada modo de texto.
+
+Os modos de texto também são comparados entre si: ``extrair_paginas`` no
+modo do lote (``MODO_TEXTO_LOTE``) precisa dar o mesmo resultado que no
+modo padrão, num PDF gerado com espaços repetidos na Razão Social e na
+Descrição e nos PDFs de ``--pdf``. Os demais modos só são informados.
+
+Uso: python -m backend.bench_blocos [--pages 20000] [--trials 2000] [--pdf a.pdf ...]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import fitz  # PyMuPDF
+
+from .extractor import (
+    MODO_TEXTO_PADRAO,
+    MODOS_TEXTO,
+    blocos_da_pagina,
+    extrair_info_empresa,
+    extrair_linhas_pagina,
+    extrair_paginas,
+)
+from .processamento_lote import MODO_TEXTO_LOTE
+
+
+def _legado(blocos: List[str], info: Dict[str, str], codigo_alvo: str = "") -> List[list]:
+    """Corpo anterior de ``extrair_dados`` para uma página, mantido sem alterações."""
+    dados = []
+    texto_pagina = "\n".join(blocos)
+
+    # Extrair CNPJ e Razao Social uma vez só
+    if "CNPJ" not in info:
+        m = re.search(r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}", texto_pagina)
+        if m:
+            info["CNPJ"] = m.group()
+            linha_cnpj = next((l for l in blocos if info["CNPJ"] in l), "")
+            info["Razao Social"] = linha_cnpj.split(info["CNPJ"])[-1].strip()
+
+    # Extrair data de apuração da página a partir do bloco que contenha "Período Apuração"
+    data_apuracao_pagina = ""
+    for b in blocos:
+        if "Período Apuração" in b:
+            m = re.search(r"(\d{2}/\d{2}/\d{4})", b)
+            if m:
+                data_apuracao_pagina = m.group(1)
+                break
+
+    # Fallback: primeira data da página, se não encontrou data de apuração específica
+    if not data_apuracao_pagina:
+        m = re.search(r"\b(\d{2}/\d{2}/\d{4})\b", texto_pagina)
+        if m:
+            data_apuracao_pagina = m.group(1)
+
+    i = 0
+    while i < len(blocos):
+        bloco = blocos[i]
+
+        m_codigo = re.match(r"(\d{4})\s", bloco)
+        if not m_codigo:
+            i += 1
+            continue
+
+        codigo = m_codigo.group(1)
+        if codigo_alvo and codigo != codigo_alvo:
+            i += 1
+            continue
+
+        valores = re.findall(r"\d{1,3}(?:\.\d{3})*,\d{2}|-", bloco)
+        if len(valores) < 4:
+            i += 1
+            continue
+
+        descricao_final = None
+        j = i + 1
+        while j < len(blocos):
+            prox = blocos[j]
+            if re.match(r"\d{4}\s", prox) or re.search(
+                r"\d{1,3}(?:\.\d{3})*,\d{2}", prox
+            ):
+                break
+            if re.match(r"\d+\s*-\s*", prox):
+                descricao_final = prox.strip()
+                break
+            j += 1
+
+        if not descricao_final:
+            i = j
+            continue
+
+        linha = [
+            data_apuracao_pagina,
+            codigo,
+            descricao_final,
+            valores[-4],  # Principal
+            valores[-3],  # Multa
+            valores[-2],  # Juros
+            valores[-1],  # Total
+        ]
+
+        dados.append(linha)
+        i = j
+
+    return dados
+
+
+def _atual(blocos: List[str], info: Dict[str, str], codigo_alvo: str = "") -> List[list]:
+    extrair_info_empresa(blocos, info)
+    return extrair_linhas_pagina(blocos, codigo_alvo)
+
+
+def _valor(rng: random.Random) -> str:
+    if rng.random() < 0.15:
+        return "-"
+    inteiro = rng.randrange(0, 2_000_000)
+    return f"{inteiro:,}".replace(",", ".") + f",{rng.randrange(100):02d}"
+
+
+def pagina_sintetica(rng: random.Random) -> List[str]:
+    """Blocos de uma página de DARF, com variações que exercitam a varredura."""
+    blocos: List[str] = []
+    if rng.random() < 0.3:
+        blocos.append(f"CNPJ {rng.randrange(100):02d}.345.678/0001-{rng.randrange(100):02d} EMPRESA {rng.randrange(99)} LTDA")
+    if rng.random() < 0.2:
+        blocos.append(f"Emitido em {rng.randrange(1, 29):02d}/0{rng.randrange(1, 10)}/2024 10:00")
+    if rng.random() < 0.7:
+        blocos.append(f"Período Apuração {rng.randrange(1, 29):02d}/{rng.randrange(1, 13):02d}/2023")
+    elif rng.random() < 0.3:
+        blocos.append("Período Apuração a definir")
+
+    for _ in range(rng.randrange(0, 12)):
+        codigo = rng.choice(["0561", "1708", "2172", "5952", "8109"])
+        quantos = rng.choice([2, 3, 4, 4, 4, 5])
+        blocos.append(f"{codigo} " + " ".join(_valor(rng) for _ in range(quantos)))
+        for _ in range(rng.randrange(0, 3)):
+            blocos.append(rng.choice([
+                "Receita Federal",
+                "Observações",
+                f"Total {_valor(rng)}",
+                "12/05/2023",
+                f"{rng.choice(['0561', '9999'])} sem valores",
+                "Pagamento -",
+            ]))
+        if rng.random() < 0.85:
+            blocos.append(rng.choice([
+                f"{rng.randrange(1, 99)} - DESCRIÇÃO {rng.randrange(999)}  ",
+                f"{rng.randrange(1, 9)}-IRPJ",
+                f"{rng.randrange(1000, 9999)} - COM QUATRO DÍGITOS",
+                f"{rng.randrange(1, 99)}  -  CSLL {_valor(rng)}",
+            ]))
+    return blocos
+
+
+def _comparar(blocos: List[str], codigo_alvo: str, onde: str) -> None:
+    info_legado: Dict[str, str] = {}
+    info_atual: Dict[str, str] = {}
+    if _legado(blocos, info_legado, codigo_alvo) != _atual(blocos, info_atual, codigo_alvo) or info_legado != info_atual:
+        raise SystemExit(f"divergência em {onde}")
+
+
+def pdf_espacos_repetidos(caminho: Path) -> Path:
+    """DARF de uma página com espaços repetidos e valores em dois spans na mesma linha."""
+    with fitz.open() as doc:
+        pag = doc.new_page()
+        pag.insert_text((50, 50), "CNPJ 12.345.678/0001-90 ACME  COMÉRCIO   LTDA")
+        pag.insert_text((50, 80), "Período Apuração 31/01/2024")
+        pag.insert_text((50, 120), "0561 1.234,56 0,00 0,00 1.234,56")
+        pag.insert_text((50, 140), "12 - IRRF  SOBRE   TRABALHO")
+        escrita = fitz.TextWriter(pag.rect)
+        escrita.append((50, 200), "1708 10,00 ", fontsize=11)
+        escrita.append(escrita.last_point, "0,00 0,00 10,00", font=fitz.Font("cour"), fontsize=11)
+        escrita.write_text(pag)
+        pag.insert_text((50, 220), "3 - PIS")
+        doc.save(caminho)
+    return caminho
+
+
+def comparar_modos(caminho: Path) -> None:
+    """``extrair_paginas`` em cada modo contra o modo padrão; o modo do lote precisa coincidir."""
+    referencia = extrair_paginas(caminho, modo_texto=MODO_TEXTO_PADRAO)
+    for modo in MODOS_TEXTO:
+        igual = extrair_paginas(caminho, modo_texto=modo) == referencia
+        if modo == MODO_TEXTO_LOTE and not igual:
+            raise SystemExit(f"divergência em {caminho.name}: modo do lote ({modo}) difere de {MODO_TEXTO_PADRAO}")
+        print(f"modos:  {caminho.name} {modo}: {'igual ao' if igual else 'difere do'} {MODO_TEXTO_PADRAO}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=20_000)
+    parser.add_argument("--trials", type=int, default=2000)
+    parser.add_argument("--pdf", type=Path, nargs="*", default=[])
+    args = parser.parse_args()
+
+    rng = random.Random(2024)
+    for trial in range(args.trials):
+        pagina = pagina_sintetica(rng)
+        for codigo_alvo in ("", "0561"):
+            _comparar(pagina, codigo_alvo, f"página sintética {trial}")
+    print(f"golden: {args.trials} páginas sintéticas idênticas")
+
+    for caminho in args.pdf:
+        with fitz.open(caminho) as doc:
+            for modo in MODOS_TEXTO:
+                for numero, pag in enumerate(doc, start=1):
+                    _comparar(blocos_da_pagina(pag, modo), "", f"{caminho.name} p. {numero} ({modo})")
+            print(f"golden: {caminho.name} idêntico ({doc.page_count} páginas, modos {', '.join(MODOS_TEXTO)})")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        comparar_modos(pdf_espacos_repetidos(Path(pasta) / "espacos_repetidos.pdf"))
+    for caminho in args.pdf:
+        comparar_modos(caminho)
+
+    paginas = [pagina_sintetica(rng) for _ in range(args.pages)]
+    blocos_total = sum(len(p) for p in paginas)
+
+    inicio = time.perf_counter()
+    for pagina in paginas:
+        _legado(pagina, {})
+    t_legado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for pagina in paginas:
+        _atual(pagina, {})
+    t_atual = time.perf_counter() - inicio
+
+    print(f"blocos:     {blocos_total:,} em {len(paginas):,} páginas")
+    print(f"legado:     {blocos_total / t_legado:12,.0f} blocos/s")
+    print(f"passada:    {blocos_total / t_atual:12,.0f} blocos/s  ({t_legado / t_atual:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
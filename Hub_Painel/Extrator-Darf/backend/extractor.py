@@ -2,9 +2,51 @@ import re
 from datetime import datetime
 
 import fitz  # PyMuPDF
-from openpyxl import Workbook
 from openpyxl.styles import numbers
 
+from hansu_comum.cache_extracao import em_cache
+from hansu_comum.exportadores import Tabela, exportar
+
+# Incrementar quando a extração mudar, para invalidar resultados em cache.
+VERSAO_EXTRATOR = "1"
+
+MODOS_TEXTO = ("dict", "words", "blocks")
+MODO_TEXTO_PADRAO = "dict"
+
+RE_CNPJ = re.compile(r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}")
+RE_DATA = re.compile(r"(\d{2}/\d{2}/\d{4})")
+RE_DATA_ISOLADA = re.compile(r"\b(\d{2}/\d{2}/\d{4})\b")
+RE_CODIGO = re.compile(r"(\d{4})\s")
+RE_VALOR = re.compile(r"\d{1,3}(?:\.\d{3})*,\d{2}")
+RE_VALOR_OU_TRACO = re.compile(r"\d{1,3}(?:\.\d{3})*,\d{2}|-")
+RE_DESCRICAO = re.compile(r"\d+\s*-\s*")
+
+# Planilha de saída
+CABECALHO_TABELA = [
+    "Período Apuração",
+    "Código",
+    "Descrição",
+    "Principal",
+    "Multas",
+    "Juros",
+    "Total",
+]
+FORMATO_DATA = "DD/MM/YYYY"
+FORMATO_VALOR = numbers.FORMAT_NUMBER_00  # 2 casas decimais
+FORMATOS_TABELA = {
+    "Período Apuração": FORMATO_DATA,
+    "Principal": FORMATO_VALOR,
+    "Multas": FORMATO_VALOR,
+    "Juros": FORMATO_VALOR,
+    "Total": FORMATO_VALOR,
+}
+
+# Tipos de bloco em extrair_linhas_pagina
+BLOCO_CODIGO = "codigo"
+BLOCO_VALOR = "valor"
+BLOCO_DESCRICAO = "descricao"
+BLOCO_OUTRO = "outro"
+
 
 def valor_str_para_float(valor_str):
     """Converte string tipo '1.234,56' ou '-' para float (ex: 1234.56)."""
@@ -17,13 +59,17 @@ def valor_str_para_float(valor_str):
         return 0.0
 
 
-def extrair_dados(caminho_pdf, codigo_alvo=""):
-    doc = fitz.open(caminho_pdf)
-    info = {}
-    dados = []
+def blocos_da_pagina(pag, modo_texto=MODO_TEXTO_PADRAO):
+    """Texto de cada bloco da página, com os trechos unidos por espaço.
 
-    for pag in doc:
-        blocos = [
+    ``"dict"`` monta o texto a partir dos spans, como sempre foi feito.
+    ``"words"`` e ``"blocks"`` são modos mais baratos do PyMuPDF: não
+    geram fontes, cores e caixas de cada span. ``"words"`` separa as
+    palavras por um único espaço; ``"blocks"`` junta as linhas do bloco
+    com espaço.
+    """
+    if modo_texto == "dict":
+        return [
             " ".join(
                 span["text"] for linha in b["lines"] for span in linha["spans"]
             )
@@ -31,126 +77,154 @@ def extrair_dados(caminho_pdf, codigo_alvo=""):
             if "lines" in b
         ]
 
-        texto_pagina = "\n".join(blocos)
-
-        # Extrair CNPJ e Razao Social uma vez só
-        if "CNPJ" not in info:
-            m = re.search(r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}", texto_pagina)
-            if m:
-                info["CNPJ"] = m.group()
-                linha_cnpj = next((l for l in blocos if info["CNPJ"] in l), "")
-                info["Razao Social"] = linha_cnpj.split(info["CNPJ"])[-1].strip()
-
-        # Extrair data de apuração da página a partir do bloco que contenha "Período Apuração"
-        data_apuracao_pagina = ""
-        for b in blocos:
-            if "Período Apuração" in b:
-                m = re.search(r"(\d{2}/\d{2}/\d{4})", b)
+    if modo_texto == "words":
+        palavras_por_bloco = {}
+        for *_caixa, palavra, num_bloco, _linha, _palavra in pag.get_text("words"):
+            palavras_por_bloco.setdefault(num_bloco, []).append(palavra)
+        return [" ".join(palavras) for palavras in palavras_por_bloco.values()]
+
+    if modo_texto == "blocks":
+        return [
+            " ".join(texto.splitlines())
+            for *_caixa, texto, _num_bloco, tipo in pag.get_text("blocks")
+            if tipo == 0
+        ]
+
+    raise ValueError(f"Modo de texto inválido: {modo_texto}. Use um de {MODOS_TEXTO}.")
+
+
+def extrair_info_empresa(blocos, info):
+    """Preenche CNPJ e Razão Social em ``info`` se ainda não encontrados."""
+    if "CNPJ" in info:
+        return
+
+    for bloco in blocos:
+        m = RE_CNPJ.search(bloco)
+        if m:
+            info["CNPJ"] = m.group()
+            info["Razao Social"] = bloco.split(info["CNPJ"])[-1].strip()
+            return
+
+
+def classificar_bloco(bloco):
+    """Classifica o bloco uma única vez: ``(tipo, código)``.
+
+    A ordem dos testes segue a varredura original: código antes de valor,
+    valor antes de descrição.
+    """
+    m = RE_CODIGO.match(bloco)
+    if m:
+        return BLOCO_CODIGO, m.group(1)
+    if RE_VALOR.search(bloco):
+        return BLOCO_VALOR, None
+    if RE_DESCRICAO.match(bloco):
+        return BLOCO_DESCRICAO, None
+    return BLOCO_OUTRO, None
+
+
+def extrair_linhas_pagina(blocos, codigo_alvo=""):
+    """Linhas [período, código, descrição, principal, multa, juros, total] de uma página.
+
+    Uma passada pelos blocos: uma linha de código com ao menos quatro
+    valores fica pendente até a próxima descrição (``"N - ..."``). Outra
+    linha de código ou de valor antes dela cancela a pendente e passa a ser
+    avaliada; blocos de outro tipo no meio são ignorados.
+    """
+    dados = []
+    pendente = None
+    data_periodo = ""
+    primeira_data = ""
+
+    for bloco in blocos:
+        # Data de apuração: bloco com "Período Apuração"; senão, a primeira data da página.
+        if not data_periodo and "/" in bloco:
+            if "Período Apuração" in bloco:
+                m = RE_DATA.search(bloco)
                 if m:
-                    data_apuracao_pagina = m.group(1)
-                    break
-
-        # Fallback: primeira data da página, se não encontrou data de apuração específica
-        if not data_apuracao_pagina:
-            m = re.search(r"\b(\d{2}/\d{2}/\d{4})\b", texto_pagina)
-            if m:
-                data_apuracao_pagina = m.group(1)
-
-        i = 0
-        while i < len(blocos):
-            bloco = blocos[i]
-
-            m_codigo = re.match(r"(\d{4})\s", bloco)
-            if not m_codigo:
-                i += 1
-                continue
+                    data_periodo = m.group(1)
+            if not primeira_data:
+                m = RE_DATA_ISOLADA.search(bloco)
+                if m:
+                    primeira_data = m.group(1)
 
-            codigo = m_codigo.group(1)
-            if codigo_alvo and codigo != codigo_alvo:
-                i += 1
-                continue
+        tipo, codigo = classificar_bloco(bloco)
 
-            valores = re.findall(r"\d{1,3}(?:\.\d{3})*,\d{2}|-", bloco)
-            if len(valores) < 4:
-                i += 1
+        if pendente is not None:
+            if tipo == BLOCO_DESCRICAO:
+                codigo_pendente, valores = pendente
+                dados.append(["", codigo_pendente, bloco.strip(), *valores[-4:]])
+                pendente = None
                 continue
-
-            descricao_final = None
-            j = i + 1
-            while j < len(blocos):
-                prox = blocos[j]
-                if re.match(r"\d{4}\s", prox) or re.search(
-                    r"\d{1,3}(?:\.\d{3})*,\d{2}", prox
-                ):
-                    break
-                if re.match(r"\d+\s*-\s*", prox):
-                    descricao_final = prox.strip()
-                    break
-                j += 1
-
-            if not descricao_final:
-                i = j
+            if tipo == BLOCO_OUTRO:
                 continue
+            pendente = None
+
+        if tipo != BLOCO_CODIGO or (codigo_alvo and codigo != codigo_alvo):
+            continue
+
+        valores = RE_VALOR_OU_TRACO.findall(bloco)
+        if len(valores) >= 4:
+            pendente = (codigo, valores)
 
-            linha = [
-                data_apuracao_pagina,
-                codigo,
-                descricao_final,
-                valores[-4],  # Principal
-                valores[-3],  # Multa
-                valores[-2],  # Juros
-                valores[-1],  # Total
-            ]
+    data_apuracao_pagina = data_periodo or primeira_data
+    for linha in dados:
+        linha[0] = data_apuracao_pagina
+    return dados
 
-            dados.append(linha)
-            i = j
 
-    doc.close()
+def extrair_paginas(caminho_pdf, inicio=0, fim=None, codigo_alvo="", modo_texto=MODO_TEXTO_PADRAO):
+    """Extrai as páginas ``inicio:fim`` de um PDF; retorna ``(info, linhas)``.
+
+    ``info`` vem da primeira página do trecho que tiver um CNPJ, então
+    trechos consecutivos combinados em ordem dão o mesmo resultado que o
+    documento inteiro.
+    """
+    info = {}
+    dados = []
+    with fitz.open(caminho_pdf) as doc:
+        for pag in doc.pages(inicio, fim):
+            blocos = blocos_da_pagina(pag, modo_texto)
+            extrair_info_empresa(blocos, info)
+            dados.extend(extrair_linhas_pagina(blocos, codigo_alvo))
     return info, dados
 
 
-def salvar_em_excel(info, linhas, nome_arquivo="resultado.xlsx"):
-    wb = Workbook()
-    ws = wb.active
-
-    # Cabeçalho empresa
-    ws["A1"] = "EMPRESA"
-    ws["A2"] = info.get("CNPJ", "")
-    ws["A3"] = info.get("Razao Social", "")
-
-    # Cabeçalho da tabela em B4
-    headers = [
-        "Período Apuração",
-        "Código",
-        "Descrição",
-        "Principal",
-        "Multas",
-        "Juros",
-        "Total",
-    ]
-    for col, h in enumerate(headers, start=2):
-        ws.cell(row=4, column=col, value=h)
-
-    for i, linha in enumerate(linhas, start=5):
-        for j, item in enumerate(linha, start=2):
-            cell = ws.cell(row=i, column=j)
-
-            # Coluna 2 = Período Apuração  ➜  converte p/ data
-            if j == 2 and item:
-                try:
-                    cell.value = datetime.strptime(item, "%d/%m/%Y").date()
-                    cell.number_format = "DD/MM/YYYY"
-                except ValueError:
-                    cell.value = item
-
-            # Colunas 5 a 8 (Principal, Multas, Juros, Total) ➜ converter para float
-            elif j in [5, 6, 7, 8]:
-                fval = valor_str_para_float(item)
-                cell.value = fval
-                cell.number_format = numbers.FORMAT_NUMBER_00  # 2 casas decimais
-
-            else:
-                cell.value = item
-
-    wb.save(nome_arquivo)
-    return nome_arquivo
+@em_cache("darf.extrair_dados", VERSAO_EXTRATOR)
+def extrair_dados(caminho_pdf, codigo_alvo="", modo_texto=MODO_TEXTO_PADRAO):
+    return extrair_paginas(caminho_pdf, codigo_alvo=codigo_alvo, modo_texto=modo_texto)
+
+
+def converter_linha_darf(linha):
+    """Valores tipados de uma linha [Período, Código, Descrição, Principal, Multa, Juros, Total].
+
+    Período vira ``date`` quando está no formato DD/MM/AAAA; os quatro
+    valores viram float.
+    """
+    periodo, codigo, descricao, *valores = linha
+    if periodo:
+        try:
+            periodo = datetime.strptime(periodo, "%d/%m/%Y").date()
+        except ValueError:
+            pass
+    return [periodo, codigo, descricao, *(valor_str_para_float(valor) for valor in valores)]
+
+
+def salvar_em_excel(info, linhas, nome_arquivo="resultado.xlsx", formato=None):
+    """Grava as linhas do DARF em ``nome_arquivo``; retorna o caminho gravado.
+
+    No xlsx, empresa em A1:A3 e tabela a partir de B4. ``formato`` (xlsx,
+    csv, jsonl ou parquet) vem da extensão quando omitido; no jsonl e no
+    parquet, CNPJ e Razão Social vão como colunas de cada registro. As
+    linhas são convertidas e gravadas uma a uma, então ``linhas`` pode ser
+    um gerador.
+    """
+    tabela = Tabela(
+        nome="Sheet",
+        colunas=CABECALHO_TABELA,
+        linhas=(converter_linha_darf(linha) for linha in linhas),
+        cabecalho=[["EMPRESA"], [info.get("CNPJ", "")], [info.get("Razao Social", "")]],
+        coluna_inicial=1,
+        formatos=FORMATOS_TABELA,
+        contexto={"CNPJ": info.get("CNPJ", ""), "Razão Social": info.get("Razao Social", "")},
+    )
+    return str(exportar([tabela], nome_arquivo, formato)[0])
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+from hansu_comum.exportadores import Tabela, exportar
+
+from .extractor import FORMATOS_TABELA, converter_linha_darf, extrair_paginas
+
+__all__ = [
+    "CABECALHO_CONSOLIDADO",
+    "LinhaDarf",
+    "consolidar_pasta",
+    "iterar_linhas_darf",
+    "listar_pdfs",
+    "salvar_consolidado",
+]
+
+# Modo de texto do lote: "blocks" evita montar o dicionário de spans e,
+# ao contrário de "words", preserva os espaços da Razão Social e da
+# Descrição, então o lote sai igual a extrair_dados (ver bench_blocos).
+MODO_TEXTO_LOTE = "blocks"
+# PDFs maiores que isso são divididos em trechos de páginas entre os workers.
+PAGINAS_POR_TAREFA = 40
+
+CABECALHO_CONSOLIDADO = [
+    "Arquivo",
+    "CNPJ",
+    "Razão Social",
+    "Período Apuração",
+    "Código",
+    "Descrição",
+    "Principal",
+    "Multas",
+    "Juros",
+    "Total",
+]
+
+Falha = Callable[[str, str], None]
+
+
+@dataclass(frozen=True)
+class LinhaDarf:
+    """Uma linha de DARF com o arquivo de origem e os dados da empresa."""
+
+    arquivo: str
+    cnpj: str
+    razao_social: str
+    periodo_apuracao: str
+    codigo: str
+    descricao: str
+    principal: str
+    multa: str
+    juros: str
+    total: str
+
+
+@dataclass(frozen=True)
+class _Tarefa:
+    caminho: str
+    inicio: int
+    fim: int
+    ultima: bool
+
+
+def listar_pdfs(pasta: str | Path) -> List[str]:
+    """PDFs de ``pasta`` (sem subpastas), em ordem alfabética."""
+    return sorted(str(p) for p in Path(pasta).iterdir() if p.is_file() and p.suffix.lower() == ".pdf")
+
+
+def _tarefas(caminhos: Iterable[str], paginas_por_tarefa: int, ao_falhar: Falha) -> Iterator[_Tarefa]:
+    for caminho in caminhos:
+        try:
+            with fitz.open(caminho) as doc:
+                total = doc.page_count
+        except Exception as exc:  # PDF corrompido ou ilegível não derruba o lote
+            ao_falhar(caminho, f"{type(exc).__name__}: {exc}")
+            continue
+        if total == 0:
+            continue
+        for inicio in range(0, total, paginas_por_tarefa):
+            fim = min(inicio + paginas_por_tarefa, total)
+            yield _Tarefa(caminho, inicio, fim, ultima=fim == total)
+
+
+def _extrair_tarefa(tarefa: _Tarefa, codigo_alvo: str, modo_texto: str):
+    return extrair_paginas(tarefa.caminho, tarefa.inicio, tarefa.fim, codigo_alvo, modo_texto)
+
+
+class _Arquivo:
+    """Junta os trechos de um PDF, segurando as linhas até conhecer o CNPJ."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.nome = Path(caminho).name
+        self.info: Dict[str, str] = {}
+        self.pendentes: List[list] = []
+
+    def _linha(self, dados: list) -> LinhaDarf:
+        return LinhaDarf(self.nome, self.info.get("CNPJ", ""), self.info.get("Razao Social", ""), *dados)
+
+    def adicionar(self, info: Dict[str, str], dados: List[list]) -> Iterator[LinhaDarf]:
+        if "CNPJ" not in self.info and "CNPJ" in info:
+            self.info = info
+        self.pendentes.extend(dados)
+        if "CNPJ" in self.info:
+            yield from self.finalizar()
+
+    def finalizar(self) -> Iterator[LinhaDarf]:
+        pendentes, self.pendentes = self.pendentes, []
+        for dados in pendentes:
+            yield self._linha(dados)
+
+
+def iterar_linhas_darf(
+    caminhos: Sequence[str | Path],
+    max_workers: Optional[int] = None,
+    codigo_alvo: str = "",
+    modo_texto: str = MODO_TEXTO_LOTE,
+    paginas_por_tarefa: int = PAGINAS_POR_TAREFA,
+    ao_falhar: Optional[Falha] = None,
+) -> Iterator[LinhaDarf]:
+    """Gera as linhas de vários PDFs de DARF, na ordem dos arquivos e páginas.
+
+    Cada PDF é dividido em trechos de até ``paginas_por_tarefa`` páginas,
+    extraídos em um ``ProcessPoolExecutor``. Só ``2 * max_workers`` trechos
+    ficam em andamento por vez e as linhas são entregues assim que o trecho
+    seguinte da fila termina, então a memória não cresce com o tamanho do
+    lote. ``max_workers=1`` processa no próprio processo, sem pool.
+
+    Falhas (PDF ilegível, erro em um trecho) não interrompem o lote: são
+    passadas a ``ao_falhar(caminho, mensagem)``.
+    """
+    ao_falhar = ao_falhar or (lambda _caminho, _mensagem: None)
+    paginas_por_tarefa = max(1, paginas_por_tarefa)
+    tarefas = _tarefas((str(c) for c in caminhos), paginas_por_tarefa, ao_falhar)
+    arquivo: Optional[_Arquivo] = None
+    falhou = False
+
+    def _entregar(tarefa: _Tarefa, obter_resultado: Callable[[], Tuple[dict, List[list]]]) -> Iterator[LinhaDarf]:
+        nonlocal arquivo, falhou
+        if arquivo is None or arquivo.caminho != tarefa.caminho:
+            arquivo = _Arquivo(tarefa.caminho)
+            falhou = False
+        try:
+            info, dados = obter_resultado()
+        except Exception as exc:  # inclui worker encerrado abruptamente
+            falhou = True
+            ao_falhar(tarefa.caminho, f"páginas {tarefa.inicio + 1}-{tarefa.fim}: {type(exc).__name__}: {exc}")
+        else:
+            if not falhou:
+                yield from arquivo.adicionar(info, dados)
+        if tarefa.ultima and not falhou:
+            yield from arquivo.finalizar()
+
+    if max_workers == 1:
+        for tarefa in tarefas:
+            yield from _entregar(tarefa, lambda: _extrair_tarefa(tarefa, codigo_alvo, modo_texto))
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        em_andamento: Deque[Tuple[_Tarefa, Future]] = deque()
+        for tarefa in tarefas:
+            em_andamento.append((tarefa, executor.submit(_extrair_tarefa, tarefa, codigo_alvo, modo_texto)))
+            if len(em_andamento) >= 2 * max_workers:
+                anterior, futuro = em_andamento.popleft()
+                yield from _entregar(anterior, futuro.result)
+        while em_andamento:
+            anterior, futuro = em_andamento.popleft()
+            yield from _entregar(anterior, futuro.result)
+
+
+def salvar_consolidado(
+    linhas: Iterable[LinhaDarf],
+    nome_arquivo: str | Path = "darf_consolidado.xlsx",
+    formato: Optional[str] = None,
+) -> int:
+    """Grava as linhas em uma tabela única; retorna quantas foram gravadas.
+
+    ``formato`` (xlsx, csv, jsonl ou parquet) vem da extensão de
+    ``nome_arquivo`` quando omitido. As linhas são consumidas uma a uma,
+    então um gerador como :func:`iterar_linhas_darf` é gravado sem ficar
+    inteiro em memória.
+    """
+    total = 0
+
+    def _valores() -> Iterator[list]:
+        nonlocal total
+        for linha in linhas:
+            arquivo, cnpj, razao_social, *dados = astuple(linha)
+            yield [arquivo, cnpj, razao_social, *converter_linha_darf(dados)]
+            total += 1
+
+    exportar([Tabela("DARF", CABECALHO_CONSOLIDADO, _valores(), formatos=FORMATOS_TABELA)], nome_arquivo, formato)
+    return total
+
+
+def consolidar_pasta(
+    pasta: str | Path,
+    nome_arquivo: str | Path = "darf_consolidado.xlsx",
+    max_workers: Optional[int] = None,
+    codigo_alvo: str = "",
+    modo_texto: str = MODO_TEXTO_LOTE,
+    formato: Optional[str] = None,
+) -> dict:
+    """Extrai todos os PDFs de ``pasta`` para uma tabela consolidada (ver :func:`salvar_consolidado`).
+
+    Retorna ``{"arquivos": n, "linhas": n, "falhas": {caminho: mensagem}}``.
+    """
+    caminhos = listar_pdfs(pasta)
+    falhas: Dict[str, str] = {}
+    linhas = iterar_linhas_darf(
+        caminhos,
+        max_workers=max_workers,
+        codigo_alvo=codigo_alvo,
+        modo_texto=modo_texto,
+        ao_falhar=lambda caminho, mensagem: falhas.setdefault(caminho, mensagem),
+    )
+    total = salvar_consolidado(linhas, nome_arquivo, formato)
+    return {"arquivos": len(caminhos), "linhas": total, "falhas": falhas}
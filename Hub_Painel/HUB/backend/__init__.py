@@ -1,11 +1,25 @@
+import sys
+from pathlib import Path
+
+# O código comum aos módulos fica em Hub_Painel/hansu_comum.
+_HUB_PAINEL = str(Path(__file__).resolve().parents[2])
+if _HUB_PAINEL not in sys.path:
+    sys.path.append(_HUB_PAINEL)
+
+from .jobs import JobError, JobManager
 from .module_registry import (
     MODULES,
+    MODULES_BY_AREA,
+    MODULES_BY_ID,
     ModuleEntry,
     get_module,
+    list_area_modules,
     list_areas_with_modules,
     list_module_catalog,
     list_module_entries,
 )
+from .permissions import PermissionEvaluator
+from .supabase_async import AsyncSupabaseLicenseService
 from .supabase_client import (
     SupabaseConfigError,
     SupabaseLicenseService,
@@ -13,12 +27,19 @@ from .supabase_client import (
 )
 
 __all__ = [
+    "JobError",
+    "JobManager",
     "MODULES",
+    "MODULES_BY_AREA",
+    "MODULES_BY_ID",
     "ModuleEntry",
     "get_module",
+    "list_area_modules",
     "list_areas_with_modules",
     "list_module_entries",
     "list_module_catalog",
+    "PermissionEvaluator",
+    "AsyncSupabaseLicenseService",
     "SupabaseConfigError",
     "SupabaseLicenseService",
     "SupabaseRequestError",
@@ -1,14 +1,58 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import asyncio
+import hmac
+import json
+import os
+import shutil
+from contextlib import asynccontextmanager
+from datetime import date
+from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from starlette.datastructures import UploadFile as StarletteUploadFile
 
-from .module_registry import list_areas_with_modules, list_module_catalog
-from .supabase_client import SupabaseConfigError, SupabaseLicenseService, SupabaseRequestError
+from .jobs import JOB_DONE, JobError, JobManager, JobUploadTooLarge
+from .async_transport import close_shared_async_transport
+from .license_query import LICENSE_FIELDS, LicenseQuery, LicenseQueryError
+from .module_registry import AREAS_PAYLOAD, CATALOG_PAYLOAD, SerializedPayload
+from .permissions import PermissionEvaluator, license_status
+from .supabase_async import AsyncSupabaseLicenseService
+from .supabase_client import SupabaseConfigError, SupabaseRequestError
+from .ttl_cache import TTLCache, etag_matches
 
-app = FastAPI(title="Hansu HUB API", version="0.1.0")
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# O catálogo só muda com um novo deploy; depois de max-age o navegador
+# revalida com If-None-Match e recebe 304 enquanto o ETag for o mesmo.
+CATALOG_CACHE_CONTROL = "public, max-age=300"
+# Pares licença/módulo aceitos por chamada de /api/permissions/check.
+MAX_PERMISSION_CHECKS = 1000
+
+# Jobs ficam só na memória deste processo: rode a API com um único worker
+# do uvicorn (ver JobManager).
+job_manager = JobManager()
+
+LICENSES_TTL_S = float(os.getenv("HANSU_LICENSES_TTL_S") or 30)
+LICENSES_STALE_S = float(os.getenv("HANSU_LICENSES_STALE_S") or 300)
+licenses_cache = TTLCache(ttl_s=LICENSES_TTL_S, stale_s=LICENSES_STALE_S)
+
+_license_service: AsyncSupabaseLicenseService | None = None
+
+permission_evaluator = PermissionEvaluator()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    job_manager.shutdown()
+    await close_shared_async_transport()
+
+
+app = FastAPI(title="Hansu HUB API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,65 +60,240 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Content-Range", "X-Total-Count", "X-Next-Cursor"],
 )
 
 
-def _license_status(expires_at: str | None, status: str | None) -> str:
-    if status and status.lower() in {"suspended", "suspensa"}:
-        return "Suspensa"
-    if not expires_at:
-        return "Ativa"
+@app.get("/api/health")
+async def health() -> dict:
+    return {"status": "ok"}
 
-    try:
-        expires_dt = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
-    except ValueError:
-        return "Ativa"
 
-    now = datetime.now(timezone.utc)
-    if expires_dt < now:
-        return "Suspensa"
+def _static_json(payload: SerializedPayload, if_none_match: str | None) -> Response:
+    headers = {"ETag": payload.etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
 
-    days_left = (expires_dt - now).days
-    if days_left <= 30:
-        return "Expirando"
-    return "Ativa"
 
+@app.get("/api/modules/areas")
+async def modules_areas(if_none_match: str | None = Header(default=None)) -> Response:
+    return _static_json(AREAS_PAYLOAD, if_none_match)
 
-@app.get("/api/health")
-def health() -> dict:
-    return {"status": "ok"}
 
+@app.get("/api/modules/catalog")
+async def modules_catalog(if_none_match: str | None = Header(default=None)) -> Response:
+    return _static_json(CATALOG_PAYLOAD, if_none_match)
 
-@app.get("/api/modules/areas")
-def modules_areas() -> list[dict]:
-    return list_areas_with_modules()
 
+def _get_license_service() -> AsyncSupabaseLicenseService:
+    """Service built once per process, so the .env files are not re-read per request."""
+    global _license_service
+    if _license_service is None:
+        _license_service = AsyncSupabaseLicenseService.from_env()
+    return _license_service
 
-@app.get("/api/modules/catalog")
-def modules_catalog() -> list[dict]:
-    return list_module_catalog()
+
+def _normalize_licenses(licenses_data: list[dict], fields: tuple[str, ...] = tuple(LICENSE_FIELDS)) -> list[dict]:
+    normalized = []
+    for item in licenses_data:
+        full = {
+            "id": item.get("license_id", "N/A"),
+            "cliente": item.get("client_name") or "Sem nome",
+            "modulo": "Hansu Hub",
+            "status": license_status(item.get("expires_at"), item.get("status")),
+            "expira": item.get("expires_at") or "Indefinida",
+        }
+        normalized.append({name: full[name] for name in fields})
+
+    return normalized
+
+
+async def _load_licenses(query: LicenseQuery) -> tuple[dict, bytes]:
+    rows, total = await _get_license_service().list_licenses_page(
+        select=query.select(),
+        conditions=query.conditions(),
+        limit=query.limit,
+        offset=query.offset,
+    )
+    normalized = _normalize_licenses(rows, query.fields)
+    page = {"count": len(normalized), "total": total, "next_cursor": query.next_cursor(rows)}
+    return page, json.dumps(normalized, ensure_ascii=False).encode("utf-8")
 
 
 @app.get("/api/licenses")
-def licenses() -> list[dict]:
+async def licenses(
+    limit: int | None = Query(default=None),
+    offset: int = Query(default=0),
+    cursor: str | None = Query(default=None),
+    status: str | None = Query(default=None),
+    expires_from: date | None = Query(default=None),
+    expires_to: date | None = Query(default=None),
+    fields: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    """Lista de licenças; filtros, projeção e paginação vão para a consulta do PostgREST.
+
+    O corpo continua sendo a lista. O total (estimado) e o cursor da próxima
+    página vêm nos cabeçalhos ``X-Total-Count``/``Content-Range`` e
+    ``X-Next-Cursor``.
+    """
     try:
-        service = SupabaseLicenseService.from_env()
-        licenses_data = service.list_licenses() or []
+        query = LicenseQuery.from_params(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            status=status,
+            expires_from=expires_from,
+            expires_to=expires_to,
+            fields=fields,
+        )
+    except LicenseQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    try:
+        entry = await licenses_cache.get(query, lambda: _load_licenses(query))
     except SupabaseConfigError as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
     except SupabaseRequestError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
-    normalized = []
-    for item in licenses_data:
-        normalized.append(
-            {
-                "id": item.get("license_id", "N/A"),
-                "cliente": item.get("client_name") or "Sem nome",
-                "modulo": "Hansu Hub",
-                "status": _license_status(item.get("expires_at"), item.get("status")),
-                "expira": item.get("expires_at") or "Indefinida",
-            }
+    page = entry.value
+    total = "*" if page["total"] is None else str(page["total"])
+    first = f"{query.offset}-{query.offset + page['count'] - 1}" if page["count"] else "*"
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Range": f"{first}/{total}",
+    }
+    if page["total"] is not None:
+        headers["X-Total-Count"] = total
+    if page["next_cursor"]:
+        headers["X-Next-Cursor"] = page["next_cursor"]
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=entry.payload, media_type="application/json", headers=headers)
+
+
+@app.post("/api/licenses/invalidate", status_code=204)
+async def invalidate_licenses(x_admin_token: str | None = Header(default=None)) -> None:
+    """Drops the cached list; call after admin writes so the next read is fresh.
+
+    Requires the ``X-Admin-Token`` header with the value of ``HANSU_ADMIN_TOKEN``;
+    without that variable the endpoint stays disabled.
+    """
+    expected = (os.getenv("HANSU_ADMIN_TOKEN") or "").strip()
+    if not expected:
+        raise HTTPException(status_code=503, detail="Invalidação desativada: defina HANSU_ADMIN_TOKEN no servidor.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Token de administração inválido.")
+
+    global _license_service
+    _license_service = None
+    licenses_cache.invalidate()
+    permission_evaluator.invalidate()
+
+
+class PermissionCheck(BaseModel):
+    license_id: str
+    module_id: str
+
+
+@app.post("/api/permissions/check")
+async def check_permissions(checks: list[PermissionCheck]) -> list[dict]:
+    """Avalia vários pares licença/módulo de uma vez, pelo cache local de permissões."""
+    if len(checks) > MAX_PERMISSION_CHECKS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Envie no máximo {MAX_PERMISSION_CHECKS} pares licença/módulo por requisição.",
         )
+    try:
+        return await permission_evaluator.check_many((check.license_id, check.module_id) for check in checks)
+    except SupabaseConfigError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except SupabaseRequestError as exc:
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
 
-    return normalized
+
+def _save_upload(upload: StarletteUploadFile, target: Path) -> None:
+    with target.open("wb") as output:
+        shutil.copyfileobj(upload.file, output, UPLOAD_CHUNK_BYTES)
+
+
+def _get_job(job_id: str):
+    try:
+        return job_manager.get(job_id)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail="Job não encontrado.") from exc
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(request: Request) -> dict:
+    """Recebe ``module_id`` e os arquivos (``files``) como multipart.
+
+    O tamanho é conferido pelo ``Content-Length`` antes de ler o corpo: com
+    ``Form``/``File`` na assinatura o Starlette já teria gravado todo o
+    upload em disco antes de o limite ser checado.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is None or not content_length.isdigit():
+        raise HTTPException(status_code=411, detail="Envie o cabeçalho Content-Length.")
+    try:
+        job_manager.check_upload_size(int(content_length))
+    except JobUploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+    form = await request.form()
+    module_id = form.get("module_id")
+    files = [upload for upload in form.getlist("files") if isinstance(upload, StarletteUploadFile)]
+    if not isinstance(module_id, str) or not files:
+        await form.close()
+        raise HTTPException(status_code=422, detail="Informe module_id e ao menos um arquivo em files.")
+
+    try:
+        job = job_manager.new_job(module_id)
+    except JobError as exc:
+        await form.close()
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    try:
+        for upload in files:
+            target = job_manager.upload_path(job, upload.filename)
+            # Cópia em disco fora do event loop: uploads de centenas de MB
+            # não podem travar as demais requisições.
+            await asyncio.to_thread(_save_upload, upload, target)
+        job_manager.start(job)
+    except JobError as exc:
+        await asyncio.to_thread(job_manager.discard, job.job_id)
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except BaseException:
+        # Cliente desconectado no meio do upload: não deixa job órfão.
+        await asyncio.to_thread(job_manager.discard, job.job_id)
+        raise
+    finally:
+        await form.close()
+
+    return job.to_dict()
+
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str) -> dict:
+    return _get_job(job_id).to_dict()
+
+
+@app.get("/api/jobs/{job_id}/result")
+async def job_result(job_id: str) -> FileResponse:
+    job = _get_job(job_id)
+    if job.status != JOB_DONE or job.output_path is None:
+        raise HTTPException(status_code=409, detail=f"Job ainda não concluído (status: {job.status}).")
+
+    return FileResponse(job.output_path, media_type=XLSX_MEDIA_TYPE, filename=job.output_path.name)
+
+
+@app.delete("/api/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str) -> None:
+    job = _get_job(job_id)
+    if job.finished_at is None:
+        raise HTTPException(status_code=409, detail="Job em andamento não pode ser removido.")
+    await asyncio.to_thread(job_manager.discard, job_id)
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import ssl
+import time
+import urllib.parse
+import zlib
+from collections.abc import Mapping
+
+from hansu_comum.http_transport import IDEMPOTENT_METHODS, RETRY_STATUSES, HttpResponse, RequestTiming, TransportError, TransportMetrics
+
+_NO_BODY_STATUSES = frozenset({204, 304})
+_BODYLESS_REQUEST_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "DELETE"})
+# Errors that mean no usable response was read from the connection.
+_EXCHANGE_ERRORS = (
+    OSError,
+    asyncio.IncompleteReadError,
+    asyncio.LimitOverrunError,
+    asyncio.TimeoutError,
+    ValueError,
+    zlib.error,
+)
+
+Origin = tuple[str, str, int]
+
+
+class _Connection:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def usable(self) -> bool:
+        # An idle connection the server closed shows up as EOF already buffered.
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class AsyncHttpTransport:
+    """asyncio counterpart of :class:`HttpTransport`, on plain asyncio streams.
+
+    Same behaviour: keep-alive connections per ``(scheme, host, port)`` (up
+    to ``pool_size`` idle each, ``max_connections`` by default), gzip responses decoded transparently, the
+    same retry policy (429 always; 5xx and connection errors for idempotent
+    methods or ``retry_unsafe``; one free resend of those when a reused
+    connection turns out to be closed) and the same :class:`TransportMetrics`. At most
+    ``max_connections`` requests are on the wire at once; the rest wait.
+    A ``pool_size`` below that would close connections after every burst and
+    reopen them (TCP + TLS) on the next one.
+
+    Picking an idle connection is O(1), so the cost per request does not
+    grow with the number of requests in flight.
+    """
+
+    def __init__(
+        self,
+        pool_size: int | None = None,
+        max_connections: int = 100,
+        max_retries: int = 3,
+        backoff_s: float = 0.2,
+        max_backoff_s: float = 5.0,
+        ssl_context: ssl.SSLContext | None = None,
+    ):
+        self.pool_size = pool_size or max_connections
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.metrics = TransportMetrics()
+        self._idle: dict[Origin, list[_Connection]] = {}
+        self._slots: asyncio.Semaphore | None = None
+
+    # -- connection pool -------------------------------------------------
+    async def _checkout(self, origin: Origin, timeout: float) -> tuple[_Connection, bool]:
+        idle = self._idle.get(origin)
+        while idle:
+            conn = idle.pop()
+            if conn.usable():
+                self.metrics.connection(True)
+                return conn, True
+            conn.close()
+
+        scheme, host, port = origin
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                host,
+                port,
+                ssl=self.ssl_context if scheme == "https" else None,
+                server_hostname=host if scheme == "https" else None,
+            ),
+            timeout,
+        )
+        self.metrics.connection(False)
+        return _Connection(reader, writer), False
+
+    def _checkin(self, origin: Origin, conn: _Connection) -> None:
+        idle = self._idle.setdefault(origin, [])
+        if len(idle) < self.pool_size:
+            idle.append(conn)
+        else:
+            conn.close()
+
+    async def aclose(self) -> None:
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    # -- requests --------------------------------------------------------
+    def _delay(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff_s)
+            except ValueError:
+                pass
+        delay = min(self.backoff_s * (2 ** attempt), self.max_backoff_s)
+        return delay * (0.5 + random.random() / 2)
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Mapping[str, str]) -> tuple[bytes, bool]:
+        """Response body and whether the connection must be closed afterwards."""
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size_line = await reader.readuntil(b"\r\n")
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    # trailers, up to the blank line
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    return b"".join(chunks), False
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+
+        length = headers.get("content-length")
+        if length is not None:
+            return await reader.readexactly(int(length)), False
+        # No framing: the body runs until the server closes the connection.
+        return await reader.read(), True
+
+    @staticmethod
+    def _parse_head(head: bytes) -> tuple[str, int, dict[str, str]]:
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        version, status_text, *_ = status_line.split(" ", 2)
+        headers: dict[str, str] = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        return version, int(status_text), headers
+
+    async def _exchange(
+        self,
+        origin: Origin,
+        conn: _Connection,
+        method: str,
+        request_head: bytes,
+        body: bytes | None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        try:
+            conn.writer.write(request_head + (body or b""))
+            await conn.writer.drain()
+
+            while True:
+                version, status, response_headers = self._parse_head(await conn.reader.readuntil(b"\r\n\r\n"))
+                # Interim responses (100 Continue, 103 Early Hints) have no body and
+                # precede the final one on the same connection.
+                if not 100 <= status < 200 or status == 101:
+                    break
+
+            if status == 101:
+                # Protocol switch, never requested here: the connection is no longer HTTP/1.1.
+                raw, must_close = b"", True
+            elif method == "HEAD" or status in _NO_BODY_STATUSES:
+                raw, must_close = b"", False
+            else:
+                raw, must_close = await self._read_body(conn.reader, response_headers)
+        except BaseException:
+            conn.close()
+            raise
+
+        connection = response_headers.get("connection", "").lower()
+        if must_close or connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive"):
+            conn.close()
+        else:
+            self._checkin(origin, conn)
+
+        encoding = response_headers.get("content-encoding", "").lower()
+        if encoding in {"gzip", "x-gzip"}:
+            raw = zlib.decompress(raw, 16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            raw = zlib.decompress(raw)
+        return status, response_headers, raw
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float = 15,
+        retry_unsafe: bool = False,
+    ) -> HttpResponse:
+        """Sends the request and returns the final response, whatever its status.
+
+        Raises :class:`TransportError` only when no response could be obtained.
+        """
+        method = method.upper()
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme.lower()
+        default_port = 443 if scheme == "https" else 80
+        port = parsed.port or default_port
+        origin = (scheme, parsed.hostname or "", port)
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+
+        send_headers = {
+            "Host": origin[1] if port == default_port else f"{origin[1]}:{port}",
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+        }
+        send_headers.update(headers or {})
+        if body is not None or method not in _BODYLESS_REQUEST_METHODS:
+            send_headers["Content-Length"] = str(len(body or b""))
+        request_head = (
+            f"{method} {target} HTTP/1.1\r\n"
+            + "".join(f"{name}: {value}\r\n" for name, value in send_headers.items())
+            + "\r\n"
+        ).encode("latin-1")
+        can_retry = retry_unsafe or method in IDEMPOTENT_METHODS
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+
+        started = time.perf_counter()
+        attempts = 0
+        reused = False
+        stale_retry_used = False
+        while True:
+            attempts += 1
+            try:
+                async with self._slots:
+                    conn, reused = await self._checkout(origin, timeout)
+                    status, response_headers, raw = await asyncio.wait_for(
+                        self._exchange(origin, conn, method, request_head, body), timeout
+                    )
+            except _EXCHANGE_ERRORS as exc:
+                # Idle keep-alive closed by the server: EOF before any byte of the
+                # response. The request may still have been processed, so only
+                # methods that may be retried get the free resend.
+                stale = isinstance(exc, asyncio.IncompleteReadError) and not exc.partial
+                if stale and reused and can_retry and not stale_retry_used:
+                    stale_retry_used = True
+                    continue
+                error = exc
+            else:
+                retryable = status == 429 or (status in RETRY_STATUSES and can_retry)
+                if retryable and attempts <= self.max_retries:
+                    await asyncio.sleep(self._delay(attempts - 1, response_headers.get("retry-after")))
+                    continue
+
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.metrics.record(RequestTiming(method, parsed.path, status, elapsed_ms, attempts, reused))
+                return HttpResponse(status, response_headers, raw, elapsed_ms, attempts)
+
+            if can_retry and attempts <= self.max_retries:
+                await asyncio.sleep(self._delay(attempts - 1, None))
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record(RequestTiming(method, parsed.path, None, elapsed_ms, attempts, reused))
+            reason = "timeout" if isinstance(error, asyncio.TimeoutError) else str(error) or type(error).__name__
+            raise TransportError(reason) from error
+
+
+_shared_async_transport: AsyncHttpTransport | None = None
+
+
+def shared_async_transport() -> AsyncHttpTransport:
+    """Transport shared by every async service of the process (one event loop)."""
+    global _shared_async_transport
+    if _shared_async_transport is None:
+        _shared_async_transport = AsyncHttpTransport()
+    return _shared_async_transport
+
+
+async def close_shared_async_transport() -> None:
+    global _shared_async_transport
+    if _shared_async_transport is not None:
+        await _shared_async_transport.aclose()
+        _shared_async_transport = None
@@ -0,0 +1,177 @@
+"""Load test for the Supabase clients against a local mock PostgREST.
+
+Starts an asyncio mock of the PostgREST endpoints used by the HUB (with a
+configurable per-request latency) and fires ``--requests`` calls to
+``list_licenses`` with ``--concurrency`` in flight:
+
+* sync:  SupabaseLicenseService on a 40-thread pool, the size of the
+         threadpool Starlette gives sync ``def`` endpoints;
+* async: AsyncSupabaseLicenseService on the event loop.
+
+With ``--api-url`` the same load is sent to a running HUB instead
+(``GET {api-url}/api/licenses``). Start the mock alone with ``--serve`` and
+point the HUB at it with SUPABASE_URL=<printed url>,
+SUPABASE_SERVICE_ROLE_KEY=x and HANSU_LICENSES_TTL_S=0 so every call
+reaches the mock instead of the license cache.
+
+Usage: python -m backend.bench_async_load [--requests 2000] [--concurrency 200] [--latency-ms 50]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from hansu_comum.http_transport import HttpTransport
+
+from .async_transport import AsyncHttpTransport
+from .supabase_async import AsyncSupabaseLicenseService
+from .supabase_client import SupabaseLicenseService
+
+STARLETTE_THREADPOOL = 40
+
+
+def _mock_licenses(count: int) -> bytes:
+    rows = [
+        {
+            "license_id": f"LIC-{i:05d}",
+            "client_name": f"Cliente {i}",
+            "status": "active" if i % 7 else "suspended",
+            "expires_at": f"20{26 + i % 3}-0{1 + i % 9}-15T00:00:00Z",
+            "notes": None,
+            "metadata": {},
+            "created_at": "2025-01-01T00:00:00Z",
+            "updated_at": "2025-01-01T00:00:00Z",
+        }
+        for i in range(count)
+    ]
+    return json.dumps(rows).encode("utf-8")
+
+
+async def start_mock_postgrest(latency_s: float, rows: int, port: int = 0) -> asyncio.AbstractServer:
+    """Minimal HTTP/1.1 keep-alive server answering every request with the license list."""
+    payload = _mock_licenses(rows)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+
+                await asyncio.sleep(latency_s)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii")
+                    + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", port)
+
+
+def _report(label: str, latencies: list[float], elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<6} {len(latencies) / elapsed:9.0f} req/s   "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms   "
+        f"total {elapsed:6.2f} s"
+    )
+
+
+def _timed_sync(call) -> float:
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+async def _timed_async(semaphore: asyncio.Semaphore, call) -> float:
+    async with semaphore:
+        start = time.perf_counter()
+        await call()
+        return time.perf_counter() - start
+
+
+async def run_sync(url: str, requests: int) -> None:
+    transport = HttpTransport(pool_size=STARLETTE_THREADPOOL)
+    service = SupabaseLicenseService(url=url, key="mock", transport=transport)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=STARLETTE_THREADPOOL) as pool:
+        latencies = await asyncio.gather(
+            *(loop.run_in_executor(pool, _timed_sync, service.list_licenses) for _ in range(requests))
+        )
+    transport.close()
+    _report("sync", latencies, time.perf_counter() - start)
+
+
+async def run_async(url: str, requests: int, concurrency: int) -> None:
+    transport = AsyncHttpTransport(pool_size=concurrency, max_connections=concurrency)
+    service = AsyncSupabaseLicenseService(url=url, key="mock", transport=transport)
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(_timed_async(semaphore, service.list_licenses) for _ in range(requests))
+    )
+    await transport.aclose()
+    _report("async", latencies, time.perf_counter() - start)
+
+
+async def run_api(api_url: str, requests: int, concurrency: int) -> None:
+    transport = AsyncHttpTransport(pool_size=concurrency, max_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    url = api_url.rstrip("/") + "/api/licenses"
+
+    async def _get() -> None:
+        response = await transport.request("GET", url, timeout=60)
+        if response.status >= 400:
+            raise RuntimeError(f"HTTP {response.status}: {response.text()}")
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(_timed_async(semaphore, _get) for _ in range(requests)))
+    await transport.aclose()
+    _report("api", latencies, time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--api-url")
+    parser.add_argument("--serve", action="store_true")
+    args = parser.parse_args()
+
+    if args.api_url:
+        await run_api(args.api_url, args.requests, args.concurrency)
+        return
+
+    server = await start_mock_postgrest(args.latency_ms / 1000, args.rows, args.port)
+    url = "http://127.0.0.1:%d" % server.sockets[0].getsockname()[1]
+    print(f"mock PostgREST at {url} ({args.latency_ms:.0f} ms/request, {args.rows} licenses)")
+
+    async with server:
+        if args.serve:
+            await server.serve_forever()
+        print(f"{args.requests} x list_licenses, {args.concurrency} in flight")
+        await run_sync(url, args.requests)
+        await run_async(url, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+from hansu_comum.exportadores import Tabela, exportar
+
+from .module_registry import BASE_DIR
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+SOURCE_COLUMN = "Arquivo"
+JOB_TTL_S = 6 * 60 * 60
+JOB_MAX_UPLOAD_MB = 1024
+
+
+class JobError(Exception):
+    """Erro ao criar ou consultar um job de extração."""
+
+
+class JobUploadTooLarge(JobError):
+    """Os arquivos enviados para um job passam do limite de upload."""
+
+
+# ---------------------------------------------------------------------------
+# Backends
+#
+# Every extractor ships its own package named ``backend`` (or
+# ``pgdas_backend``), so they cannot share ``sys.path``. Each one is loaded
+# from its folder under a unique alias instead; relative imports inside the
+# package keep working.
+# ---------------------------------------------------------------------------
+_BACKEND_PACKAGES = {
+    "hansu_darf": BASE_DIR / "Extrator-Darf" / "backend",
+    "hansu_dctfweb": BASE_DIR / "Extrator-DCTFWeb" / "backend",
+    "hansu_pgdas": BASE_DIR / "DECLARACAO_PGDAS" / "pgdas_backend",
+    "hansu_efd_contrib": BASE_DIR / "EFD_CONTRIBUICOES" / "backend",
+    "hansu_efd_icms": BASE_DIR / "EFD_ICMS" / "backend",
+}
+_import_lock = threading.Lock()
+
+
+def _backend_module(alias: str, module: str) -> ModuleType:
+    with _import_lock:
+        if alias not in sys.modules:
+            package_dir = _BACKEND_PACKAGES[alias]
+            spec = importlib.util.spec_from_file_location(
+                alias,
+                package_dir / "__init__.py",
+                submodule_search_locations=[str(package_dir)],
+            )
+            package = importlib.util.module_from_spec(spec)
+            sys.modules[alias] = package
+            try:
+                spec.loader.exec_module(package)
+            except BaseException:
+                del sys.modules[alias]
+                raise
+        return importlib.import_module(f"{alias}.{module}")
+
+
+# ---------------------------------------------------------------------------
+# Per-file extraction
+#
+# Each function runs inside a pool worker and returns plain rows per sheet
+# ({sheet: [record, ...]}) so results never carry classes from the aliased
+# packages back to the API process.
+# ---------------------------------------------------------------------------
+def _extract_darf(path: str) -> dict[str, list[dict]]:
+    extractor = _backend_module("hansu_darf", "extractor")
+    info, rows = extractor.extrair_dados(path)
+    company = {"CNPJ": info.get("CNPJ", ""), "Razão Social": info.get("Razao Social", "")}
+    records = [
+        {**company, **dict(zip(extractor.CABECALHO_TABELA, extractor.converter_linha_darf(row)))} for row in rows
+    ]
+    return {"DARF": records}
+
+
+def _darf_formats() -> dict[str, dict[str, str]]:
+    extractor = _backend_module("hansu_darf", "extractor")
+    return {"DARF": dict(extractor.FORMATOS_TABELA)}
+
+
+def _dctfweb_tables(extractor: ModuleType, result: dict) -> list:
+    # Same tables as the desktop xlsx export: typed periods and amounts.
+    return extractor._result_tables(result["header"], result["blocks"], result["offsets"], typed=True)
+
+
+def _extract_dctfweb(path: str) -> dict[str, list[dict]]:
+    extractor = _backend_module("hansu_dctfweb", "extractor")
+    tables = _dctfweb_tables(extractor, extractor.extract_all(Path(path)))
+    return {
+        table.nome: [{**table.contexto, **dict(zip(table.colunas, row))} for row in table.linhas] for table in tables
+    }
+
+
+def _dctfweb_formats() -> dict[str, dict[str, str]]:
+    extractor = _backend_module("hansu_dctfweb", "extractor")
+    empty = {"header": {}, "blocks": [], "offsets": []}
+    return {table.nome: dict(table.formatos) for table in _dctfweb_tables(extractor, empty)}
+
+
+def _extract_pgdas(path: str) -> dict[str, list[dict]]:
+    processor_module = _backend_module("hansu_pgdas", "core.processor")
+    processor = processor_module.PGDASProcessor()
+    detailed = processor.processar_pdfs([path])
+    return {
+        "segregação por atividade": detailed.to_dict("records"),
+        "Débitos Apurados": processor.df_exigivel.to_dict("records"),
+    }
+
+
+def _extract_efd_contrib(path: str) -> dict[str, list[dict]]:
+    extractor = _backend_module("hansu_efd_contrib", "efd_contrib_extrator")
+    m200, m600 = extractor.extrair_arquivo_sped(path)
+    return {"M200": m200, "M600": m600}
+
+
+def _extract_efd_icms(path: str) -> dict[str, list[dict]]:
+    extractor = _backend_module("hansu_efd_icms", "efd_icms_extrator")
+    _, e110, e115 = extractor.extrair_arquivo_efd(path)
+    return {"E110": e110.to_dict("records"), "E115": e115.to_dict("records")}
+
+
+def _extract_efd_h005(path: str) -> dict[str, list[dict]]:
+    extractor = _backend_module("hansu_efd_icms", "h005_extrator_app")
+    header, records, errors = extractor.extrair_h005_lote([path], max_workers=1)
+    if errors:
+        raise JobError(errors[0][1])
+    return {
+        "H005": [
+            {
+                "CNPJ": header.cnpj,
+                "EMPRESA": header.empresa,
+                "DATA INVENTÁRIO": record.dt_inv,
+                "VALOR INVENTÁRIO": record.vl_inv,
+                "MOTIVO": record.mot_inv,
+            }
+            for record in records
+        ]
+    }
+
+
+@dataclass(frozen=True)
+class JobRunner:
+    extract: Callable[[str], dict[str, list[dict]]]
+    suffixes: tuple[str, ...]
+    # Excel number formats per sheet and column, from the extractor's own export.
+    formats: Callable[[], dict[str, dict[str, str]]] | None = None
+
+
+# Modules that need more than a list of files (the CNPJ/IE editors, license
+# and admin tools) are not exposed as jobs.
+JOB_RUNNERS: dict[str, JobRunner] = {
+    "extrair_darf": JobRunner(_extract_darf, (".pdf",), _darf_formats),
+    "extrair_dctfweb": JobRunner(_extract_dctfweb, (".pdf",), _dctfweb_formats),
+    "declaracao_pgdas": JobRunner(_extract_pgdas, (".pdf",)),
+    "efd_contrib_extrator": JobRunner(_extract_efd_contrib, (".txt",)),
+    "efd_icms_extrator": JobRunner(_extract_efd_icms, (".txt",)),
+    "efd_icms_h005": JobRunner(_extract_efd_h005, (".txt",)),
+}
+
+
+def _run_extraction(module_id: str, path: str) -> dict[str, list[dict]]:
+    return JOB_RUNNERS[module_id].extract(path)
+
+
+def _record_rows(records: list[dict], columns: list[str]):
+    for record in records:
+        yield [record.get(column) for column in columns]
+
+
+def _write_workbook(module_id: str, output_path: str, sheets: dict[str, list[dict]]) -> str:
+    """Consolidated workbook: one sheet per extractor table, source file first."""
+    runner = JOB_RUNNERS[module_id]
+    formats = runner.formats() if runner.formats else {}
+
+    tables = []
+    for title, records in sheets.items():
+        columns: dict[str, None] = {}
+        for record in records:
+            columns.update(dict.fromkeys(record))
+        tables.append(Tabela(title[:31], list(columns), _record_rows(records, list(columns)), formatos=formats.get(title, {})))
+
+    if not tables:
+        tables.append(Tabela("Resultado", ["Nenhum dado extraído"], []))
+    return str(exportar(tables, output_path, "xlsx")[0])
+
+
+# ---------------------------------------------------------------------------
+# Job queue
+# ---------------------------------------------------------------------------
+@dataclass
+class Job:
+    job_id: str
+    module_id: str
+    work_dir: Path
+    files: list[str]
+    status: str = JOB_QUEUED
+    completed: int = 0
+    errors: list[dict] = field(default_factory=list)
+    detail: str | None = None
+    output_path: Path | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def total(self) -> int:
+        return len(self.files)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["work_dir"], data["output_path"]
+        data["total"] = self.total
+        data["progress"] = round(self.completed / self.total, 4) if self.total else 1.0
+        data["result_ready"] = self.status == JOB_DONE
+        return data
+
+
+class JobManager:
+    """Runs extraction jobs on a bounded process pool without blocking the event loop.
+
+    Files of all jobs share the same pool, so ``max_workers`` caps the CPU
+    used by the server no matter how many analysts submit at once. Finished
+    jobs (and their uploads/results) are dropped after ``ttl_s``.
+
+    There is no job listing: the random ``job_id`` returned on creation is
+    what gives access to a job's status and result, so analysts only see
+    their own jobs.
+
+    Job state lives only in this process (``_jobs``): the API must run as a
+    single uvicorn worker, otherwise a status or result request can land on
+    a worker that never saw the job and get a 404. Jobs are also lost on
+    restart. Scale extraction with ``HANSU_JOBS_WORKERS`` (the process
+    pool), not with ``uvicorn --workers``.
+
+    ``max_upload_bytes`` caps the upload of one job, checked against the
+    request's ``Content-Length`` before the files are read
+    (``HANSU_JOBS_MAX_UPLOAD_MB``, default :data:`JOB_MAX_UPLOAD_MB`).
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        base_dir: Path | None = None,
+        ttl_s: int = JOB_TTL_S,
+        max_upload_bytes: int | None = None,
+    ):
+        self.max_workers = max_workers or int(os.getenv("HANSU_JOBS_WORKERS") or 0) or os.cpu_count() or 1
+        self.base_dir = Path(base_dir or os.getenv("HANSU_JOBS_DIR") or Path(tempfile.gettempdir()) / "hansu_jobs")
+        self.ttl_s = ttl_s
+        self.max_upload_bytes = max_upload_bytes or (
+            int(float(os.getenv("HANSU_JOBS_MAX_UPLOAD_MB") or JOB_MAX_UPLOAD_MB) * 1024 * 1024)
+        )
+        self._jobs: dict[str, Job] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def new_job(self, module_id: str) -> Job:
+        """Reserves a job and its upload folder; call :meth:`start` once files are saved."""
+        if module_id not in JOB_RUNNERS:
+            raise JobError(f"Módulo sem extração em lote: {module_id}")
+
+        self._purge_expired()
+        job_id = uuid.uuid4().hex
+        work_dir = self.base_dir / job_id
+        (work_dir / "input").mkdir(parents=True)
+        job = Job(job_id=job_id, module_id=module_id, work_dir=work_dir, files=[])
+        self._jobs[job_id] = job
+        return job
+
+    def upload_path(self, job: Job, filename: str) -> Path:
+        name = Path(filename or "arquivo").name
+        suffixes = JOB_RUNNERS[job.module_id].suffixes
+        if Path(name).suffix.lower() not in suffixes:
+            raise JobError(f"Arquivo {name!r} não suportado; esperado: {', '.join(suffixes)}")
+
+        # One folder per upload keeps the original name even when it repeats.
+        target = self._input_path(job, len(job.files), name)
+        target.parent.mkdir()
+        job.files.append(name)
+        return target
+
+    def check_upload_size(self, size: int) -> None:
+        """Raises :class:`JobUploadTooLarge` if an upload of ``size`` bytes passes the job limit."""
+        if size > self.max_upload_bytes:
+            limit_mb = self.max_upload_bytes / (1024 * 1024)
+            raise JobUploadTooLarge(f"Arquivos enviados excedem o limite de {limit_mb:g} MB por job.")
+
+    @staticmethod
+    def _input_path(job: Job, index: int, name: str) -> Path:
+        return job.work_dir / "input" / f"{index:04d}" / name
+
+    def start(self, job: Job) -> None:
+        if not job.files:
+            self.discard(job.job_id)
+            raise JobError("Nenhum arquivo enviado.")
+
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def get(self, job_id: str) -> Job:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        return job
+
+    def discard(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    def _public_message(self, job: Job, exc: BaseException) -> str:
+        """Error text for the API, with server paths reduced to the uploaded file names."""
+        message = str(exc) or type(exc).__name__
+        for index, name in enumerate(job.files):
+            message = message.replace(str(self._input_path(job, index, name)), name)
+        return message.replace(str(job.work_dir) + os.sep, "").replace(str(job.work_dir), "")
+
+    def _purge_expired(self) -> None:
+        limit = time.time() - self.ttl_s
+        for job in list(self._jobs.values()):
+            if job.finished_at is not None and job.finished_at < limit:
+                self.discard(job.job_id)
+
+    async def _run(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+
+        inputs = [self._input_path(job, index, name) for index, name in enumerate(job.files)]
+        results: list[dict[str, list[dict]] | None] = [None] * len(inputs)
+
+        async def _extract(index: int, path: Path) -> None:
+            try:
+                results[index] = await loop.run_in_executor(pool, _run_extraction, job.module_id, str(path))
+            except Exception as exc:  # um arquivo com falha não interrompe o job
+                job.errors.append({"arquivo": job.files[index], "erro": self._public_message(job, exc)})
+            finally:
+                job.completed += 1
+
+        try:
+            await asyncio.gather(*(_extract(index, path) for index, path in enumerate(inputs)))
+
+            sheets: dict[str, list[dict]] = {}
+            for name, result in zip(job.files, results):
+                for title, records in (result or {}).items():
+                    rows = sheets.setdefault(title, [])
+                    rows.extend({SOURCE_COLUMN: name, **record} for record in records)
+
+            if all(result is None for result in results):
+                raise JobError("Nenhum arquivo pôde ser processado.")
+
+            output_path = job.work_dir / f"{job.module_id}_{job.job_id[:8]}.xlsx"
+            await loop.run_in_executor(pool, _write_workbook, job.module_id, str(output_path), sheets)
+            job.output_path = output_path
+            job.status = JOB_DONE
+        except Exception as exc:
+            job.status = JOB_FAILED
+            job.detail = self._public_message(job, exc)
+        finally:
+            job.finished_at = time.time()
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+
+from .permissions import STATUS_ACTIVE, STATUS_EXPIRING, STATUS_SUSPENDED
+
+# Campo da resposta de /api/licenses -> colunas de ``licenses`` de que ele depende.
+LICENSE_FIELDS: dict[str, tuple[str, ...]] = {
+    "id": ("license_id",),
+    "cliente": ("client_name",),
+    "modulo": (),
+    "status": ("status", "expires_at"),
+    "expira": ("expires_at",),
+}
+# Colunas sempre lidas: chave do cursor.
+CURSOR_COLUMNS = ("created_at", "license_id")
+MAX_PAGE_SIZE = 1000
+# Mesma janela de license_status: "Expirando" enquanto faltarem até 30 dias
+# inteiros, ou seja, vencimento antes de agora + 31 dias.
+EXPIRING_WINDOW = timedelta(days=31)
+
+_NOT_SUSPENDED = "or(status.is.null,and(status.not.ilike.suspended,status.not.ilike.suspensa))"
+
+
+class LicenseQueryError(ValueError):
+    """Parâmetros inválidos na listagem de licenças."""
+
+
+def _quoted(moment: datetime) -> str:
+    # Aspas: o valor tem ':' e '+', reservados na árvore lógica do PostgREST.
+    return '"' + moment.isoformat(timespec="seconds") + '"'
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row.get(column) for column in CURSOR_COLUMNS], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, license_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as exc:
+        raise LicenseQueryError("Cursor inválido.") from exc
+    if not isinstance(created_at, str) or not isinstance(license_id, str):
+        raise LicenseQueryError("Cursor inválido.")
+    return created_at, license_id
+
+
+def status_conditions(status: str, now: datetime) -> list[str]:
+    """Filtro PostgREST equivalente a ``license_status(...) == status``."""
+    if status == STATUS_SUSPENDED:
+        return [f"or(status.ilike.suspended,status.ilike.suspensa,expires_at.lt.{_quoted(now)})"]
+    window_end = _quoted(now + EXPIRING_WINDOW)
+    if status == STATUS_EXPIRING:
+        return [_NOT_SUSPENDED, f"expires_at.gte.{_quoted(now)}", f"expires_at.lt.{window_end}"]
+    if status == STATUS_ACTIVE:
+        return [_NOT_SUSPENDED, f"or(expires_at.is.null,expires_at.gte.{window_end})"]
+    raise LicenseQueryError(
+        f"Status inválido: {status}. Use {STATUS_ACTIVE}, {STATUS_EXPIRING} ou {STATUS_SUSPENDED}."
+    )
+
+
+@dataclass(frozen=True)
+class LicenseQuery:
+    """Parâmetros de /api/licenses, traduzidos para a consulta do PostgREST.
+
+    Também é a chave do cache de listagens, por isso é imutável.
+    """
+
+    limit: int | None = None
+    offset: int = 0
+    cursor: str | None = None
+    status: str | None = None
+    expires_from: date | None = None
+    expires_to: date | None = None
+    fields: tuple[str, ...] = tuple(LICENSE_FIELDS)
+
+    def __post_init__(self):
+        if self.limit is not None and not 1 <= self.limit <= MAX_PAGE_SIZE:
+            raise LicenseQueryError(f"limit deve estar entre 1 e {MAX_PAGE_SIZE}.")
+        if self.offset < 0:
+            raise LicenseQueryError("offset não pode ser negativo.")
+        if self.status:
+            status_conditions(self.status, datetime.now(timezone.utc))
+        if self.cursor:
+            if self.offset:
+                raise LicenseQueryError("Use cursor ou offset, não os dois.")
+            decode_cursor(self.cursor)
+        if self.expires_from and self.expires_to and self.expires_from > self.expires_to:
+            raise LicenseQueryError("expires_from deve ser anterior a expires_to.")
+        unknown = [name for name in self.fields if name not in LICENSE_FIELDS]
+        if unknown or not self.fields:
+            raise LicenseQueryError(
+                f"Campos inválidos: {', '.join(unknown) or '(nenhum)'}. Disponíveis: {', '.join(LICENSE_FIELDS)}."
+            )
+
+    @classmethod
+    def from_params(cls, fields: str | None = None, **params) -> "LicenseQuery":
+        if fields:
+            params["fields"] = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        return cls(**params)
+
+    def select(self) -> str:
+        columns = dict.fromkeys(CURSOR_COLUMNS)
+        for name in self.fields:
+            columns.update(dict.fromkeys(LICENSE_FIELDS[name]))
+        return ",".join(columns)
+
+    def conditions(self, now: datetime | None = None) -> list[str]:
+        now = now or datetime.now(timezone.utc)
+        conditions: list[str] = []
+        if self.status:
+            conditions.extend(status_conditions(self.status, now))
+        if self.expires_from:
+            start = datetime.combine(self.expires_from, time.min, tzinfo=timezone.utc)
+            conditions.append(f"expires_at.gte.{_quoted(start)}")
+        if self.expires_to:
+            end = datetime.combine(self.expires_to + timedelta(days=1), time.min, tzinfo=timezone.utc)
+            conditions.append(f"expires_at.lt.{_quoted(end)}")
+        if self.cursor:
+            created_at, license_id = decode_cursor(self.cursor)
+            created_at, license_id = json.dumps(created_at), json.dumps(license_id)
+            conditions.append(
+                f"or(created_at.lt.{created_at},and(created_at.eq.{created_at},license_id.lt.{license_id}))"
+            )
+        return conditions
+
+    def next_cursor(self, rows: list[dict]) -> str | None:
+        """Cursor da página seguinte, ou ``None`` se esta foi a última."""
+        if self.limit is None or len(rows) < self.limit:
+            return None
+        return encode_cursor(rows[-1])
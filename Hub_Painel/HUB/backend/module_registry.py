@@ -1,5 +1,10 @@
+import json
+from collections.abc import Mapping
 from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
+
+from .ttl_cache import strong_etag
 
 
 @dataclass(frozen=True)
@@ -99,48 +104,80 @@ MODULES: tuple[ModuleEntry, ...] = (
 )
 
 
+def _catalog_item(module: ModuleEntry) -> dict:
+    return {
+        "module_id": module.module_id,
+        "module_label": module.label,
+        "area_id": module.area_id,
+        "area_label": module.area_label,
+        "is_active": True,
+    }
+
+
+def _area_module_item(module: ModuleEntry) -> dict:
+    return {
+        "id": module.module_id,
+        "label": module.label,
+        "description": module.description,
+    }
+
+
+@dataclass(frozen=True)
+class SerializedPayload:
+    """JSON pronto para resposta HTTP, com ETag forte derivado do conteúdo."""
+
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, value) -> "SerializedPayload":
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(body=body, etag=strong_etag(body))
+
+
+# Índices montados uma vez na importação; MODULES é constante.
+MODULES_BY_ID: Mapping[str, ModuleEntry] = MappingProxyType({module.module_id: module for module in MODULES})
+
+_by_area: dict[str, list[ModuleEntry]] = {}
+for _module in MODULES:
+    _by_area.setdefault(_module.area_id, []).append(_module)
+MODULES_BY_AREA: Mapping[str, tuple[ModuleEntry, ...]] = MappingProxyType(
+    {area_id: tuple(modules) for area_id, modules in _by_area.items()}
+)
+del _by_area, _module
+
+_CATALOG = [_catalog_item(module) for module in MODULES]
+_AREAS = [
+    {
+        "id": area_id,
+        "label": modules[0].area_label,
+        "modules": [_area_module_item(module) for module in modules],
+    }
+    for area_id, modules in MODULES_BY_AREA.items()
+]
+
+CATALOG_PAYLOAD = SerializedPayload.of(_CATALOG)
+AREAS_PAYLOAD = SerializedPayload.of(_AREAS)
+
+
 def list_module_entries() -> list[ModuleEntry]:
     return list(MODULES)
 
 
 def list_module_catalog() -> list[dict]:
+    return [dict(item) for item in _CATALOG]
+
+
+def list_areas_with_modules() -> list[dict]:
     return [
-        {
-            "module_id": module.module_id,
-            "module_label": module.label,
-            "area_id": module.area_id,
-            "area_label": module.area_label,
-            "is_active": True,
-        }
-        for module in MODULES
+        {**area, "modules": [dict(module) for module in area["modules"]]}
+        for area in _AREAS
     ]
 
 
-def list_areas_with_modules() -> list[dict]:
-    grouped: dict[str, dict] = {}
-
-    for module in MODULES:
-        area = grouped.setdefault(
-            module.area_id,
-            {
-                "id": module.area_id,
-                "label": module.area_label,
-                "modules": [],
-            },
-        )
-        area["modules"].append(
-            {
-                "id": module.module_id,
-                "label": module.label,
-                "description": module.description,
-            }
-        )
-
-    return list(grouped.values())
+def list_area_modules(area_id: str) -> tuple[ModuleEntry, ...]:
+    return MODULES_BY_AREA.get(area_id, ())
 
 
 def get_module(module_id: str) -> ModuleEntry | None:
-    for module in MODULES:
-        if module.module_id == module_id:
-            return module
-    return None
+    return MODULES_BY_ID.get(module_id)
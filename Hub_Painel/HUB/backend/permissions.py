@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from .supabase_async import AsyncSupabaseLicenseService
+
+PERMISSIONS_TTL_S = float(os.getenv("HANSU_PERMISSIONS_TTL_S") or 60)
+PERMISSIONS_NEGATIVE_TTL_S = float(os.getenv("HANSU_PERMISSIONS_NEGATIVE_TTL_S") or 10)
+PERMISSIONS_MAX_ENTRIES = int(os.getenv("HANSU_PERMISSIONS_MAX_ENTRIES") or 10_000)
+# Licenças por consulta na carga em lote; o filtro ``in`` vai na URL.
+LICENSES_PER_REQUEST = 100
+
+STATUS_ACTIVE = "Ativa"
+STATUS_EXPIRING = "Expirando"
+STATUS_SUSPENDED = "Suspensa"
+
+REASON_ALLOWED = "allowed"
+REASON_LICENSE_NOT_FOUND = "license_not_found"
+REASON_LICENSE_SUSPENDED = "license_suspended"
+REASON_LICENSE_EXPIRED = "license_expired"
+REASON_MODULE_NOT_ALLOWED = "module_not_allowed"
+
+
+def _is_suspended(status: str | None) -> bool:
+    return bool(status) and status.lower() in {"suspended", "suspensa"}
+
+
+def license_status(expires_at: str | None, status: str | None, now: datetime | None = None) -> str:
+    if _is_suspended(status):
+        return STATUS_SUSPENDED
+    if not expires_at:
+        return STATUS_ACTIVE
+
+    try:
+        expires_dt = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
+    except ValueError:
+        return STATUS_ACTIVE
+
+    now = now or datetime.now(timezone.utc)
+    if expires_dt < now:
+        return STATUS_SUSPENDED
+
+    days_left = (expires_dt - now).days
+    if days_left <= 30:
+        return STATUS_EXPIRING
+    return STATUS_ACTIVE
+
+
+@dataclass(frozen=True)
+class LicensePermissions:
+    """Retrato de uma licença no cache: status, validade e módulos liberados.
+
+    ``found=False`` registra que a licença não existe (cache negativo).
+    """
+
+    license_id: str
+    found: bool
+    status: str | None = None
+    expires_at: str | None = None
+    modules: frozenset[str] = frozenset()
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    def evaluate(self, module_id: str, now: datetime | None = None) -> dict:
+        """Mesmo formato do RPC ``can_access_module``: ``{"allowed", "reason"}``."""
+        if not self.found:
+            return {"allowed": False, "reason": REASON_LICENSE_NOT_FOUND}
+        # Validade avaliada a cada consulta, não na carga: uma licença pode
+        # vencer enquanto a entrada ainda está dentro do TTL.
+        if license_status(self.expires_at, self.status, now) == STATUS_SUSPENDED:
+            reason = REASON_LICENSE_SUSPENDED if _is_suspended(self.status) else REASON_LICENSE_EXPIRED
+            return {"allowed": False, "reason": reason}
+        if module_id not in self.modules:
+            return {"allowed": False, "reason": REASON_MODULE_NOT_ALLOWED}
+        return {"allowed": True, "reason": REASON_ALLOWED}
+
+
+class PermissionEvaluator:
+    """Responde ``can_access_module`` localmente, sem um RPC por verificação.
+
+    Na primeira consulta de uma licença são lidos o status/validade e o
+    conjunto de módulos liberados; o resultado fica em cache por ``ttl_s``.
+    Licenças inexistentes também vão para o cache, por ``negative_ttl_s``,
+    para que IDs inválidos repetidos não gerem uma consulta cada. O cache
+    guarda no máximo ``max_entries`` licenças (as usadas há mais tempo saem
+    primeiro) e, a cada carga, descarta as entradas vencidas.
+    :meth:`check_many` carrega todas as licenças ausentes do cache com duas
+    consultas por lote de :data:`LICENSES_PER_REQUEST`.
+
+    As consultas usam :class:`AsyncSupabaseLicenseService` e rodam no event
+    loop; o cache só é alterado entre ``await``s, então dispensa lock.
+    """
+
+    def __init__(
+        self,
+        service_factory: Callable[[], AsyncSupabaseLicenseService] = AsyncSupabaseLicenseService.from_env,
+        ttl_s: float = PERMISSIONS_TTL_S,
+        negative_ttl_s: float = PERMISSIONS_NEGATIVE_TTL_S,
+        max_entries: int = PERMISSIONS_MAX_ENTRIES,
+    ):
+        self.service_factory = service_factory
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.max_entries = max_entries
+        self._service: AsyncSupabaseLicenseService | None = None
+        self._entries: dict[str, LicensePermissions] = {}
+        self._generation = 0
+
+    @property
+    def service(self) -> AsyncSupabaseLicenseService:
+        if self._service is None:
+            self._service = self.service_factory()
+        return self._service
+
+    def _is_fresh(self, entry: LicensePermissions, now: float) -> bool:
+        ttl = self.ttl_s if entry.found else self.negative_ttl_s
+        return now - entry.fetched_at < ttl
+
+    async def _load(self, license_ids: list[str]) -> dict[str, LicensePermissions]:
+        loaded: dict[str, LicensePermissions] = {}
+        for start in range(0, len(license_ids), LICENSES_PER_REQUEST):
+            chunk = license_ids[start : start + LICENSES_PER_REQUEST]
+            licenses = {row["license_id"]: row for row in await self.service.list_licenses_by_id(chunk)}
+
+            modules: dict[str, set[str]] = {}
+            if licenses:
+                for row in await self.service.list_allowed_permissions_for_licenses(licenses):
+                    modules.setdefault(row["license_id"], set()).add(row["module_id"])
+
+            for license_id in chunk:
+                row = licenses.get(license_id)
+                if row is None:
+                    loaded[license_id] = LicensePermissions(license_id=license_id, found=False)
+                else:
+                    loaded[license_id] = LicensePermissions(
+                        license_id=license_id,
+                        found=True,
+                        status=row.get("status"),
+                        expires_at=row.get("expires_at"),
+                        modules=frozenset(modules.get(license_id, ())),
+                    )
+        return loaded
+
+    async def entries(self, license_ids: Iterable[str]) -> dict[str, LicensePermissions]:
+        """Entradas das licenças pedidas, carregando de uma vez as que faltam ou venceram."""
+        wanted = list(dict.fromkeys(license_ids))
+        now = time.monotonic()
+        generation = self._generation
+        found = {}
+        for license_id in wanted:
+            entry = self._entries.pop(license_id, None)
+            if entry is not None and self._is_fresh(entry, now):
+                # Reinserida no fim: a ordem do dict vai da menos à mais usada.
+                self._entries[license_id] = found[license_id] = entry
+
+        missing = [license_id for license_id in wanted if license_id not in found]
+        if missing:
+            loaded = await self._load(missing)
+            # Um invalidate() durante a carga vale mais que os dados lidos.
+            if generation == self._generation:
+                self._store(loaded)
+            found.update(loaded)
+        return found
+
+    def _store(self, loaded: dict[str, LicensePermissions]) -> None:
+        now = time.monotonic()
+        for license_id, entry in list(self._entries.items()):
+            if not self._is_fresh(entry, now):
+                del self._entries[license_id]
+        for license_id, entry in loaded.items():
+            self._entries.pop(license_id, None)
+            self._entries[license_id] = entry
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    async def check(self, license_id: str, module_id: str) -> dict:
+        return (await self.entries([license_id]))[license_id].evaluate(module_id)
+
+    async def check_many(self, pairs: Iterable[tuple[str, str]]) -> list[dict]:
+        """Avalia vários pares ``(license_id, module_id)``, na ordem recebida."""
+        pairs = list(pairs)
+        entries = await self.entries(license_id for license_id, _ in pairs)
+        now = datetime.now(timezone.utc)
+        return [
+            {"license_id": license_id, "module_id": module_id, **entries[license_id].evaluate(module_id, now)}
+            for license_id, module_id in pairs
+        ]
+
+    async def allowed_modules(self, license_id: str) -> frozenset[str]:
+        """Módulos liberados para a licença, ou vazio se ela não existir, estiver suspensa ou vencida."""
+        entry = (await self.entries([license_id]))[license_id]
+        if not entry.found or license_status(entry.expires_at, entry.status) == STATUS_SUSPENDED:
+            return frozenset()
+        return entry.modules
+
+    def invalidate(self, license_id: str | None = None) -> None:
+        self._generation += 1
+        if license_id is None:
+            self._entries.clear()
+            self._service = None
+        else:
+            self._entries.pop(license_id, None)
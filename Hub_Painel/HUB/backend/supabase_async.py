@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import urllib.parse
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from hansu_comum.http_transport import HttpResponse, TransportError
+from hansu_comum.permission_sync import (
+    PERMISSION_COLUMNS,
+    PERMISSIONS_CHUNK_SIZE,
+    PERMISSIONS_PAGE_SIZE,
+    PERMISSIONS_UPSERT_PREFER,
+    PERMISSIONS_UPSERT_QUERY,
+    diff_permissions,
+    permission_chunks,
+    sync_summary,
+)
+
+from .async_transport import AsyncHttpTransport, shared_async_transport
+from .supabase_client import (
+    LICENSE_COLUMNS,
+    LICENSE_ORDER,
+    SupabaseLicenseService,
+    SupabaseRequestError,
+    in_filter,
+    license_page_request,
+    parse_content_range_total,
+)
+
+MODULE_COLUMNS = "module_id,module_label,area_id,area_label,is_active"
+
+
+@dataclass
+class AsyncSupabaseLicenseService:
+    """Versão asyncio de :class:`SupabaseLicenseService`, com os mesmos métodos.
+
+    As chamadas não bloqueiam o event loop e usam o pool keep-alive de
+    :func:`shared_async_transport`, com a mesma política de retentativa do
+    transporte síncrono.
+    """
+
+    url: str
+    key: str
+    timeout_s: int = 15
+    transport: AsyncHttpTransport = field(default_factory=shared_async_transport, repr=False)
+
+    @classmethod
+    def from_env(cls, base_dir: Path | None = None):
+        config = SupabaseLicenseService.from_env(base_dir)
+        return cls(url=config.url, key=config.key, timeout_s=config.timeout_s)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        query: dict | None = None,
+        body: dict | list | None = None,
+        extra_headers: dict | None = None,
+    ) -> HttpResponse:
+        query_string = ""
+        if query:
+            query_string = "?" + urllib.parse.urlencode(query)
+
+        headers = {
+            "apikey": self.key,
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json",
+            "Prefer": "return=representation",
+        }
+        if extra_headers:
+            headers.update(extra_headers)
+
+        try:
+            return await self.transport.request(
+                method,
+                f"{self.url}/rest/v1/{path}{query_string}",
+                headers=headers,
+                body=json.dumps(body).encode("utf-8") if body is not None else None,
+                timeout=self.timeout_s,
+                retry_unsafe="resolution=merge-duplicates" in headers["Prefer"],
+            )
+        except TransportError as exc:
+            raise SupabaseRequestError(f"Falha de conexão com Supabase: {exc.reason}") from exc
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        query: dict | None = None,
+        body: dict | list | None = None,
+        extra_headers: dict | None = None,
+    ):
+        response = await self._send(method, path, query, body, extra_headers)
+        if response.status >= 400:
+            raise SupabaseRequestError(f"HTTP {response.status}: {response.text()}")
+
+        content = response.body.decode("utf-8")
+        return json.loads(content) if content else None
+
+    async def list_modules(self):
+        return await self._request(
+            "GET",
+            "modules",
+            {
+                "select": MODULE_COLUMNS,
+                "order": "area_label.asc,module_label.asc",
+            },
+        )
+
+    async def list_licenses(self):
+        return await self._request(
+            "GET",
+            "licenses",
+            {
+                "select": LICENSE_COLUMNS,
+                "order": "created_at.desc",
+            },
+        )
+
+    async def list_licenses_page(
+        self,
+        select: str = LICENSE_COLUMNS,
+        conditions: Iterable[str] = (),
+        order: str = LICENSE_ORDER,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> tuple[list[dict], int | None]:
+        query, headers = license_page_request(select, conditions, order, limit, offset)
+        response = await self._send("GET", "licenses", query, extra_headers=headers)
+        total = parse_content_range_total(response.headers.get("content-range"))
+        if response.status == 416:
+            return [], total
+        if response.status >= 400:
+            raise SupabaseRequestError(f"HTTP {response.status}: {response.text()}")
+        return json.loads(response.body.decode("utf-8") or "[]"), total
+
+    async def list_permissions(self):
+        return await self._request(
+            "GET",
+            "license_module_permissions",
+            {
+                "select": PERMISSION_COLUMNS,
+            },
+        )
+
+    async def list_allowed_modules_for_license(self, license_id: str):
+        return await self._request(
+            "GET",
+            "license_module_permissions",
+            {
+                "select": "module_id",
+                "license_id": f"eq.{license_id}",
+                "is_allowed": "eq.true",
+            },
+        ) or []
+
+    async def list_licenses_by_id(self, license_ids: Iterable[str]) -> list[dict]:
+        ids = sorted(set(license_ids))
+        if not ids:
+            return []
+        return await self._request(
+            "GET",
+            "licenses",
+            {
+                "select": "license_id,status,expires_at",
+                "license_id": in_filter(ids),
+            },
+        ) or []
+
+    async def list_allowed_permissions_for_licenses(self, license_ids: Iterable[str]) -> list[dict]:
+        ids = sorted(set(license_ids))
+        rows: list[dict] = []
+        while ids:
+            page = await self._request(
+                "GET",
+                "license_module_permissions",
+                {
+                    "select": "license_id,module_id",
+                    "license_id": in_filter(ids),
+                    "is_allowed": "eq.true",
+                    "order": "license_id.asc,module_id.asc",
+                    "limit": PERMISSIONS_PAGE_SIZE,
+                    "offset": len(rows),
+                },
+            ) or []
+            rows.extend(page)
+            if len(page) < PERMISSIONS_PAGE_SIZE:
+                break
+        return rows
+
+    async def create_module(self, payload: dict):
+        data = await self._request(
+            "POST",
+            "modules",
+            {
+                "on_conflict": "module_id",
+                "select": MODULE_COLUMNS,
+            },
+            body=payload,
+            extra_headers={
+                "Prefer": "resolution=merge-duplicates,return=representation",
+            },
+        )
+        return data[0] if isinstance(data, list) and data else data
+
+    async def create_license(self, payload: dict):
+        data = await self._request("POST", "licenses", {"select": LICENSE_COLUMNS}, body=payload)
+        return data[0] if isinstance(data, list) and data else data
+
+    async def update_license(self, license_id: str, payload: dict):
+        data = await self._request(
+            "PATCH",
+            "licenses",
+            {
+                "license_id": f"eq.{license_id}",
+                "select": LICENSE_COLUMNS,
+            },
+            body=payload,
+        )
+        return data[0] if isinstance(data, list) and data else data
+
+    async def upsert_permission(self, payload: dict):
+        data = await self._request(
+            "POST",
+            "license_module_permissions",
+            {
+                "on_conflict": "license_id,module_id",
+                "select": PERMISSION_COLUMNS,
+            },
+            body=payload,
+            extra_headers={
+                "Prefer": "resolution=merge-duplicates,return=representation",
+            },
+        )
+        return data[0] if isinstance(data, list) and data else data
+
+    async def upsert_permissions(self, rows: Iterable[dict], chunk_size: int = PERMISSIONS_CHUNK_SIZE) -> list[dict]:
+        """Lotes de ``chunk_size`` enviados em paralelo (cada lote é um upsert idempotente)."""
+        results = await asyncio.gather(
+            *(
+                self._request(
+                    "POST",
+                    "license_module_permissions",
+                    PERMISSIONS_UPSERT_QUERY,
+                    body=chunk,
+                    extra_headers={"Prefer": PERMISSIONS_UPSERT_PREFER},
+                )
+                for chunk in permission_chunks(rows, chunk_size)
+            )
+        )
+        return [row for data in results if isinstance(data, list) for row in data]
+
+    async def _list_all_permissions(self, page_size: int = PERMISSIONS_PAGE_SIZE) -> list[dict]:
+        rows: list[dict] = []
+        while True:
+            page = await self._request(
+                "GET",
+                "license_module_permissions",
+                {
+                    "select": PERMISSION_COLUMNS,
+                    "order": "license_id.asc,module_id.asc",
+                    "limit": page_size,
+                    "offset": len(rows),
+                },
+            ) or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    async def sync_permissions(
+        self,
+        desired: Mapping[tuple[str, str], bool] | Iterable[dict],
+        revoke_missing: bool = False,
+        chunk_size: int = PERMISSIONS_CHUNK_SIZE,
+    ) -> dict:
+        changes, summary = diff_permissions(desired, await self._list_all_permissions(), revoke_missing)
+        saved = await self.upsert_permissions(changes, chunk_size=chunk_size) if changes else []
+        return sync_summary(summary, changes, chunk_size, saved)
+
+    async def delete_permissions_by_module(self, module_id: str):
+        data = await self._request(
+            "DELETE",
+            "license_module_permissions",
+            {
+                "module_id": f"eq.{module_id}",
+                "select": PERMISSION_COLUMNS,
+            },
+        )
+        return data if isinstance(data, list) else []
+
+    async def delete_module(self, module_id: str):
+        data = await self._request(
+            "DELETE",
+            "modules",
+            {
+                "module_id": f"eq.{module_id}",
+                "select": MODULE_COLUMNS,
+            },
+        )
+        if isinstance(data, list) and data:
+            return data[0]
+        return {"module_id": module_id}
+
+    async def can_access_module(self, license_id: str, module_id: str):
+        result = await self._request(
+            "POST",
+            "rpc/can_access_module",
+            body={
+                "p_license_id": license_id,
+                "p_module_id": module_id,
+            },
+        )
+        if isinstance(result, list) and result:
+            return result[0]
+        if isinstance(result, dict):
+            return result
+        return {"allowed": False, "reason": "invalid_rpc_response"}
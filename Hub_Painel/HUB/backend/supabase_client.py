@@ -1,11 +1,26 @@
 import json
 import os
-import urllib.error
 import urllib.parse
-import urllib.request
+from collections.abc import Iterable, Mapping
 from dataclasses import dataclass, field
 from pathlib import Path
 
+from hansu_comum.http_transport import HttpResponse, HttpTransport, TransportError, shared_transport
+from hansu_comum.permission_sync import (
+    PERMISSION_COLUMNS,
+    PERMISSIONS_CHUNK_SIZE,
+    PERMISSIONS_PAGE_SIZE,
+    PERMISSIONS_UPSERT_PREFER,
+    PERMISSIONS_UPSERT_QUERY,
+    diff_permissions,
+    permission_chunks,
+    sync_summary,
+)
+
+LICENSE_COLUMNS = "license_id,client_name,status,expires_at,notes,metadata,created_at,updated_at"
+# license_id desempata created_at para que as páginas sejam estáveis.
+LICENSE_ORDER = "created_at.desc,license_id.desc"
+
 
 class SupabaseConfigError(Exception):
     """Erro de configuração de integração com Supabase."""
@@ -40,17 +55,61 @@ def _parse_dotenv(dotenv_path: Path) -> dict[str, str]:
     return loaded
 
 
+def license_page_request(
+    select: str,
+    conditions: Iterable[str] = (),
+    order: str = LICENSE_ORDER,
+    limit: int | None = None,
+    offset: int = 0,
+) -> tuple[dict, dict]:
+    """Query string e cabeçalhos de uma listagem paginada do PostgREST.
+
+    ``conditions`` são expressões da árvore lógica do PostgREST
+    (``"expires_at.gte.2025-01-01"``, ``"or(status.is.null,...)"``),
+    combinadas com ``and``. A página vai no cabeçalho ``Range`` e o total
+    é pedido com ``Prefer: count=estimated``.
+    """
+    query = {"select": select, "order": order}
+    conditions = list(conditions)
+    if conditions:
+        query["and"] = f"({','.join(conditions)})"
+
+    last = "" if limit is None else str(offset + limit - 1)
+    headers = {
+        "Range-Unit": "items",
+        "Range": f"{offset}-{last}",
+        "Prefer": "count=estimated",
+    }
+    return query, headers
+
+
+def in_filter(values: Iterable[str]) -> str:
+    """Filtro ``in.("a","b")`` do PostgREST com cada valor entre aspas.
+
+    Sem aspas, uma vírgula ou parêntese num ID vindo do cliente mudaria a
+    lista consultada; ``"`` e ``\\`` dentro do valor são escapados.
+    """
+    quoted = ('"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values)
+    return f"in.({','.join(quoted)})"
+
+
+def parse_content_range_total(content_range: str | None) -> int | None:
+    """Total de ``Content-Range: 0-49/1234`` (``None`` quando vier ``*``)."""
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
 @dataclass
 class SupabaseLicenseService:
     url: str
     key: str
     timeout_s: int = 15
-    _opener: urllib.request.OpenerDirector = field(init=False, repr=False)
-
-    def __post_init__(self):
-        # Evita problemas com proxies do ambiente que interceptam HTTPS e
-        # costumam retornar 403 em chamadas para o Supabase.
-        self._opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    # Pool keep-alive compartilhado pelo processo. O transporte também
+    # ignora proxies do ambiente, que interceptam HTTPS e costumam retornar
+    # 403 em chamadas para o Supabase.
+    transport: HttpTransport = field(default_factory=shared_transport, repr=False)
 
     @classmethod
     def from_env(cls, base_dir: Path | None = None):
@@ -101,14 +160,14 @@ class SupabaseLicenseService:
             f"nas variáveis de ambiente ou em .env/.env.local. {detail}"
         )
 
-    def _request(
+    def _send(
         self,
         method: str,
         path: str,
         query: dict | None = None,
-        body: dict | None = None,
+        body: dict | list | None = None,
         extra_headers: dict | None = None,
-    ):
+    ) -> HttpResponse:
         query_string = ""
         if query:
             query_string = "?" + urllib.parse.urlencode(query)
@@ -122,23 +181,34 @@ class SupabaseLicenseService:
         if extra_headers:
             headers.update(extra_headers)
 
-        req = urllib.request.Request(
-            f"{self.url}/rest/v1/{path}{query_string}",
-            method=method,
-            headers=headers,
-            data=json.dumps(body).encode("utf-8") if body is not None else None,
-        )
-
         try:
-            with self._opener.open(req, timeout=self.timeout_s) as response:
-                content = response.read().decode("utf-8")
-                return json.loads(content) if content else None
-        except urllib.error.HTTPError as exc:
-            detail = exc.read().decode("utf-8", errors="ignore")
-            raise SupabaseRequestError(f"HTTP {exc.code}: {detail}") from exc
-        except urllib.error.URLError as exc:
+            return self.transport.request(
+                method,
+                f"{self.url}/rest/v1/{path}{query_string}",
+                headers=headers,
+                body=json.dumps(body).encode("utf-8") if body is not None else None,
+                timeout=self.timeout_s,
+                # upserts com merge-duplicates podem ser repetidos sem efeito colateral
+                retry_unsafe="resolution=merge-duplicates" in headers["Prefer"],
+            )
+        except TransportError as exc:
             raise SupabaseRequestError(f"Falha de conexão com Supabase: {exc.reason}") from exc
 
+    def _request(
+        self,
+        method: str,
+        path: str,
+        query: dict | None = None,
+        body: dict | list | None = None,
+        extra_headers: dict | None = None,
+    ):
+        response = self._send(method, path, query, body, extra_headers)
+        if response.status >= 400:
+            raise SupabaseRequestError(f"HTTP {response.status}: {response.text()}")
+
+        content = response.body.decode("utf-8")
+        return json.loads(content) if content else None
+
     def list_modules(self):
         return self._request(
             "GET",
@@ -154,11 +224,32 @@ class SupabaseLicenseService:
             "GET",
             "licenses",
             {
-                "select": "license_id,client_name,status,expires_at,notes,metadata,created_at,updated_at",
+                "select": LICENSE_COLUMNS,
                 "order": "created_at.desc",
             },
         )
 
+    def list_licenses_page(
+        self,
+        select: str = LICENSE_COLUMNS,
+        conditions: Iterable[str] = (),
+        order: str = LICENSE_ORDER,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> tuple[list[dict], int | None]:
+        """Uma página de licenças e o total estimado, com filtro e projeção no PostgREST.
+
+        Ver :func:`license_page_request` para o formato de ``conditions``.
+        """
+        query, headers = license_page_request(select, conditions, order, limit, offset)
+        response = self._send("GET", "licenses", query, extra_headers=headers)
+        total = parse_content_range_total(response.headers.get("content-range"))
+        if response.status == 416:
+            return [], total
+        if response.status >= 400:
+            raise SupabaseRequestError(f"HTTP {response.status}: {response.text()}")
+        return json.loads(response.body.decode("utf-8") or "[]"), total
+
     def list_permissions(self):
         return self._request(
             "GET",
@@ -180,6 +271,44 @@ class SupabaseLicenseService:
             },
         ) or []
 
+    def list_licenses_by_id(self, license_ids: Iterable[str]) -> list[dict]:
+        """Status e validade de várias licenças em uma consulta (filtro ``in``)."""
+        ids = sorted(set(license_ids))
+        if not ids:
+            return []
+        return self._request(
+            "GET",
+            "licenses",
+            {
+                "select": "license_id,status,expires_at",
+                "license_id": in_filter(ids),
+            },
+        ) or []
+
+    def list_allowed_permissions_for_licenses(self, license_ids: Iterable[str]) -> list[dict]:
+        """Pares ``license_id``/``module_id`` liberados para várias licenças.
+
+        Uma consulta com filtro ``in``, paginada como :meth:`_list_all_permissions`.
+        """
+        ids = sorted(set(license_ids))
+        rows: list[dict] = []
+        while ids:
+            page = self._request(
+                "GET",
+                "license_module_permissions",
+                {
+                    "select": "license_id,module_id",
+                    "license_id": in_filter(ids),
+                    "is_allowed": "eq.true",
+                    "order": "license_id.asc,module_id.asc",
+                    "limit": PERMISSIONS_PAGE_SIZE,
+                    "offset": len(rows),
+                },
+            ) or []
+            rows.extend(page)
+            if len(page) < PERMISSIONS_PAGE_SIZE:
+                break
+        return rows
 
     def create_module(self, payload: dict):
         data = self._request(
@@ -201,7 +330,7 @@ class SupabaseLicenseService:
             "POST",
             "licenses",
             {
-                "select": "license_id,client_name,status,expires_at,notes,metadata,created_at,updated_at",
+                "select": LICENSE_COLUMNS,
             },
             body=payload,
         )
@@ -213,7 +342,7 @@ class SupabaseLicenseService:
             "licenses",
             {
                 "license_id": f"eq.{license_id}",
-                "select": "license_id,client_name,status,expires_at,notes,metadata,created_at,updated_at",
+                "select": LICENSE_COLUMNS,
             },
             body=payload,
         )
@@ -234,6 +363,52 @@ class SupabaseLicenseService:
         )
         return data[0] if isinstance(data, list) and data else data
 
+    def upsert_permissions(self, rows: Iterable[dict], chunk_size: int = PERMISSIONS_CHUNK_SIZE) -> list[dict]:
+        """Upsert de várias permissões, um POST com array por lote de ``chunk_size``."""
+        saved: list[dict] = []
+        for chunk in permission_chunks(rows, chunk_size):
+            data = self._request(
+                "POST",
+                "license_module_permissions",
+                PERMISSIONS_UPSERT_QUERY,
+                body=chunk,
+                extra_headers={"Prefer": PERMISSIONS_UPSERT_PREFER},
+            )
+            saved.extend(data if isinstance(data, list) else [])
+        return saved
+
+    def _list_all_permissions(self, page_size: int = PERMISSIONS_PAGE_SIZE) -> list[dict]:
+        """Todas as permissões, paginando para não esbarrar no max-rows do PostgREST."""
+        rows: list[dict] = []
+        while True:
+            page = self._request(
+                "GET",
+                "license_module_permissions",
+                {
+                    "select": PERMISSION_COLUMNS,
+                    "order": "license_id.asc,module_id.asc",
+                    "limit": page_size,
+                    "offset": len(rows),
+                },
+            ) or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    def sync_permissions(
+        self,
+        desired: Mapping[tuple[str, str], bool] | Iterable[dict],
+        revoke_missing: bool = False,
+        chunk_size: int = PERMISSIONS_CHUNK_SIZE,
+    ) -> dict:
+        """Aplica o estado desejado de permissões enviando só o que mudou.
+
+        A tabela atual é lida uma vez e comparada por :func:`diff_permissions`;
+        as diferenças vão em lotes por :meth:`upsert_permissions`.
+        """
+        changes, summary = diff_permissions(desired, self._list_all_permissions(), revoke_missing)
+        saved = self.upsert_permissions(changes, chunk_size=chunk_size) if changes else []
+        return sync_summary(summary, changes, chunk_size, saved)
 
     def delete_permissions_by_module(self, module_id: str):
         data = self._request(
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable
+
+
+@dataclass(frozen=True)
+class CachedEntry:
+    value: Any
+    payload: bytes
+    etag: str
+    fetched_at: float = field(default_factory=time.monotonic)
+
+
+Loader = Callable[[], Awaitable[tuple[Any, bytes]]]
+
+
+def strong_etag(payload: bytes) -> str:
+    return '"' + hashlib.sha256(payload).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header covers ``etag`` (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+class TTLCache:
+    """In-process cache with TTL and stale-while-revalidate, for asyncio code.
+
+    Within ``ttl_s`` an entry is served as is. Between ``ttl_s`` and
+    ``ttl_s + stale_s`` it is still served, while a single background task
+    reloads it; if that reload fails the stale value stays until the window
+    closes. Past the window (or on a miss) the caller awaits the load, and
+    concurrent callers for the same key share that one load instead of each
+    hitting the backend.
+
+    ``loader`` is an async callable returning ``(value, payload_bytes)``.
+    The payload is kept so hits can be served without re-serializing, and
+    the ETag is derived from it so equal content always gets the same tag.
+    At most ``max_entries`` keys are kept; the oldest load is evicted first.
+    """
+
+    def __init__(self, ttl_s: float, stale_s: float = 0.0, max_entries: int = 256):
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, CachedEntry] = {}
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        self.last_refresh_error: str | None = None
+
+    async def _load(self, key: Hashable, loader: Loader) -> CachedEntry:
+        generation = self._generation
+        value, payload = await loader()
+        entry = CachedEntry(value=value, payload=payload, etag=strong_etag(payload))
+        # An invalidate() issued while loading wins over the older data.
+        if generation == self._generation:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            # dicts keep insertion order, so the first key is the oldest load
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        return entry
+
+    def _start_load(self, key: Hashable, loader: Loader) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_load(key, done))
+        return task
+
+    def _finish_load(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        error = task.exception()
+        self.last_refresh_error = (str(error) or type(error).__name__) if error else None
+
+    async def get(self, key: Hashable, loader: Loader) -> CachedEntry:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl_s:
+                return entry
+            if age < self.ttl_s + self.stale_s:
+                self._start_load(key, loader)
+                return entry
+
+        # shield: a caller that disconnects must not cancel the shared load
+        return await asyncio.shield(self._start_load(key, loader))
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -1,11 +1,23 @@
 import json
 import os
-import urllib.error
 import urllib.parse
-import urllib.request
-from dataclasses import dataclass
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from hansu_comum.http_transport import HttpTransport, TransportError, shared_transport
+from hansu_comum.permission_sync import (
+    PERMISSION_COLUMNS,
+    PERMISSIONS_CHUNK_SIZE,
+    PERMISSIONS_PAGE_SIZE,
+    PERMISSIONS_UPSERT_PREFER,
+    PERMISSIONS_UPSERT_QUERY,
+    diff_permissions,
+    permission_chunks,
+    sync_summary,
+)
+
+
 
 class SupabaseConfigError(Exception):
     pass
@@ -35,6 +47,7 @@ def _parse_dotenv(path: Path) -> dict[str, str]:
 class SupabaseAdminService:
     url: str
     key: str
+    transport: HttpTransport = field(default_factory=shared_transport, repr=False)
 
     @classmethod
     def from_env(cls, base_dir: Path):
@@ -62,30 +75,31 @@ class SupabaseAdminService:
 
         return cls(url=url, key=key)
 
-    def _request(self, method: str, path: str, query: dict | None = None, body: dict | None = None, prefer: str = "return=representation"):
+    def _request(self, method: str, path: str, query: dict | None = None, body: dict | list | None = None, prefer: str = "return=representation"):
         query_string = "?" + urllib.parse.urlencode(query) if query else ""
-        req = urllib.request.Request(
-            f"{self.url}/rest/v1/{path}{query_string}",
-            method=method,
-            headers={
-                "apikey": self.key,
-                "Authorization": f"Bearer {self.key}",
-                "Content-Type": "application/json",
-                "Prefer": prefer,
-            },
-            data=json.dumps(body).encode("utf-8") if body is not None else None,
-        )
-        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
         try:
-            with opener.open(req, timeout=15) as resp:
-                content = resp.read().decode("utf-8")
-                return json.loads(content) if content else None
-        except urllib.error.HTTPError as exc:
-            detail = exc.read().decode("utf-8", errors="ignore")
-            raise SupabaseRequestError(f"HTTP {exc.code}: {detail}") from exc
-        except urllib.error.URLError as exc:
+            response = self.transport.request(
+                method,
+                f"{self.url}/rest/v1/{path}{query_string}",
+                headers={
+                    "apikey": self.key,
+                    "Authorization": f"Bearer {self.key}",
+                    "Content-Type": "application/json",
+                    "Prefer": prefer,
+                },
+                body=json.dumps(body).encode("utf-8") if body is not None else None,
+                timeout=15,
+                retry_unsafe="resolution=merge-duplicates" in prefer,
+            )
+        except TransportError as exc:
             raise SupabaseRequestError(f"Falha de conexão: {exc.reason}") from exc
 
+        if response.status >= 400:
+            raise SupabaseRequestError(f"HTTP {response.status}: {response.text()}")
+
+        content = response.body.decode("utf-8")
+        return json.loads(content) if content else None
+
     def list_modules(self):
         return self._request("GET", "modules", {"select": "module_id,module_label,is_active", "is_active": "eq.true"}) or []
 
@@ -124,3 +138,45 @@ class SupabaseAdminService:
             prefer="resolution=merge-duplicates,return=representation",
         )
         return data[0] if isinstance(data, list) and data else data
+
+    def upsert_permissions(self, rows: Iterable[dict], chunk_size: int = PERMISSIONS_CHUNK_SIZE) -> list[dict]:
+        """Upsert de várias permissões, um POST com array por lote de ``chunk_size``."""
+        saved: list[dict] = []
+        for chunk in permission_chunks(rows, chunk_size):
+            data = self._request(
+                "POST",
+                "license_module_permissions",
+                PERMISSIONS_UPSERT_QUERY,
+                chunk,
+                prefer=PERMISSIONS_UPSERT_PREFER,
+            )
+            saved.extend(data if isinstance(data, list) else [])
+        return saved
+
+    def _list_all_permissions(self, page_size: int = PERMISSIONS_PAGE_SIZE) -> list[dict]:
+        rows: list[dict] = []
+        while True:
+            page = self._request(
+                "GET",
+                "license_module_permissions",
+                {"select": PERMISSION_COLUMNS, "order": "license_id.asc,module_id.asc", "limit": page_size, "offset": len(rows)},
+            ) or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    def sync_permissions(
+        self,
+        desired: Mapping[tuple[str, str], bool] | Iterable[dict],
+        revoke_missing: bool = False,
+        chunk_size: int = PERMISSIONS_CHUNK_SIZE,
+    ) -> dict:
+        """Lê as permissões atuais uma vez e envia em lote só os pares que mudaram.
+
+        ``desired``: ``{(license_id, module_id): is_allowed}`` ou linhas com
+        essas chaves. ``revoke_missing=True`` revoga permissões liberadas que
+        não constam de ``desired``.
+        """
+        changes, summary = diff_permissions(desired, self._list_all_permissions(), revoke_missing)
+        saved = self.upsert_permissions(changes, chunk_size=chunk_size) if changes else []
+        return sync_summary(summary, changes, chunk_size, saved)
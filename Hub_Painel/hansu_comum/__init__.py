@@ -0,0 +1,7 @@
+"""Módulos compartilhados pelos pacotes do Hub_Painel.
+
+Cada extrator, o HUB e o gerador de licenças têm o próprio pacote
+(``backend``/``pgdas_backend``) e tornam esta pasta importável no seu
+``__init__``; o código comum fica aqui uma única vez em vez de copiado em
+cada pacote.
+"""
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+__all__ = [
+    "CacheExtracao",
+    "cache_padrao",
+    "em_cache",
+    "hash_conteudo",
+]
+
+LIMITE_PADRAO_BYTES = 512 * 1024 * 1024
+_BUFFER_HASH = 1 << 20
+# O processo do HUB fica no ar por dias recebendo arquivos novos; a memória
+# de hashes guarda só os mais recentes.
+LIMITE_HASHES_CONHECIDOS = 4096
+
+_hashes_conhecidos: OrderedDict[Tuple[str, int, int], str] = OrderedDict()
+_trava_hashes = threading.Lock()
+
+
+def hash_conteudo(caminho: str | Path) -> str:
+    """SHA-256 do conteúdo do arquivo.
+
+    O resultado fica memorizado no processo por (caminho, tamanho, mtime),
+    então consultas repetidas ao mesmo arquivo não o releem. Só os
+    :data:`LIMITE_HASHES_CONHECIDOS` usados mais recentemente são mantidos.
+    """
+    caminho = Path(caminho)
+    info = caminho.stat()
+    chave = (str(caminho.resolve()), info.st_size, info.st_mtime_ns)
+    with _trava_hashes:
+        conhecido = _hashes_conhecidos.get(chave)
+        if conhecido:
+            _hashes_conhecidos.move_to_end(chave)
+            return conhecido
+
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(_BUFFER_HASH), b""):
+            digest.update(bloco)
+
+    with _trava_hashes:
+        _hashes_conhecidos[chave] = digest.hexdigest()
+        while len(_hashes_conhecidos) > LIMITE_HASHES_CONHECIDOS:
+            _hashes_conhecidos.popitem(last=False)
+    return digest.hexdigest()
+
+
+def _caminho_padrao() -> Path:
+    base = os.getenv("HANSU_CACHE_DIR") or Path.home() / ".hansu"
+    return Path(base) / "cache_extracao.sqlite"
+
+
+class CacheExtracao:
+    """Cache local (SQLite) de resultados de extração.
+
+    A chave combina o hash do conteúdo do arquivo, o nome e a versão do
+    extrator e os parâmetros da chamada. Ao passar de ``limite_bytes``, as
+    entradas acessadas há mais tempo são removidas (LRU). Cada operação
+    abre a própria conexão, então o cache pode ser usado por threads e
+    pelos processos dos modos em lote.
+    """
+
+    def __init__(self, caminho: str | Path | None = None, limite_bytes: int = LIMITE_PADRAO_BYTES):
+        self.caminho = Path(caminho) if caminho else _caminho_padrao()
+        self.limite_bytes = limite_bytes
+        self.acertos = 0
+        self.falhas = 0
+        self._trava = threading.Lock()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS resultados (
+                    chave TEXT PRIMARY KEY,
+                    extrator TEXT NOT NULL,
+                    versao TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    valor BLOB NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    acessado_em REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_acesso ON resultados (acessado_em)")
+
+    @contextlib.contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def montar_chave(sha256: str, extrator: str, versao: str, parametros: Any = ()) -> str:
+        bruto = f"{extrator}\0{versao}\0{sha256}\0{parametros!r}"
+        return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+    def obter(self, chave: str) -> Tuple[bool, Any]:
+        """Devolve ``(encontrado, valor)`` e atualiza o acesso da entrada."""
+        with self._conectar() as conn:
+            linha = conn.execute("SELECT valor FROM resultados WHERE chave = ?", (chave,)).fetchone()
+            if linha:
+                conn.execute("UPDATE resultados SET acessado_em = ? WHERE chave = ?", (time.time(), chave))
+
+        encontrado = False
+        valor = None
+        if linha:
+            try:
+                valor = pickle.loads(linha[0])
+                encontrado = True
+            except Exception:  # entrada gravada por outra versão do código
+                self.invalidar(chave=chave)
+
+        with self._trava:
+            if encontrado:
+                self.acertos += 1
+            else:
+                self.falhas += 1
+        return encontrado, valor
+
+    def gravar(self, chave: str, valor: Any, extrator: str, versao: str, sha256: str) -> None:
+        dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(dados) > self.limite_bytes:
+            return
+
+        with self._conectar() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chave, extrator, versao, sha256, dados, len(dados), time.time()),
+            )
+            self._aplicar_limite(conn)
+
+    def _aplicar_limite(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+
+        excedente = total - self.limite_bytes
+        remover = []
+        for chave, tamanho in conn.execute("SELECT chave, tamanho FROM resultados ORDER BY acessado_em"):
+            remover.append((chave,))
+            excedente -= tamanho
+            if excedente <= 0:
+                break
+        conn.executemany("DELETE FROM resultados WHERE chave = ?", remover)
+
+    def obter_ou_calcular(
+        self,
+        caminho: str | Path,
+        extrator: str,
+        versao: str,
+        calcular: Callable[[], Any],
+        parametros: Any = (),
+    ) -> Any:
+        """Devolve o resultado em cache para ``caminho`` ou executa ``calcular``."""
+        sha256 = hash_conteudo(caminho)
+        chave = self.montar_chave(sha256, extrator, versao, parametros)
+        encontrado, valor = self.obter(chave)
+        if encontrado:
+            return valor
+
+        valor = calcular()
+        self.gravar(chave, valor, extrator, versao, sha256)
+        return valor
+
+    def invalidar(
+        self,
+        extrator: Optional[str] = None,
+        caminho: str | Path | None = None,
+        chave: Optional[str] = None,
+    ) -> int:
+        """Remove entradas por extrator, por arquivo e/ou por chave.
+
+        Sem filtros, esvazia o cache. Devolve a quantidade removida.
+        """
+        condicoes = []
+        valores: list = []
+        if extrator:
+            condicoes.append("extrator = ?")
+            valores.append(extrator)
+        if caminho:
+            condicoes.append("sha256 = ?")
+            valores.append(hash_conteudo(caminho))
+        if chave:
+            condicoes.append("chave = ?")
+            valores.append(chave)
+
+        filtro = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        with self._conectar() as conn:
+            return conn.execute(f"DELETE FROM resultados{filtro}", valores).rowcount
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._conectar() as conn:
+            entradas, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM resultados"
+            ).fetchone()
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "entradas": entradas,
+            "bytes": total,
+            "limite_bytes": self.limite_bytes,
+        }
+
+
+_cache_padrao: Optional[CacheExtracao] = None
+_trava_padrao = threading.Lock()
+
+
+def cache_padrao() -> Optional[CacheExtracao]:
+    """Cache compartilhado do processo; ``None`` se desativado.
+
+    Configurável por ``HANSU_CACHE_DIR``, ``HANSU_CACHE_LIMITE_MB`` e
+    ``HANSU_CACHE_DESATIVADO=1``.
+    """
+    global _cache_padrao
+    if os.getenv("HANSU_CACHE_DESATIVADO") == "1":
+        return None
+
+    with _trava_padrao:
+        if _cache_padrao is None:
+            limite_mb = os.getenv("HANSU_CACHE_LIMITE_MB")
+            limite = int(limite_mb) * 1024 * 1024 if limite_mb else LIMITE_PADRAO_BYTES
+            try:
+                _cache_padrao = CacheExtracao(limite_bytes=limite)
+            except (OSError, sqlite3.Error):
+                return None
+        return _cache_padrao
+
+
+def em_cache(
+    extrator: str,
+    versao: str,
+    ignorar: Tuple[str, ...] = (),
+    por_nome: bool = False,
+) -> Callable:
+    """Decorador para funções ``f(caminho, *args, **kwargs)``.
+
+    O resultado é guardado no :func:`cache_padrao` usando o conteúdo de
+    ``caminho`` e os demais argumentos (exceto os nomeados em ``ignorar``).
+    Com ``por_nome=True`` o nome do arquivo também entra na chave, para
+    resultados que o incluem. A chamada aceita ``usar_cache=False`` para
+    ignorar o cache.
+    """
+
+    def decorador(funcao: Callable) -> Callable:
+        @functools.wraps(funcao)
+        def envoltorio(caminho, *args, usar_cache: bool = True, **kwargs):
+            cache = cache_padrao() if usar_cache else None
+            if cache is None:
+                return funcao(caminho, *args, **kwargs)
+
+            parametros = (args, sorted((k, v) for k, v in kwargs.items() if k not in ignorar))
+            if por_nome:
+                parametros += (Path(caminho).name,)
+            return cache.obter_ou_calcular(
+                caminho,
+                extrator,
+                versao,
+                lambda: funcao(caminho, *args, **kwargs),
+                parametros,
+            )
+
+        return envoltorio
+
+    return decorador
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+__all__ = [
+    "executar_edicao_lote",
+    "hash_arquivo",
+    "listar_arquivos",
+]
+
+PREFIXO_EDITADO = "EDITADO_"
+_BUFFER_HASH = 1 << 20
+
+
+def listar_arquivos(origem: str | Path, padrao: str = "*.txt") -> List[Path]:
+    """Resolve ``origem`` (pasta, varrida recursivamente, ou glob) em arquivos.
+
+    Arquivos já gerados pelos editores (prefixo ``EDITADO_``) são ignorados
+    para que uma nova execução na mesma pasta não os reprocesse.
+    """
+    caminho = Path(origem)
+    if caminho.is_dir():
+        candidatos = caminho.rglob(padrao)
+    else:
+        candidatos = (Path(item) for item in glob.glob(str(origem), recursive=True))
+
+    return sorted(
+        item for item in candidatos
+        if item.is_file() and not item.name.startswith(PREFIXO_EDITADO)
+    )
+
+
+def hash_arquivo(caminho: str | Path) -> str:
+    """SHA-256 do conteúdo, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(_BUFFER_HASH), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def _carregar_manifesto(caminho: Path) -> Dict[str, dict]:
+    try:
+        return json.loads(caminho.read_text(encoding="utf-8")).get("arquivos", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def _gravar_manifesto(caminho: Path, arquivos: Dict[str, dict]) -> None:
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(caminho.name + ".tmp")
+    temporario.write_text(
+        json.dumps(
+            {"gerado_em": datetime.now().isoformat(timespec="seconds"), "arquivos": arquivos},
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(temporario, caminho)
+
+
+def _mesmo_caminho(a: str | Path, b: str | Path) -> bool:
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+def _atualizado(
+    anterior: Optional[dict],
+    alvo: dict,
+    sha256: Optional[str],
+    info: os.stat_result,
+    destino_esperado: str | Path | None = None,
+) -> bool:
+    """Indica se a saída registrada em ``anterior`` continua válida."""
+    if not anterior or anterior.get("status") not in {"ok", "atualizado"}:
+        return False
+    if anterior.get("alvo") != alvo:
+        return False
+
+    destino = anterior.get("destino")
+    if not destino or not Path(destino).is_file():
+        return False
+    if destino_esperado is not None and not _mesmo_caminho(destino, destino_esperado):
+        return False
+
+    if sha256 is None:
+        return anterior.get("tamanho") == info.st_size and anterior.get("mtime_ns") == info.st_mtime_ns
+    return anterior.get("sha256") == sha256
+
+
+def _destinos_em_conflito(
+    arquivos: List[Path],
+    destino_de: Callable[[Path], str | Path],
+) -> Dict[Path, Tuple[str, List[str]]]:
+    """Arquivos cujo destino coincide com o de outro arquivo do lote.
+
+    Devolve ``{arquivo: (destino, outros_arquivos)}``; a comparação ignora
+    maiúsculas onde o sistema de arquivos também ignora (Windows).
+    """
+    por_destino: Dict[str, List[Path]] = {}
+    for caminho in arquivos:
+        destino = os.path.normcase(os.path.abspath(destino_de(caminho)))
+        por_destino.setdefault(destino, []).append(caminho)
+
+    conflitos: Dict[Path, Tuple[str, List[str]]] = {}
+    for destino, caminhos in por_destino.items():
+        if len(caminhos) > 1:
+            for caminho in caminhos:
+                conflitos[caminho] = (destino, [str(outro) for outro in caminhos if outro is not caminho])
+    return conflitos
+
+
+def executar_edicao_lote(
+    arquivos: List[Path],
+    alvo_de: Callable[[Path], Optional[dict]],
+    editar: Callable[[Path, dict], str | Path],
+    caminho_manifesto: str | Path,
+    max_workers: int = 4,
+    destino_de: Callable[[Path], str | Path] | None = None,
+) -> Dict[str, dict]:
+    """Edita ``arquivos`` em paralelo (threads) e grava um manifesto JSON.
+
+    Parameters
+    ----------
+    arquivos : list[Path]
+        Arquivos de entrada (ver :func:`listar_arquivos`).
+    alvo_de : Callable[[Path], dict | None]
+        Devolve os parâmetros da edição de um arquivo (ex.: novo CNPJ/IE)
+        ou ``None`` quando o arquivo não consta do mapeamento.
+    editar : Callable[[Path, dict], str | Path]
+        Executa a edição e devolve o caminho gerado.
+    caminho_manifesto : str | Path
+        JSON com hash de entrada, destino, tempo e status de cada arquivo.
+        Se já existir, arquivos com mesma entrada, mesmo alvo e destino
+        presente são marcados como ``atualizado`` e não são reescritos.
+    max_workers : int
+        Limite de arquivos lidos/gravados ao mesmo tempo.
+    destino_de : Callable[[Path], str | Path] | None
+        Caminho que ``editar`` vai gerar para um arquivo, sem criá-lo.
+        Arquivos do mapeamento cujo destino coincide com o de outro arquivo
+        do lote ficam com status ``erro`` em vez de se sobrescreverem.
+    """
+    caminho_manifesto = Path(caminho_manifesto)
+    anteriores = _carregar_manifesto(caminho_manifesto)
+    conflitos = _destinos_em_conflito(arquivos, destino_de) if destino_de is not None else {}
+
+    def _processar(caminho: Path) -> dict:
+        inicio = time.perf_counter()
+        chave = str(caminho.resolve())
+        anterior = anteriores.get(chave)
+        registro: dict = {"entrada": chave, "destino": None, "erro": None}
+
+        try:
+            # Saídas gravadas com outro nome (regra antiga) são refeitas.
+            destino_esperado = destino_de(caminho) if destino_de is not None else None
+            info = caminho.stat()
+            registro.update(tamanho=info.st_size, mtime_ns=info.st_mtime_ns)
+
+            alvo = alvo_de(caminho)
+            registro["alvo"] = alvo
+            if alvo is None:
+                registro["status"] = "sem_mapeamento"
+            elif caminho in conflitos:
+                destino, outros = conflitos[caminho]
+                registro.update(status="erro", erro=f"Destino {destino} também é gerado por: {', '.join(outros)}")
+            elif _atualizado(anterior, alvo, None, info, destino_esperado):
+                registro.update(sha256=anterior.get("sha256"), destino=anterior["destino"], status="atualizado")
+            else:
+                registro["sha256"] = hash_arquivo(caminho)
+                if _atualizado(anterior, alvo, registro["sha256"], info, destino_esperado):
+                    registro.update(destino=anterior["destino"], status="atualizado")
+                else:
+                    registro.update(destino=str(editar(caminho, alvo)), status="ok")
+        except Exception as exc:  # um arquivo com falha não interrompe o lote
+            registro.update(status="erro", erro=str(exc))
+
+        registro["segundos"] = round(time.perf_counter() - inicio, 4)
+        return registro
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        registros = list(executor.map(_processar, arquivos))
+
+    manifesto = dict(anteriores)
+    manifesto.update((registro["entrada"], registro) for registro in registros)
+    _gravar_manifesto(caminho_manifesto, manifesto)
+    return {registro["entrada"]: registro for registro in registros}
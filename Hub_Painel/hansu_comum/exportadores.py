@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+import csv
+import importlib.util
+import json
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+__all__ = [
+    "EXPORTADORES",
+    "Tabela",
+    "exportar",
+    "exportar_csv",
+    "exportar_jsonl",
+    "exportar_parquet",
+    "exportar_xlsx",
+    "formato_disponivel",
+    "formato_do_caminho",
+    "registrar_exportador",
+    "tabela_de_dataframe",
+]
+
+# Formatos numéricos do Excel usados quando a coluna não declara o seu
+# (os mesmos que o pandas aplica em to_excel).
+FORMATO_DATA_PADRAO = "YYYY-MM-DD"
+FORMATO_DATA_HORA_PADRAO = "YYYY-MM-DD HH:MM:SS"
+SEPARADOR_CSV = ";"
+# Linhas por row group no Parquet; também é o tamanho do lote mantido em memória.
+LINHAS_POR_LOTE_PARQUET = 65_536
+
+
+@dataclass
+class Tabela:
+    """Uma tabela a exportar: uma aba no xlsx, um arquivo nos demais formatos.
+
+    ``linhas`` é consumido uma única vez e pode ser um gerador. Os valores vão
+    tipados (``str``, ``float``, ``int``, ``date``/``datetime`` ou ``None``);
+    cada formato decide como gravá-los.
+
+    - ``cabecalho``: linhas livres antes dos títulos das colunas (só xlsx);
+    - ``coluna_inicial``: deslocamento da tabela no xlsx (0 = coluna A);
+    - ``formatos``: formato numérico do Excel por coluna, para datas e números;
+    - ``contexto``: colunas constantes (ex.: CNPJ) que, no csv, jsonl e
+      parquet, vêm antes das demais em cada registro, no lugar do cabeçalho.
+    """
+
+    nome: str
+    colunas: Sequence[str]
+    linhas: Iterable[Sequence[Any]]
+    cabecalho: Sequence[Sequence[Any]] = ()
+    coluna_inicial: int = 0
+    formatos: Mapping[str, str] = field(default_factory=dict)
+    contexto: Mapping[str, Any] = field(default_factory=dict)
+
+
+Exportador = Callable[[Sequence[Tabela], Path], List[Path]]
+
+# formato -> (extensão, exportador, módulos de que depende; basta um deles)
+EXPORTADORES: Dict[str, tuple] = {}
+
+
+def registrar_exportador(formato: str, extensao: str, requer: Sequence[str] = ()):
+    """Decorador que registra ``funcao(tabelas, destino) -> [caminhos]`` para ``formato``."""
+
+    def decorar(funcao: Exportador) -> Exportador:
+        EXPORTADORES[formato] = (extensao, funcao, tuple(requer))
+        return funcao
+
+    return decorar
+
+
+def formato_disponivel(formato: str) -> bool:
+    """``True`` se o formato está registrado e alguma das dependências está instalada."""
+    if formato not in EXPORTADORES:
+        return False
+    requer = EXPORTADORES[formato][2]
+    return not requer or any(importlib.util.find_spec(modulo) is not None for modulo in requer)
+
+
+def formato_do_caminho(caminho: str | Path) -> Optional[str]:
+    sufixo = Path(caminho).suffix.lower()
+    for formato, (extensao, _, _) in EXPORTADORES.items():
+        if sufixo == extensao:
+            return formato
+    return None
+
+
+def exportar(tabelas: Sequence[Tabela], destino: str | Path, formato: Optional[str] = None) -> List[Path]:
+    """Grava ``tabelas`` em ``destino`` no ``formato`` pedido (padrão: o da extensão).
+
+    Retorna os caminhos gravados. No xlsx é sempre um arquivo; nos demais,
+    com mais de uma tabela, cada uma vai para ``<destino>_<nome da tabela>``.
+    """
+    destino = Path(destino)
+    formato = formato or formato_do_caminho(destino)
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato de saída inválido: {formato}. Disponíveis: {', '.join(EXPORTADORES)}.")
+    extensao, funcao, requer = EXPORTADORES[formato]
+    if not formato_disponivel(formato):
+        raise ImportError(f"O formato {formato} requer o pacote {' ou '.join(requer)}.")
+    return funcao(list(tabelas), destino.with_suffix(extensao))
+
+
+def tabela_de_dataframe(nome: str, df, formatos: Optional[Mapping[str, str]] = None) -> Tabela:
+    """Tabela com as linhas de um ``pandas.DataFrame``, lidas sob demanda."""
+    return Tabela(
+        nome=nome,
+        colunas=[str(coluna) for coluna in df.columns],
+        linhas=df.itertuples(index=False, name=None),
+        formatos=formatos or {},
+    )
+
+
+def _nome_arquivo(nome: str) -> str:
+    sem_acento = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode("ascii")
+    return "_".join(sem_acento.lower().split())
+
+
+def _caminhos(tabelas: Sequence[Tabela], destino: Path) -> List[Path]:
+    if len(tabelas) == 1:
+        return [destino]
+    base = destino.with_suffix("")
+    return [Path(f"{base}_{_nome_arquivo(tabela.nome)}{destino.suffix}") for tabela in tabelas]
+
+
+def _vazio(valor: Any) -> bool:
+    # NaN e NaT (pandas) são os únicos valores diferentes de si mesmos.
+    return valor is None or valor != valor
+
+
+def _valor_simples(valor: Any) -> Any:
+    """Valor representável em texto/JSON: datas em ISO 8601, NaN/NaT como ``None``."""
+    if valor is None or isinstance(valor, (str, bool, int)):
+        return valor
+    if _vazio(valor):
+        return None
+    if isinstance(valor, float):
+        return valor
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor)
+
+
+# -- xlsx ----------------------------------------------------------------
+@registrar_exportador("xlsx", ".xlsx", requer=("xlsxwriter", "openpyxl"))
+def exportar_xlsx(tabelas: Sequence[Tabela], destino: Path) -> List[Path]:
+    """Uma aba por tabela, gravada linha a linha (XlsxWriter ``constant_memory``
+    ou, sem ele, openpyxl ``write_only``)."""
+    if importlib.util.find_spec("xlsxwriter") is not None:
+        _xlsx_xlsxwriter(tabelas, destino)
+    else:
+        _xlsx_openpyxl(tabelas, destino)
+    return [destino]
+
+
+def _xlsx_xlsxwriter(tabelas: Sequence[Tabela], destino: Path) -> None:
+    import xlsxwriter
+
+    # constant_memory: cada linha vai para o disco quando a seguinte começa.
+    workbook = xlsxwriter.Workbook(str(destino), {"constant_memory": True})
+    estilos: Dict[str, Any] = {}
+
+    def estilo(formato: Optional[str]):
+        if formato is None:
+            return None
+        if formato not in estilos:
+            estilos[formato] = workbook.add_format({"num_format": formato})
+        return estilos[formato]
+
+    for tabela in tabelas:
+        ws = workbook.add_worksheet(tabela.nome)
+        inicio = tabela.coluna_inicial
+        # Formatos resolvidos uma vez por coluna: (números, date, datetime).
+        por_coluna = []
+        for coluna in tabela.colunas:
+            formato = tabela.formatos.get(coluna)
+            por_coluna.append(
+                (estilo(formato), estilo(formato or FORMATO_DATA_PADRAO), estilo(formato or FORMATO_DATA_HORA_PADRAO))
+            )
+
+        linha_atual = 0
+        for linha in tabela.cabecalho:
+            for c, valor in enumerate(linha):
+                if isinstance(valor, str):
+                    if valor:
+                        ws.write_string(linha_atual, c, valor)
+                elif not _vazio(valor):
+                    ws.write(linha_atual, c, valor)
+            linha_atual += 1
+        for c, titulo in enumerate(tabela.colunas):
+            ws.write_string(linha_atual, inicio + c, titulo)
+        linha_atual += 1
+
+        for linha in tabela.linhas:
+            for c, valor in enumerate(linha):
+                if valor is None:
+                    continue
+                if isinstance(valor, str):
+                    if valor:
+                        ws.write_string(linha_atual, inicio + c, valor)
+                elif _vazio(valor):
+                    continue
+                elif isinstance(valor, bool):
+                    ws.write_boolean(linha_atual, inicio + c, valor)
+                elif isinstance(valor, datetime):
+                    ws.write_datetime(linha_atual, inicio + c, valor, por_coluna[c][2])
+                elif isinstance(valor, date):
+                    ws.write_datetime(linha_atual, inicio + c, valor, por_coluna[c][1])
+                elif isinstance(valor, (int, float)):
+                    ws.write_number(linha_atual, inicio + c, valor, por_coluna[c][0])
+                else:
+                    ws.write_string(linha_atual, inicio + c, str(valor))
+            linha_atual += 1
+    workbook.close()
+
+
+def _xlsx_openpyxl(tabelas: Sequence[Tabela], destino: Path) -> None:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    # write_only: as linhas são serializadas ao serem acrescentadas.
+    workbook = Workbook(write_only=True)
+    for tabela in tabelas:
+        ws = workbook.create_sheet(tabela.nome)
+        recuo = [None] * tabela.coluna_inicial
+        formatos = [tabela.formatos.get(coluna) for coluna in tabela.colunas]
+
+        for linha in tabela.cabecalho:
+            ws.append(list(linha))
+        ws.append(recuo + list(tabela.colunas))
+
+        for linha in tabela.linhas:
+            celulas = list(recuo)
+            for c, valor in enumerate(linha):
+                if isinstance(valor, str) or valor is None:
+                    celulas.append(valor)
+                elif _vazio(valor):
+                    celulas.append(None)
+                elif isinstance(valor, (date, int, float)) and not isinstance(valor, bool):
+                    celula = WriteOnlyCell(ws, value=valor)
+                    if formatos[c]:
+                        celula.number_format = formatos[c]
+                    elif isinstance(valor, datetime):
+                        celula.number_format = FORMATO_DATA_HORA_PADRAO
+                    elif isinstance(valor, date):
+                        celula.number_format = FORMATO_DATA_PADRAO
+                    celulas.append(celula)
+                else:
+                    celulas.append(valor)
+            ws.append(celulas)
+    workbook.save(destino)
+
+
+# -- csv -----------------------------------------------------------------
+@registrar_exportador("csv", ".csv")
+def exportar_csv(tabelas: Sequence[Tabela], destino: Path) -> List[Path]:
+    """CSV separado por ``;``, em UTF-8, gravado à medida que as linhas chegam.
+
+    Uma linha de títulos e uma por registro; datas em ISO 8601 e números com
+    ponto decimal, como o ``float`` do Python.
+    """
+    caminhos = _caminhos(tabelas, destino)
+    for tabela, caminho in zip(tabelas, caminhos):
+        contexto = [_valor_simples(valor) for valor in tabela.contexto.values()]
+        with caminho.open("w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.writer(arquivo, delimiter=SEPARADOR_CSV)
+            escritor.writerow([*tabela.contexto, *tabela.colunas])
+            escritor.writerows(
+                contexto + [valor if valor.__class__ is str else _valor_simples(valor) for valor in linha]
+                for linha in tabela.linhas
+            )
+    return caminhos
+
+
+# -- jsonl ---------------------------------------------------------------
+@registrar_exportador("jsonl", ".jsonl")
+def exportar_jsonl(tabelas: Sequence[Tabela], destino: Path) -> List[Path]:
+    """Um objeto JSON por linha, com as colunas de ``contexto`` seguidas das da tabela."""
+    caminhos = _caminhos(tabelas, destino)
+    for tabela, caminho in zip(tabelas, caminhos):
+        contexto = {chave: _valor_simples(valor) for chave, valor in tabela.contexto.items()}
+        colunas = list(tabela.colunas)
+        # Um encoder só: json.dumps com argumentos cria um novo a cada chamada.
+        codificar = json.JSONEncoder(ensure_ascii=False).encode
+        with caminho.open("w", encoding="utf-8") as arquivo:
+            for linha in tabela.linhas:
+                registro = dict(contexto)
+                registro.update(zip(colunas, map(_valor_simples, linha)))
+                arquivo.write(codificar(registro))
+                arquivo.write("\n")
+    return caminhos
+
+
+# -- parquet -------------------------------------------------------------
+def _lotes(linhas: Iterable[Sequence[Any]], tamanho: int) -> Iterator[List[Sequence[Any]]]:
+    lote: List[Sequence[Any]] = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+# Tipos que nunca são NaN/NaT: dispensam o teste de vazio valor a valor.
+_TIPOS_SEM_NAN = frozenset({str, int, bool, date, datetime})
+
+
+def _tipo_arrow(pa, valores: Sequence[Any]):
+    """Tipo Arrow dos valores de uma coluna (``None`` se estão todos vazios); tipos mistos viram texto."""
+    tipos = set(map(type, valores))
+    tipos.discard(type(None))
+    if not tipos <= _TIPOS_SEM_NAN:
+        tipos = {type(valor) for valor in valores if valor is not None and valor == valor}
+    if not tipos:
+        return None
+    if all(issubclass(tipo, datetime) for tipo in tipos):
+        return pa.timestamp("us")
+    if all(issubclass(tipo, date) and not issubclass(tipo, datetime) for tipo in tipos):
+        return pa.date32()
+    if tipos == {bool}:
+        return pa.bool_()
+    if all(issubclass(tipo, int) and tipo is not bool for tipo in tipos):
+        return pa.int64()
+    if all(issubclass(tipo, (int, float)) and tipo is not bool for tipo in tipos):
+        return pa.float64()
+    return pa.string()
+
+
+def _tipo_comum(pa, atual, novo):
+    """Tipo que comporta ``atual`` e ``novo``.
+
+    Nulo (coluna ainda sem valores) assume o outro tipo; inteiros alargam
+    para float e o resto para texto.
+    """
+    if novo is None or pa.types.is_null(novo) or novo == atual:
+        return atual
+    if pa.types.is_null(atual):
+        return novo
+    if {atual, novo} == {pa.int64(), pa.float64()}:
+        return pa.float64()
+    return pa.string()
+
+
+def _texto_arrow(pa, valores: Iterable[Any]):
+    return pa.array(
+        [None if _vazio(valor) else valor if isinstance(valor, str) else str(_valor_simples(valor)) for valor in valores],
+        type=pa.string(),
+    )
+
+
+def _coluna_arrow(pa, valores: Sequence[Any], tipo):
+    """Array no ``tipo`` da coluna; se algum valor não couber nele (ex.: int além do int64), vira texto."""
+    if not pa.types.is_string(tipo):
+        try:
+            return pa.array(valores, type=tipo, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+            pass
+    return _texto_arrow(pa, valores)
+
+
+def _converter_coluna(pa, coluna, tipo):
+    """Coluna já montada (ou lida do arquivo) convertida para o tipo alargado."""
+    if coluna.type == tipo:
+        return coluna
+    if pa.types.is_string(tipo):
+        return _texto_arrow(pa, coluna.to_pylist())
+    return coluna.cast(tipo)
+
+
+def _regravar_parquet(pa, pq, origem: Path, destino: Path, schema):
+    """Copia ``origem`` para ``destino`` com o ``schema`` alargado, um row group por vez.
+
+    Devolve o escritor de ``destino`` aberto, para os lotes seguintes.
+    """
+    escritor = pq.ParquetWriter(str(destino), schema)
+    arquivo = pq.ParquetFile(str(origem))
+    try:
+        for indice in range(arquivo.num_row_groups):
+            grupo = arquivo.read_row_group(indice)
+            arrays = [_converter_coluna(pa, grupo.column(i), schema.field(i).type) for i in range(len(schema))]
+            escritor.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    except BaseException:
+        escritor.close()
+        raise
+    finally:
+        arquivo.close()
+    origem.unlink()
+    return escritor
+
+
+@registrar_exportador("parquet", ".parquet", requer=("pyarrow",))
+def exportar_parquet(tabelas: Sequence[Tabela], destino: Path) -> List[Path]:
+    """Parquet via pyarrow, em row groups de :data:`LINHAS_POR_LOTE_PARQUET` linhas.
+
+    O tipo de cada coluna vem do primeiro lote; coluna ainda sem nenhum
+    valor fica com o tipo nulo. Se um lote seguinte trouxer outro tipo (ex.:
+    ``""`` depois de uma sequência de datas), a coluna é alargada: nulo
+    para o tipo que chegou, inteiros para float, o resto para texto, e o que
+    já foi gravado é regravado com o novo tipo.
+    O arquivo é montado em um temporário ao lado do destino e só o
+    substitui no fim; em caso de erro, nada fica pela metade.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    caminhos = _caminhos(tabelas, destino)
+    for tabela, caminho in zip(tabelas, caminhos):
+        nomes = [*tabela.contexto, *tabela.colunas]
+        constantes = [_valor_simples(valor) for valor in tabela.contexto.values()]
+        temporarios = [caminho.with_name(f".{caminho.name}.{n}.tmp") for n in range(2)]
+        atual = 0
+        escritor = None
+        schema = None
+        try:
+            for lote in _lotes(tabela.linhas, LINHAS_POR_LOTE_PARQUET):
+                colunas = [[valor] * len(lote) for valor in constantes]
+                colunas.extend(list(coluna) for coluna in zip(*lote))
+                if schema is None:
+                    tipos = [_tipo_arrow(pa, valores) or pa.null() for valores in colunas]
+                else:
+                    tipos = [
+                        _tipo_comum(pa, schema.field(i).type, _tipo_arrow(pa, valores))
+                        for i, valores in enumerate(colunas)
+                    ]
+                arrays = [_coluna_arrow(pa, valores, tipo) for valores, tipo in zip(colunas, tipos)]
+                # Um valor fora do tipo (int além do int64) também alarga a coluna.
+                tipos = [_tipo_comum(pa, tipo, array.type) for tipo, array in zip(tipos, arrays)]
+                arrays = [_converter_coluna(pa, array, tipo) for array, tipo in zip(arrays, tipos)]
+                novo_schema = pa.schema(list(zip(nomes, tipos)))
+
+                if schema is None:
+                    escritor = pq.ParquetWriter(str(temporarios[atual]), novo_schema)
+                elif not novo_schema.equals(schema):
+                    escritor.close()
+                    escritor = None  # fechado; se a regravação falhar, não fecha de novo
+                    escritor = _regravar_parquet(pa, pq, temporarios[atual], temporarios[1 - atual], novo_schema)
+                    atual = 1 - atual
+                schema = novo_schema
+                escritor.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+            if escritor is None:
+                schema = pa.schema([(nome, pa.string()) for nome in nomes])
+                pq.write_table(schema.empty_table(), str(temporarios[atual]))
+            else:
+                escritor.close()
+                escritor = None
+            temporarios[atual].replace(caminho)
+        except BaseException:
+            if escritor is not None:
+                escritor.close()
+            for temporario in temporarios:
+                temporario.unlink(missing_ok=True)
+            raise
+    return caminhos
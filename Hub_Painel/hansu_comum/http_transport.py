@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import http.client
+import random
+import ssl
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Failures typical of the server dropping an idle keep-alive connection. The
+# request may still have reached the server, so the free resend on a reused
+# connection is limited to methods that may be retried.
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class TransportError(Exception):
+    """Connection-level failure (DNS, refused, timeout, reset) after all retries."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    elapsed_ms: float
+    attempts: int
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="ignore")
+
+
+@dataclass(frozen=True)
+class RequestTiming:
+    method: str
+    path: str
+    status: int | None
+    elapsed_ms: float
+    attempts: int
+    reused_connection: bool
+
+
+@dataclass
+class TransportMetrics:
+    """Per-request timings plus running totals; ``recent`` keeps the last N."""
+
+    max_recent: int = 500
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    total_ms: float = 0.0
+    recent: deque = field(default_factory=deque)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, timing: RequestTiming) -> None:
+        with self._lock:
+            self.requests += 1
+            self.retries += timing.attempts - 1
+            self.failures += timing.status is None or timing.status >= 400
+            self.total_ms += timing.elapsed_ms
+            self.recent.append(timing)
+            while len(self.recent) > self.max_recent:
+                self.recent.popleft()
+
+    def connection(self, reused: bool) -> None:
+        with self._lock:
+            if reused:
+                self.connections_reused += 1
+            else:
+                self.connections_opened += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.connections_reused,
+                "avg_ms": round(self.total_ms / self.requests, 2) if self.requests else 0.0,
+            }
+
+
+class HttpTransport:
+    """Small HTTP/1.1 client with a keep-alive connection pool.
+
+    Idle connections are kept per ``(scheme, host, port)`` (up to
+    ``pool_size`` each) and reused by the next request, so a burst of calls
+    pays one TCP/TLS handshake instead of one per call. Responses are
+    requested with ``Accept-Encoding: gzip`` and decoded transparently.
+
+    Retries use exponential backoff with jitter (honouring ``Retry-After``):
+    429 is retried for any method, 5xx and connection errors only for
+    idempotent methods or when ``retry_unsafe`` is set. A reused connection
+    the server already closed is always retried once on a fresh one. Proxies
+    from the environment are not used, same as the previous urllib openers.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 8,
+        max_retries: int = 3,
+        backoff_s: float = 0.2,
+        max_backoff_s: float = 5.0,
+        ssl_context: ssl.SSLContext | None = None,
+    ):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.metrics = TransportMetrics()
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    # -- connection pool -------------------------------------------------
+    def _checkout(self, origin: tuple[str, str, int], timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(origin)
+            conn = idle.pop() if idle else None
+
+        reused = conn is not None
+        if conn is None:
+            scheme, host, port = origin
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+            else:
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        else:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+
+        self.metrics.connection(reused)
+        return conn, reused
+
+    def _checkin(self, origin: tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    # -- requests --------------------------------------------------------
+    def _delay(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff_s)
+            except ValueError:
+                pass
+        delay = min(self.backoff_s * (2 ** attempt), self.max_backoff_s)
+        return delay * (0.5 + random.random() / 2)
+
+    def _exchange(
+        self,
+        origin: tuple[str, str, int],
+        conn: http.client.HTTPConnection,
+        method: str,
+        target: str,
+        headers: dict[str, str],
+        body: bytes | None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        try:
+            conn.request(method, target, body=body, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        response_headers = {key.lower(): value for key, value in response.getheaders()}
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(origin, conn)
+
+        encoding = response_headers.get("content-encoding", "").lower()
+        if encoding in {"gzip", "x-gzip"}:
+            raw = zlib.decompress(raw, 16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            raw = zlib.decompress(raw)
+        return response.status, response_headers, raw
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float = 15,
+        retry_unsafe: bool = False,
+    ) -> HttpResponse:
+        """Sends the request and returns the final response, whatever its status.
+
+        Raises :class:`TransportError` only when no response could be obtained.
+        """
+        method = method.upper()
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme.lower()
+        port = parsed.port or (443 if scheme == "https" else 80)
+        origin = (scheme, parsed.hostname or "", port)
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+
+        send_headers = {"Accept-Encoding": "gzip", "Connection": "keep-alive"}
+        send_headers.update(headers or {})
+        can_retry = retry_unsafe or method in IDEMPOTENT_METHODS
+
+        started = time.perf_counter()
+        attempts = 0
+        reused = False
+        stale_retry_used = False
+        while True:
+            attempts += 1
+            conn, reused = self._checkout(origin, timeout)
+            try:
+                status, response_headers, raw = self._exchange(origin, conn, method, target, send_headers, body)
+            except _STALE_CONNECTION_ERRORS as exc:
+                if reused and can_retry and not stale_retry_used:
+                    stale_retry_used = True
+                    continue
+                error = exc
+            except (OSError, http.client.HTTPException, zlib.error) as exc:
+                error = exc
+            else:
+                retryable = status == 429 or (status in RETRY_STATUSES and can_retry)
+                if retryable and attempts <= self.max_retries:
+                    time.sleep(self._delay(attempts - 1, response_headers.get("retry-after")))
+                    continue
+
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.metrics.record(RequestTiming(method, parsed.path, status, elapsed_ms, attempts, reused))
+                return HttpResponse(status, response_headers, raw, elapsed_ms, attempts)
+
+            if can_retry and attempts <= self.max_retries:
+                time.sleep(self._delay(attempts - 1, None))
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record(RequestTiming(method, parsed.path, None, elapsed_ms, attempts, reused))
+            raise TransportError(str(getattr(error, "reason", None) or error or type(error).__name__)) from error
+
+
+_shared_transport: HttpTransport | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_transport() -> HttpTransport:
+    """Process-wide transport, so every service instance shares one pool."""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport()
+        return _shared_transport
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+
+PERMISSIONS_CHUNK_SIZE = 500
+PERMISSIONS_PAGE_SIZE = 1000
+PERMISSION_COLUMNS = "license_id,module_id,is_allowed"
+# Upsert em lote (POST com array) em license_module_permissions.
+PERMISSIONS_UPSERT_QUERY = {"on_conflict": "license_id,module_id", "select": PERMISSION_COLUMNS}
+PERMISSIONS_UPSERT_PREFER = "resolution=merge-duplicates,return=representation"
+
+
+def normalize_permission_rows(rows: Iterable[dict]) -> list[dict]:
+    return [
+        {
+            "license_id": row["license_id"],
+            "module_id": row["module_id"],
+            "is_allowed": bool(row["is_allowed"]),
+        }
+        for row in rows
+    ]
+
+
+def permission_chunks(rows: Iterable[dict], chunk_size: int = PERMISSIONS_CHUNK_SIZE) -> list[list[dict]]:
+    """Linhas normalizadas em lotes de ``chunk_size``, um POST por lote."""
+    normalized = normalize_permission_rows(rows)
+    return [normalized[start : start + chunk_size] for start in range(0, len(normalized), chunk_size)]
+
+
+def diff_permissions(
+    desired: Mapping[tuple[str, str], bool] | Iterable[dict],
+    current_rows: Iterable[dict],
+    revoke_missing: bool = False,
+) -> tuple[list[dict], dict]:
+    """Linhas a enviar para chegar de ``current_rows`` a ``desired`` e um resumo.
+
+    ``desired`` é ``{(license_id, module_id): is_allowed}`` ou uma lista de
+    linhas com essas chaves. Pares já iguais ficam de fora. Com
+    ``revoke_missing=True``, permissões hoje liberadas e ausentes de
+    ``desired`` passam a ``is_allowed=False``.
+    """
+    if isinstance(desired, Mapping):
+        wanted = {pair: bool(allowed) for pair, allowed in desired.items()}
+    else:
+        wanted = {(row["license_id"], row["module_id"]): bool(row["is_allowed"]) for row in desired}
+
+    current = {(row["license_id"], row["module_id"]): bool(row.get("is_allowed")) for row in current_rows}
+
+    changes = [
+        {"license_id": license_id, "module_id": module_id, "is_allowed": allowed}
+        for (license_id, module_id), allowed in wanted.items()
+        if current.get((license_id, module_id)) != allowed
+    ]
+    updated = len(changes)
+    if revoke_missing:
+        for (license_id, module_id), allowed in current.items():
+            if allowed and (license_id, module_id) not in wanted:
+                changes.append({"license_id": license_id, "module_id": module_id, "is_allowed": False})
+
+    return changes, {
+        "unchanged": len(wanted) - updated,
+        "updated": updated,
+        "revoked": len(changes) - updated,
+    }
+
+
+def sync_summary(summary: dict, changes: list[dict], chunk_size: int, saved: list[dict]) -> dict:
+    """Resultado de ``sync_permissions``: o resumo do diff, os POSTs feitos e as linhas gravadas."""
+    return {**summary, "requests": -(-len(changes) // chunk_size), "rows": saved}
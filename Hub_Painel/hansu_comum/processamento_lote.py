@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "ResultadoArquivo",
+    "executar_em_lote",
+]
+
+Progresso = Callable[[int, int, str], None]
+
+
+@dataclass
+class ResultadoArquivo:
+    """Resultado de um arquivo do lote; ``erro`` preenchido em caso de falha."""
+
+    caminho: str
+    resultado: Any = None
+    erro: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.erro is None
+
+
+def _executar_trecho(
+    funcao: Callable[[str], Any],
+    trecho: Sequence[Tuple[int, str]],
+) -> List[Tuple[int, ResultadoArquivo]]:
+    """Processa um trecho de arquivos no worker, isolando o erro de cada um."""
+    saida: List[Tuple[int, ResultadoArquivo]] = []
+    for indice, caminho in trecho:
+        try:
+            saida.append((indice, ResultadoArquivo(caminho, resultado=funcao(caminho))))
+        except Exception as exc:  # o lote não pode abortar por um arquivo
+            saida.append((indice, ResultadoArquivo(caminho, erro=f"{type(exc).__name__}: {exc}")))
+    return saida
+
+
+def executar_em_lote(
+    funcao: Callable[[str], Any],
+    caminhos: Sequence[str],
+    max_workers: Optional[int] = None,
+    chunksize: int = 1,
+    progresso: Optional[Progresso] = None,
+) -> List[ResultadoArquivo]:
+    """Aplica ``funcao`` a cada caminho em um ``ProcessPoolExecutor``.
+
+    Parameters
+    ----------
+    funcao : Callable[[str], Any]
+        Função de nível de módulo (precisa ser serializável via pickle).
+    caminhos : Sequence[str]
+        Arquivos a processar.
+    max_workers : int | None
+        Número de processos; ``None`` usa o padrão do executor e ``1``
+        processa no próprio processo, sem pool.
+    chunksize : int
+        Quantidade de arquivos enviada a cada worker por tarefa.
+    progresso : Callable[[int, int, str], None] | None
+        Chamado no processo principal como ``progresso(concluidos, total,
+        caminho)`` a cada arquivo finalizado.
+
+    Returns
+    -------
+    list[ResultadoArquivo]
+        Na mesma ordem de ``caminhos``; falhas ficam em ``erro`` em vez de
+        interromper o lote.
+    """
+    caminhos = [str(caminho) for caminho in caminhos]
+    total = len(caminhos)
+    resultados: List[Optional[ResultadoArquivo]] = [None] * total
+    concluidos = 0
+
+    def _registrar(itens: List[Tuple[int, ResultadoArquivo]]) -> None:
+        nonlocal concluidos
+        for indice, resultado in itens:
+            resultados[indice] = resultado
+            concluidos += 1
+            if progresso:
+                progresso(concluidos, total, resultado.caminho)
+
+    indexados = list(enumerate(caminhos))
+    chunksize = max(1, chunksize)
+    trechos = [indexados[i : i + chunksize] for i in range(0, total, chunksize)]
+
+    if max_workers == 1 or len(trechos) <= 1:
+        for trecho in trechos:
+            _registrar(_executar_trecho(funcao, trecho))
+        return resultados  # type: ignore[return-value]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {executor.submit(_executar_trecho, funcao, trecho): trecho for trecho in trechos}
+        for futuro in as_completed(futuros):
+            try:
+                itens = futuro.result()
+            except Exception as exc:  # ex.: worker encerrado abruptamente
+                erro = f"{type(exc).__name__}: {exc}"
+                itens = [(indice, ResultadoArquivo(caminho, erro=erro)) for indice, caminho in futuros[futuro]]
+            _registrar(itens)
+
+    return resultados  # type: ignore[return-value]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import mmap
+import re
+import shutil
+from pathlib import Path
+from typing import Callable
+
+__all__ = [
+    "reescrever_registro_0000",
+]
+
+_RE_REGISTRO_0000 = re.compile(rb"^\|0000\|", re.M)
+_BUFFER_COPIA = 1 << 20
+
+
+def reescrever_registro_0000(
+    origem: str | Path,
+    destino: str | Path,
+    alterar_linha: Callable[[str], str],
+    encoding: str = "latin1",
+) -> Path:
+    """Grava em ``destino`` uma cópia de ``origem`` com o ``|0000|`` alterado.
+
+    Só a linha do ``|0000|`` é decodificada e passada a ``alterar_linha``
+    (sem o terminador, que é preservado). O restante do arquivo é copiado
+    em blocos binários:
+
+    * mesmo tamanho de linha: cópia via ``shutil.copyfile`` (cópia no
+      kernel quando o SO permite) e os bytes do registro são sobrescritos
+      no destino através de ``mmap``;
+    * tamanho diferente: grava o trecho inicial, a nova linha e copia o
+      resto com ``shutil.copyfileobj``.
+
+    Assim memória e CPU não crescem com o tamanho do arquivo. Sem
+    ``|0000|``, o destino é uma cópia idêntica.
+    """
+    origem = Path(origem)
+    destino = Path(destino)
+
+    if origem.stat().st_size == 0:
+        shutil.copyfile(origem, destino)
+        return destino
+
+    with open(origem, "rb") as f_in:
+        with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            achado = _RE_REGISTRO_0000.search(mm)
+            if not achado:
+                inicio = fim = None
+            else:
+                inicio = achado.start()
+                fim_linha = mm.find(b"\n", inicio)
+                fim = len(mm) if fim_linha < 0 else fim_linha
+                if fim > inicio and mm[fim - 1 : fim] == b"\r":
+                    fim -= 1
+                antiga = mm[inicio:fim]
+                cabecalho = mm[:inicio]
+
+        if inicio is None:
+            shutil.copyfile(origem, destino)
+            return destino
+
+        nova = alterar_linha(antiga.decode(encoding)).rstrip("\r\n").encode(encoding)
+
+        if len(nova) == len(antiga):
+            shutil.copyfile(origem, destino)
+            with open(destino, "r+b") as f_out:
+                with mmap.mmap(f_out.fileno(), 0) as mm_out:
+                    mm_out[inicio:fim] = nova
+                    mm_out.flush()
+            return destino
+
+        with open(destino, "wb") as f_out:
+            f_out.write(cabecalho)
+            f_out.write(nova)
+            f_in.seek(fim)
+            shutil.copyfileobj(f_in, f_out, _BUFFER_COPIA)
+
+    return destino
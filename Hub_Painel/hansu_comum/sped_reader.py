@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import mmap
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .cache_extracao import cache_padrao
+
+__all__ = [
+    "REGISTRO_ABERTURA",
+    "indexar_blocos",
+    "iterar_registros",
+    "ler_arquivo_sped",
+    "ler_blocos_sped",
+]
+
+REGISTRO_ABERTURA = "0000"
+
+# Abertura (X001) e encerramento (X990) de bloco, sempre em início de linha.
+_RE_LIMITE_BLOCO = re.compile(rb"^\|([0-9A-Z])(001|990)\|", re.M)
+# Incrementar quando o formato do índice mudar, para invalidar os gravados.
+VERSAO_INDICE = "1"
+
+# Buffer de leitura generoso: arquivos SPED chegam a centenas de MB e a
+# leitura linha a linha fica limitada por syscalls com o buffer padrão.
+_BUFFER_LEITURA = 1 << 20
+
+
+# ---------------------------------------------------------------------------
+# Tokenizador
+# ---------------------------------------------------------------------------
+
+def iterar_registros(
+    linhas: Iterable[str],
+    registros: Iterable[str] | None = None,
+    incluir_abertura: bool = True,
+) -> Iterator[Tuple[str, List[str]]]:
+    """Percorre ``linhas`` em fluxo e devolve ``(reg, campos)`` por registro.
+
+    ``campos`` é a linha já separada por ``|`` (``campos[1]`` é o próprio
+    código do registro), preservando a numeração de colunas do leiaute.
+
+    Parameters
+    ----------
+    linhas : Iterable[str]
+        Qualquer iterável de linhas (arquivo aberto, lista, gerador).
+    registros : Iterable[str] | None
+        Códigos desejados (ex.: ``("E110", "E115")``). O filtro é aplicado
+        antes do ``split``, então linhas descartadas não geram listas.
+        ``None`` devolve todos os registros.
+    incluir_abertura : bool
+        Quando há filtro, inclui também o registro ``0000`` para que o
+        cabeçalho seja obtido na mesma passada.
+    """
+    filtro = None
+    if registros is not None:
+        filtro = frozenset(registros)
+        if incluir_abertura:
+            filtro |= {REGISTRO_ABERTURA}
+
+    for linha in linhas:
+        if linha[:1] != "|":
+            linha = linha.lstrip()
+            if linha[:1] != "|":
+                continue
+
+        if filtro is not None and (linha[5:6] != "|" or linha[1:5] not in filtro):
+            continue
+
+        campos = linha.strip().split("|")
+        if len(campos) < 2:
+            continue
+        yield campos[1], campos
+
+
+def ler_arquivo_sped(
+    caminho: str | Path,
+    registros: Iterable[str] | None = None,
+    incluir_abertura: bool = True,
+    encoding: str = "latin1",
+) -> Iterator[Tuple[str, List[str]]]:
+    """Abre ``caminho`` e devolve seus registros via :func:`iterar_registros`.
+
+    O arquivo é lido linha a linha, então o consumo de memória não depende
+    do tamanho do arquivo.
+    """
+    with open(caminho, "r", encoding=encoding, buffering=_BUFFER_LEITURA) as f:
+        yield from iterar_registros(f, registros, incluir_abertura)
+
+
+# ---------------------------------------------------------------------------
+# Índice de blocos
+# ---------------------------------------------------------------------------
+
+def _mapear_blocos(caminho: Path, tamanho: int) -> Dict[str, Tuple[int, int]]:
+    """Varre o arquivo via mmap e devolve ``{bloco: (inicio, fim)}`` em bytes.
+
+    ``inicio`` é o início da linha ``|X001|``; ``fim`` é o fim da linha
+    ``|X990|`` (ou o início do bloco seguinte, se o encerramento faltar).
+    """
+    if tamanho == 0:
+        return {}
+
+    aberturas: Dict[str, int] = {}
+    encerramentos: Dict[str, int] = {}
+    with open(caminho, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in _RE_LIMITE_BLOCO.finditer(mm):
+            bloco = m.group(1).decode("ascii")
+            if m.group(2) == b"001":
+                aberturas.setdefault(bloco, m.start())
+            else:
+                fim_linha = mm.find(b"\n", m.end())
+                encerramentos[bloco] = tamanho if fim_linha < 0 else fim_linha + 1
+
+    ordenados = sorted(aberturas.items(), key=lambda item: item[1])
+    blocos: Dict[str, Tuple[int, int]] = {}
+    for idx, (bloco, inicio) in enumerate(ordenados):
+        proximo = ordenados[idx + 1][1] if idx + 1 < len(ordenados) else tamanho
+        fim = encerramentos.get(bloco, proximo)
+        blocos[bloco] = (inicio, fim if fim > inicio else proximo)
+    return blocos
+
+
+def indexar_blocos(caminho: str | Path, usar_cache: bool = True) -> Dict[str, Tuple[int, int]]:
+    """Devolve os deslocamentos ``(inicio, fim)`` de cada bloco do arquivo.
+
+    O índice fica no :func:`~hansu_comum.cache_extracao.cache_padrao`
+    (``HANSU_CACHE_DIR``), pelo hash do conteúdo do arquivo, e nunca na
+    pasta do usuário; execuções seguintes sobre o mesmo conteúdo não voltam
+    a varrer o arquivo. Com o cache desativado, o índice é refeito a cada
+    chamada.
+    """
+    caminho = Path(caminho)
+    cache = cache_padrao() if usar_cache else None
+    if cache is None:
+        return _mapear_blocos(caminho, caminho.stat().st_size)
+    return cache.obter_ou_calcular(
+        caminho,
+        "sped_reader.blocos",
+        VERSAO_INDICE,
+        lambda: _mapear_blocos(caminho, caminho.stat().st_size),
+    )
+
+
+def _linhas_no_intervalo(f, inicio: int, fim: int, encoding: str) -> Iterator[str]:
+    f.seek(inicio)
+    restante = fim - inicio
+    while restante > 0:
+        linha = f.readline()
+        if not linha:
+            break
+        restante -= len(linha)
+        yield linha.decode(encoding)
+
+
+def ler_blocos_sped(
+    caminho: str | Path,
+    blocos: Iterable[str],
+    registros: Iterable[str] | None = None,
+    incluir_abertura: bool = True,
+    encoding: str = "latin1",
+) -> Iterator[Tuple[str, List[str]]]:
+    """Como :func:`ler_arquivo_sped`, mas lê apenas os ``blocos`` pedidos.
+
+    Usa :func:`indexar_blocos` para saltar direto aos blocos (ex.: ``"E"``,
+    ``"H"``, ``"M"``) e lê do início do arquivo só o trecho anterior ao
+    primeiro bloco, onde fica o ``|0000|``. Se algum bloco pedido não
+    estiver no índice (arquivo fora do leiaute), lê o arquivo inteiro.
+    """
+    indice = indexar_blocos(caminho)
+    blocos = tuple(blocos)
+    if not indice or any(bloco not in indice for bloco in blocos):
+        yield from ler_arquivo_sped(caminho, registros, incluir_abertura, encoding)
+        return
+
+    with open(caminho, "rb", buffering=_BUFFER_LEITURA) as f:
+        if incluir_abertura:
+            primeiro_bloco = min(inicio for inicio, _ in indice.values())
+            cabecalho = _linhas_no_intervalo(f, 0, primeiro_bloco, encoding)
+            yield from iterar_registros(cabecalho, (REGISTRO_ABERTURA,), incluir_abertura=False)
+
+        for inicio, fim in sorted(indice[bloco] for bloco in blocos):
+            linhas = _linhas_no_intervalo(f, inicio, fim, encoding)
+            yield from iterar_registros(linhas, registros, incluir_abertura=False)
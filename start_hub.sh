@@ -167,6 +167,7 @@ trap cleanup EXIT INT TERM
 echo "🚀 Starting backend on port $API_PORT..."
 (
   cd "$BACKEND_DIR"
+  # Single worker on purpose: extraction jobs live in process memory.
   "$PYTHON_BIN" -m uvicorn backend.api:app --host 0.0.0.0 --port "$API_PORT" --reload
 ) &
 BACKEND_PID=$!